@@ -0,0 +1,95 @@
+"""
+Benchmark: 1k concurrent thumbnail requests against a running backend.
+
+    uvicorn main:app --workers 4          (in another shell)
+    python -m benchmarks.bench_image_serving --concurrency 1000
+
+Thumbnail URLs are taken from GET /products/ (PrimaryImageVariants.thumb),
+falling back to the original PrimaryImage. Runs a cold pass (full bodies) and
+a revalidation pass (If-None-Match, expecting 304s) and prints latency
+percentiles and throughput for each.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import httpx
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def fetch_thumbnail_urls(client):
+    response = await client.get("/products/")
+    response.raise_for_status()
+    urls = []
+    for product in response.json():
+        thumb = (product.get("PrimaryImageVariants") or {}).get("thumb", {})
+        url = thumb.get("webp") or product.get("PrimaryImage")
+        if url:
+            urls.append("/" + url)
+    return urls
+
+
+async def run_pass(client, urls, total, concurrency, etags=None):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    statuses = {}
+    received = 0
+
+    async def one(i):
+        nonlocal received
+        url = urls[i % len(urls)]
+        headers = {"If-None-Match": etags[url]} if etags and url in etags else {}
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.get(url, headers=headers)
+            latencies.append(time.perf_counter() - start)
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+        received += len(response.content)
+        if etags is not None and "etag" in response.headers:
+            etags.setdefault(url, response.headers["etag"])
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(total)))
+    elapsed = time.perf_counter() - start
+
+    return {
+        "requests": total,
+        "seconds": round(elapsed, 3),
+        "req_per_sec": round(total / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "mean_ms": round(statistics.mean(latencies) * 1000, 2),
+        "bytes": received,
+        "statuses": statuses,
+    }
+
+
+async def main(args):
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=60) as client:
+        urls = [args.path] if args.path else await fetch_thumbnail_urls(client)
+        if not urls:
+            raise SystemExit("No product images found; pass --path /uploads/products/...")
+
+        etags = {}
+        cold = await run_pass(client, urls, args.requests, args.concurrency, etags)
+        warm = await run_pass(client, urls, args.requests, args.concurrency, etags)
+
+    print(f"{len(urls)} distinct image(s), {args.requests} requests, concurrency {args.concurrency}")
+    print("cold (200):        ", cold)
+    print("revalidate (304):  ", warm)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--path", help="Benchmark a single image path instead of the catalog thumbnails")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=1000)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,60 @@
+"""
+Micro-benchmark: serialize a 10k-row catalog response.
+
+    python -m benchmarks.bench_json_render --rows 10000
+
+Compares FastAPI's default path (jsonable_encoder + JSONResponse.render) with
+FastJSONResponse on rows shaped like GET /products/ (Decimal prices and
+ratings, dates), built from tuples the way fetch_dicts does.
+"""
+from datetime import date, timedelta
+from decimal import Decimal
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from responses import FastJSONResponse
+import argparse
+import statistics
+import time
+
+COLUMNS = ("PID", "ProductName", "Description", "Price", "TotalStock", "SellerCount",
+           "PrimaryImage", "AvgRating", "ReviewCount", "ListedOn")
+
+
+def make_rows(count: int):
+    today = date.today()
+    rows = [
+        (f"PROD{1700000000000 + i}ABCDE", f"Product {i}", "Gently used, includes all accessories. " * 3,
+         Decimal(f"{100 + i % 900}.{i % 100:02d}"), Decimal(i % 17), i % 4,
+         f"uploads/products/{i:064x}.webp", Decimal("4.2500") if i % 3 else None, i % 40,
+         today - timedelta(days=i % 365))
+        for i in range(count)
+    ]
+    return [dict(zip(COLUMNS, row)) for row in rows]
+
+
+def best_of(fn, repeat: int):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings), statistics.median(timings)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    default_body = JSONResponse(jsonable_encoder(rows)).body
+    fast_body = FastJSONResponse(rows).body
+
+    default = best_of(lambda: JSONResponse(jsonable_encoder(rows)), args.repeat)
+    fast = best_of(lambda: FastJSONResponse(rows), args.repeat)
+
+    print(f"{args.rows} rows, best/median of {args.repeat}")
+    print(f"jsonable_encoder + JSONResponse: {default[0] * 1000:8.2f} ms / {default[1] * 1000:8.2f} ms  ({len(default_body)} bytes)")
+    print(f"FastJSONResponse:                {fast[0] * 1000:8.2f} ms / {fast[1] * 1000:8.2f} ms  ({len(fast_body)} bytes)")
+    print(f"speedup: {default[0] / fast[0]:.1f}x")
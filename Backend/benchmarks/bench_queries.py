@@ -0,0 +1,182 @@
+"""
+Benchmark: the read endpoints' router functions against a seeded database,
+compared with stored baselines.
+
+    python -m benchmarks.seed_dataset                    (once; see its --help)
+    python -m benchmarks.bench_queries --update          # record baselines.json on the reference machine
+    python -m benchmarks.bench_queries                   # compare; exits 1 on a regression
+
+Each case calls a router function directly, the way FastAPI's threadpool
+would: pool checkout, every query it runs, building the rows and rendering
+the response, with no HTTP or middleware around it. Its median over --repeat
+runs (after --warmup runs) is a regression when it is more than --tolerance
+slower than the baseline and by at least --min-delta-ms. Baselines are only
+comparable on the same machine, MySQL configuration and dataset; the
+dataset's row counts are stored with them and a mismatch is reported. No
+baselines.json is checked in for that reason: record one with --update on
+the machine that runs the comparison. Comparing without one is an error
+rather than a run where every case passes as new.
+"""
+from pathlib import Path
+from dotenv import load_dotenv
+import argparse
+import json
+import orjson
+import os
+import statistics
+import sys
+import time
+
+BASELINES = Path(__file__).resolve().parent / "baselines.json"
+COUNTED_TABLES = ("Users", "Products", "Lists", "Orders", "Order_Details", "Feedbacks", "Review_Upvotes")
+SORT_MODES = ("name", "price_asc", "price_desc", "newest")
+
+
+def body(response):
+    """Decoded JSON of a FastJSONResponse, or the dict a router returned"""
+    return orjson.loads(response.body) if hasattr(response, "body") else response
+
+
+def query_all(sql: str, params=()):
+    from db import get_db
+
+    conn = get_db()
+    cursor = conn.cursor()
+    try:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def dataset_counts():
+    return {table: query_all(f"SELECT COUNT(*) FROM {table}")[0][0] for table in COUNTED_TABLES}
+
+
+def pick_samples():
+    """Representative keys: the busiest and a median buyer, the most reviewed and most listed products, ..."""
+    buyers = query_all("SELECT EmailID FROM Orders GROUP BY EmailID ORDER BY COUNT(*) DESC, EmailID")
+    reviewed = query_all("SELECT PID FROM Product_Rating_Summary ORDER BY ReviewCount DESC, PID LIMIT 1")
+    return {
+        "busy_buyer": buyers[0][0],
+        "median_buyer": buyers[len(buyers) // 2][0],
+        "order_id": query_all("SELECT MAX(OrderID) FROM Orders WHERE EmailID = %s", (buyers[0][0],))[0][0],
+        "reviewed_pid": reviewed[0][0],
+        "listed_pid": query_all("SELECT PID FROM Lists GROUP BY PID ORDER BY COUNT(*) DESC, PID LIMIT 1")[0][0],
+        "seller": query_all("SELECT EmailID FROM Lists GROUP BY EmailID ORDER BY COUNT(*) DESC, EmailID LIMIT 1")[0][0],
+        "basket": [row[0] for row in query_all("SELECT DISTINCT PID FROM Lists ORDER BY PID DESC LIMIT 20")],
+        "category_id": query_all("SELECT CategoryID FROM Product_Category GROUP BY CategoryID ORDER BY COUNT(*) DESC LIMIT 1")[0][0],
+    }
+
+
+def build_cases(samples: dict):
+    """[(name, zero-argument callable)]; query parameters are passed explicitly since the
+    functions' defaults are FastAPI Query() markers"""
+    from routers import products, orders, stock, feedback, lists, category
+
+    def product_list(sort_by="name", category_id=None, min_price=None, max_price=None, search=None, fields=None):
+        return lambda: products.get_all_products(category_id=category_id, min_price=min_price, max_price=max_price,
+                                                 sort_by=sort_by, search=search, fields=fields)
+
+    second_page = body(feedback.get_product_feedbacks(samples["reviewed_pid"], cursor=None, limit=10))["next_cursor"]
+    basket = stock.StockCheckMultipleRequest(items=[{"PID": pid, "Quantity": 2} for pid in samples["basket"]])
+
+    cases = [(f"products.list sort={sort_by}", product_list(sort_by)) for sort_by in SORT_MODES]
+    cases += [
+        ("products.list grid fields", product_list("newest", fields="PID,ProductName,Price,PrimaryImage")),
+        ("products.list category", product_list(category_id=samples["category_id"])),
+        ("products.list price range", product_list("price_asc", min_price=100, max_price=500)),
+        ("products.list search", product_list(search="Kettle")),
+        ("products.get", lambda: products.get_product(samples["reviewed_pid"])),
+        ("orders.user busiest", lambda: orders.get_user_orders(samples["busy_buyer"], fields=None)),
+        ("orders.user median", lambda: orders.get_user_orders(samples["median_buyer"], fields=None)),
+        ("orders.get", lambda: orders.get_order(samples["order_id"])),
+        ("stock.check", lambda: stock.check_stock(stock.StockCheckRequest(PID=samples["listed_pid"], Quantity=1))),
+        ("stock.check-multiple 20", lambda: stock.check_stock_multiple(basket)),
+        ("feedback.product first page", lambda: feedback.get_product_feedbacks(samples["reviewed_pid"], cursor=None, limit=10)),
+        ("lists.product sellers", lambda: lists.get_product_sellers(samples["listed_pid"])),
+        ("lists.user listings", lambda: lists.get_user_listings(samples["seller"])),
+        ("category.list", category.get_all_categories),
+    ]
+    if second_page:
+        cases.append(("feedback.product next page",
+                      lambda: feedback.get_product_feedbacks(samples["reviewed_pid"], cursor=second_page, limit=10)))
+    return cases
+
+
+def measure(fn, repeat: int, warmup: int):
+    for _ in range(warmup):
+        fn()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return {
+        "median_ms": round(statistics.median(timings), 3),
+        "p95_ms": round(timings[min(len(timings) - 1, int(0.95 * len(timings)))], 3),
+        "min_ms": round(timings[0], 3),
+    }
+
+
+def compare(result: dict, baseline: dict, tolerance: float, min_delta_ms: float):
+    """(verdict, change) of a case's median against its baseline"""
+    if baseline is None:
+        return "new", None
+    before, now = baseline["median_ms"], result["median_ms"]
+    change = (now - before) / before if before else 0.0
+    if change > tolerance and now - before >= min_delta_ms:
+        return "REGRESSION", change
+    if change < -tolerance and before - now >= min_delta_ms:
+        return "faster", change
+    return "ok", change
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database", default="CampusBazaar_bench")
+    parser.add_argument("--baselines", type=Path, default=BASELINES)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--tolerance", type=float, default=0.20, help="Allowed slowdown of the median, 0.20 = 20%%")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0, help="Ignore slowdowns smaller than this")
+    parser.add_argument("--only", help="Run only cases whose name contains this text")
+    parser.add_argument("--update", action="store_true", help="Write the results as the new baselines")
+    args = parser.parse_args()
+    if not args.update and not args.baselines.exists():
+        parser.error(f"{args.baselines} does not exist; record baselines with --update first")
+
+    # db.py opens its pool at import: point it at the benchmark database, primary only
+    load_dotenv()
+    os.environ["DB_NAME"] = args.database
+    os.environ["DB_READ_HOSTS"] = ""
+
+    stored = json.loads(args.baselines.read_text()) if args.baselines.exists() else {"dataset": None, "cases": {}}
+    counts = dataset_counts()
+    if stored["dataset"] and stored["dataset"] != counts and not args.update:
+        print(f"Dataset differs from the baselines' ({stored['dataset']} vs {counts}); timings are not comparable")
+
+    results = {}
+    regressions = []
+    print(f"{'case':34} {'median':>10} {'p95':>10} {'baseline':>10}  verdict")
+    for name, fn in build_cases(pick_samples()):
+        if args.only and args.only not in name:
+            continue
+        results[name] = result = measure(fn, args.repeat, args.warmup)
+        baseline = stored["cases"].get(name)
+        verdict, change = compare(result, baseline, args.tolerance, args.min_delta_ms)
+        if verdict == "REGRESSION":
+            regressions.append(name)
+        print(f"{name:34} {result['median_ms']:8.2f}ms {result['p95_ms']:8.2f}ms "
+              f"{baseline['median_ms'] if baseline else float('nan'):8.2f}ms  {verdict}"
+              + (f" ({change:+.0%})" if change is not None else ""))
+
+    if args.update:
+        cases = {**stored["cases"], **results} if args.only else results
+        args.baselines.write_text(json.dumps({"dataset": counts, "cases": cases}, indent=2) + "\n")
+        print(f"Baselines written to {args.baselines}")
+    elif regressions:
+        print(f"{len(regressions)} regression(s) beyond {args.tolerance:.0%}: {', '.join(regressions)}")
+        sys.exit(1)
@@ -0,0 +1,242 @@
+"""
+Seed a separate MySQL database with a synthetic CampusBazaar dataset for the
+query benchmarks.
+
+    python -m benchmarks.seed_dataset                  # 10k users, 100k products, 1M orders
+    python -m benchmarks.seed_dataset --scale 0.01     # same shape, 1% of the rows
+
+The database (default CampusBazaar_bench, on DB_HOST with DB_USER) is dropped
+and recreated from Database/create_database.sql, so it must not be the one
+DB_NAME points at. Rows are generated from a fixed seed, so the same
+arguments always give the same data, and are bulk-loaded with the triggers
+not yet created. The trigger-maintained tables (Product_Rating_Summary,
+Seller_Daily_Stats, Feedbacks.Upvotes) are then computed in one pass, and
+the functions, procedures and triggers are installed last. Every seeded user
+can log in with the password "benchmark".
+"""
+from datetime import date, timedelta
+from decimal import Decimal
+from pathlib import Path
+from dotenv import load_dotenv
+from services.ids import encode_base32, MAX_SEQUENCE, SEQUENCE_CHARS, WORKER_CHARS
+import argparse
+import bcrypt
+import hashlib
+import mysql.connector
+import os
+import random
+import time
+
+DATABASE_DIR = Path(__file__).resolve().parents[2] / "Database"
+DEFAULT_DATABASE = "CampusBazaar_bench"
+BATCH_SIZE = 5000
+HISTORY_DAYS = 730
+PASSWORD = "benchmark"
+
+SIZES = {"users": 10000, "products": 100000, "orders": 1000000, "reviews": 300000, "upvotes": 1000000}
+
+CATEGORIES = ["Books", "Electronics", "Stationery", "Furniture", "Clothing", "Sports", "Bicycles",
+              "Lab Equipment", "Instruments", "Kitchen", "Decor", "Calculators", "Bags", "Shoes",
+              "Software", "Games", "Art Supplies", "Hostel Essentials", "Tickets", "Other"]
+FIRST_NAMES = ["Aarav", "Diya", "Kabir", "Meera", "Rohan", "Ananya", "Vikram", "Isha", "Arjun", "Sara",
+               "Nikhil", "Priya", "Omar", "Lena", "Tanvi", "Dev", "Zoya", "Rahul", "Nina", "Kiran"]
+LAST_NAMES = ["Sharma", "Iyer", "Khan", "Patel", "Reddy", "Das", "Singh", "Nair", "Gupta", "Mehta"]
+ADJECTIVES = ["Used", "Like New", "Vintage", "Compact", "Portable", "Wireless", "Heavy Duty", "Mini",
+              "Classic", "Refurbished", "Ergonomic", "Foldable", "Digital", "Premium", "Basic"]
+NOUNS = ["Textbook", "Laptop Stand", "Desk Lamp", "Headphones", "Backpack", "Calculator", "Chair",
+         "Bicycle", "Kettle", "Monitor", "Keyboard", "Notebook Set", "Guitar", "Lab Coat", "Jacket",
+         "Water Bottle", "Drawing Kit", "Mattress", "Mouse", "Power Bank"]
+WORDS = ("gently used barely works great condition original box includes charger cable receipt "
+         "pickup hostel campus semester notes highlighted clean scratches minor warranty spare "
+         "manual battery fresh sturdy lightweight negotiable urgent sale moving out").split()
+COURSES = ["B.Tech", "M.Tech", "B.Sc", "M.Sc", "MBA", "PhD", "BBA", "B.Des"]
+DEPARTMENTS = ["CSE", "ECE", "Mechanical", "Civil", "Physics", "Chemistry", "Mathematics", "Design"]
+DESIGNATIONS = ["Professor", "Assoc. Prof.", "Asst. Prof.", "Lecturer"]
+
+
+def skewed(rng: random.Random, count: int):
+    """Index in [0, count) favouring low values, so a few products and users are much busier"""
+    return int(count * rng.random() ** 1.5)
+
+
+def sentence(rng: random.Random, words: int):
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def user_email(i: int):
+    return f"user{i:06d}@campus.edu"
+
+
+def product_id(i: int, first_ms: int, step_ms: int):
+    """Time-ordered PID in the services/ids.py format"""
+    return f"PROD{first_ms + i * step_ms:013d}{encode_base32(0, WORKER_CHARS)}{encode_base32(i % MAX_SEQUENCE, SEQUENCE_CHARS)}"
+
+
+def insert_rows(conn, cursor, table: str, columns, rows, ignore: bool = False):
+    """Insert an iterable of rows in multi-row batches; returns the number of rows sent"""
+    sql = (f"INSERT {'IGNORE ' if ignore else ''}INTO {table} ({', '.join(columns)}) "
+           f"VALUES ({', '.join(['%s'] * len(columns))})")
+    started = time.perf_counter()
+    batch = []
+    sent = 0
+    for row in rows:
+        batch.append(row)
+        if len(batch) == BATCH_SIZE:
+            cursor.executemany(sql, batch)
+            conn.commit()
+            sent += len(batch)
+            batch = []
+    if batch:
+        cursor.executemany(sql, batch)
+        conn.commit()
+        sent += len(batch)
+    print(f"{table}: {sent} rows in {time.perf_counter() - started:.1f}s")
+    return sent
+
+
+def run_script(cursor, path: Path, skip_prefixes=()):
+    from tools.migrate import split_statements  # imports db, so only once DB_NAME is set
+
+    for statement in split_statements(path.read_text(encoding="utf-8")):
+        if statement.upper().startswith(skip_prefixes):
+            continue
+        cursor.execute(statement)
+        if cursor.with_rows:
+            cursor.fetchall()
+
+
+def seed(conn, sizes: dict, seed_value: int = 42):
+    cursor = conn.cursor()
+    rng = random.Random(seed_value)
+    users, products, orders = sizes["users"], sizes["products"], sizes["orders"]
+    reviews, upvotes = sizes["reviews"], sizes["upvotes"]
+    today = date.today()
+    first_day = today - timedelta(days=HISTORY_DAYS)
+    step_ms = HISTORY_DAYS * 86400000 // max(products, 1)
+    first_ms = int(time.mktime(first_day.timetuple()) * 1000)
+    pids = [product_id(i, first_ms, step_ms) for i in range(products)]
+    sellers = max(1, users // 5)
+
+    cursor.execute("SET SESSION foreign_key_checks = 0, unique_checks = 0")
+
+    password_hash = bcrypt.hashpw(PASSWORD.encode(), bcrypt.gensalt()).decode()
+    insert_rows(conn, cursor, "Users", ("EmailID", "FirstName", "LastName", "Password"), (
+        (user_email(i), rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES), password_hash) for i in range(users)))
+    faculty_every = 8
+    insert_rows(conn, cursor, "Student", ("EnrollmentNo", "Course", "Batch", "EmailID"), (
+        (f"ENR{i:07d}", rng.choice(COURSES), str(2020 + i % 6), user_email(i))
+        for i in range(users) if i % faculty_every))
+    insert_rows(conn, cursor, "Faculty", ("FacultyID", "Department", "Designation", "EmailID"), (
+        (f"FAC{i:06d}", rng.choice(DEPARTMENTS), rng.choice(DESIGNATIONS), user_email(i))
+        for i in range(0, users, faculty_every)))
+
+    insert_rows(conn, cursor, "Category", ("CategoryID", "CategoryName"),
+                ((i + 1, name) for i, name in enumerate(CATEGORIES)))
+    prices = [Decimal(rng.randint(50, 5000000)) / 100 for _ in range(products)]
+    insert_rows(conn, cursor, "Products", ("PID", "ProductName", "Description", "Price"), (
+        (pids[i], f"{rng.choice(ADJECTIVES)} {rng.choice(NOUNS)} {i}", sentence(rng, rng.randint(12, 40)), prices[i])
+        for i in range(products)))
+    insert_rows(conn, cursor, "Product_Category", ("PID", "CategoryID"), (
+        (pids[i], category)
+        for i in range(products)
+        for category in sorted({rng.randint(1, len(CATEGORIES)) for _ in range(rng.randint(1, 2))})))
+    insert_rows(conn, cursor, "Product_Images", ("PID", "ImageURL", "DisplayOrder"), (
+        (pids[i], f"uploads/products/{hashlib.sha256(f'{i}-{order}'.encode()).hexdigest()}.webp", order)
+        for i in range(products)
+        for order in range(rng.randint(1, 3))))
+    product_sellers = [sorted({user_email(rng.randrange(sellers) * 5) for _ in range(rng.randint(1, 3))})
+                       for _ in range(products)]
+    insert_rows(conn, cursor, "Lists", ("EmailID", "PID", "Stock"), (
+        (seller, pids[i], 0 if rng.random() < 0.1 else rng.randint(1, 50))
+        for i in range(products)
+        for seller in product_sellers[i]))
+
+    order_days = [first_day + timedelta(days=rng.randrange(HISTORY_DAYS + 1)) for _ in range(orders)]
+    order_days.sort()  # OrderIDs increase with time, as AUTO_INCREMENT would give
+    insert_rows(conn, cursor, "Orders", ("OrderID", "OrderDate", "EmailID"), (
+        (i + 1, order_days[i], user_email(skewed(rng, users))) for i in range(orders)))
+    del order_days
+    insert_rows(conn, cursor, "Order_Details", ("OrderID", "PID", "Order_Qty", "SellerEmail"), (
+        (order_id, pids[item], rng.randint(1, 3), rng.choice(product_sellers[item]))
+        for order_id in range(1, orders + 1)
+        for item in {skewed(rng, products) for _ in range(rng.randint(1, 3))}))
+    del product_sellers
+
+    authors = [skewed(rng, users) for _ in range(reviews)]
+    insert_rows(conn, cursor, "Feedbacks", ("FeedBackID", "Date", "Rating", "Review", "Upvotes", "EmailID", "PID"), (
+        (i + 1, first_day + timedelta(days=rng.randrange(HISTORY_DAYS + 1)),
+         rng.choices((1, 2, 3, 4, 5), weights=(5, 5, 15, 35, 40))[0], sentence(rng, rng.randint(5, 30)), 0,
+         user_email(authors[i]), pids[skewed(rng, products)])
+        for i in range(reviews)))
+
+    def upvote_rows():
+        for _ in range(upvotes):
+            feedback = skewed(rng, reviews)
+            voter = rng.randrange(users)
+            if voter != authors[feedback]:  # trg_no_self_upvotes
+                yield (feedback + 1, user_email(voter))
+
+    if reviews:
+        insert_rows(conn, cursor, "Review_Upvotes", ("FeedBackID", "VoterEmail"), upvote_rows(), ignore=True)
+
+    started = time.perf_counter()
+    cursor.execute("""
+        INSERT INTO Product_Rating_Summary (PID, ReviewCount, RatingSum, Star1, Star2, Star3, Star4, Star5)
+        SELECT PID, COUNT(*), SUM(Rating), SUM(Rating = 1), SUM(Rating = 2), SUM(Rating = 3), SUM(Rating = 4), SUM(Rating = 5)
+        FROM Feedbacks
+        GROUP BY PID
+    """)
+    cursor.execute("""
+        UPDATE Feedbacks f
+        INNER JOIN (SELECT FeedBackID, COUNT(*) as Votes FROM Review_Upvotes GROUP BY FeedBackID) v
+            ON v.FeedBackID = f.FeedBackID
+        SET f.Upvotes = v.Votes
+    """)
+    conn.commit()
+    print(f"Product_Rating_Summary and Feedbacks.Upvotes in {time.perf_counter() - started:.1f}s")
+
+    cursor.execute("SET SESSION foreign_key_checks = 1, unique_checks = 1")
+    cursor.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database", default=DEFAULT_DATABASE)
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiplier for every row count below")
+    for name, default in SIZES.items():
+        parser.add_argument(f"--{name}", type=int, default=default)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    load_dotenv()
+    if args.database == os.getenv("DB_NAME"):
+        parser.error(f"{args.database} is the application database (DB_NAME); seed a separate one")
+    sizes = {name: max(1, int(getattr(args, name) * args.scale)) for name in SIZES}
+
+    started = time.perf_counter()
+    conn = mysql.connector.connect(host=os.getenv("DB_HOST"), user=os.getenv("DB_USER"),
+                                   password=os.getenv("DB_PASS"), autocommit=False)
+    cursor = conn.cursor()
+    cursor.execute(f"DROP DATABASE IF EXISTS `{args.database}`")
+    cursor.execute(f"CREATE DATABASE `{args.database}` DEFAULT CHARSET utf8mb4")
+    cursor.execute(f"USE `{args.database}`")
+    # db.py opens its pool at import; point it (and the tools below) at the new database first
+    os.environ["DB_NAME"] = args.database
+    os.environ["DB_READ_HOSTS"] = ""
+
+    run_script(cursor, DATABASE_DIR / "create_database.sql", skip_prefixes=("CREATE DATABASE", "USE "))
+    print(f"Seeding {args.database}: " + ", ".join(f"{count} {name}" for name, count in sizes.items()))
+    seed(conn, sizes, args.seed)
+
+    from tools.backfill_seller_stats import backfill
+    print(f"Seller_Daily_Stats: {backfill()} rows")
+
+    for script in ("Functions.sql", "Stored_Procedures.sql", "Triggers.sql"):
+        run_script(cursor, DATABASE_DIR / script)
+    for table in ("Users", "Products", "Product_Images", "Product_Category", "Lists", "Orders",
+                  "Order_Details", "Feedbacks", "Product_Rating_Summary", "Review_Upvotes", "Seller_Daily_Stats"):
+        cursor.execute(f"ANALYZE TABLE {table}")
+        cursor.fetchall()
+    cursor.close()
+    conn.close()
+    print(f"Done in {time.perf_counter() - started:.0f}s")
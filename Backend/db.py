@@ -1,7 +1,14 @@
 import mysql.connector
 from mysql.connector import pooling
 from dotenv import load_dotenv
+from services.metrics import DB_POOL_CHECKOUT, DB_POOL_EXHAUSTED
+from services.sql_trace import current_request, wrap_connection
+from services import connection_leaks
+import contextvars
+import itertools
 import os
+import threading
+import time
 
 load_dotenv()
 
@@ -12,10 +19,202 @@ dbconfig = {
     "database": os.getenv("DB_NAME"),
 }
 
-pool = pooling.MySQLConnectionPool(pool_name="mypool",
-                                   pool_size=5,
-                                   **dbconfig)
 
+class ConnectionPool(pooling.MySQLConnectionPool):
+    """Pool that ends open transactions on return instead of resetting the session.
 
-def get_db():
-    return pool.get_connection()
+    COM_RESET_CONNECTION would also drop the server-side prepared statements
+    that queries.py keeps per connection, so the pool is created with
+    pool_reset_session=False and only discards unread results and rolls back
+    whatever the previous holder left uncommitted.
+    """
+
+    def add_connection(self, cnx=None):
+        if cnx is not None:
+            if connection_leaks.returned(cnx):
+                # Reclaimed while held: the pool already has a replacement
+                try:
+                    cnx.disconnect()
+                except mysql.connector.Error:
+                    pass
+                return
+            try:
+                cnx.consume_results()
+                if cnx.in_transaction:
+                    cnx.rollback()
+            except mysql.connector.Error:
+                # A broken connection is reconnected on its next checkout
+                pass
+        super().add_connection(cnx)
+
+
+pool = ConnectionPool(pool_name="mypool",
+                      pool_size=5,
+                      pool_reset_session=False,
+                      **dbconfig)
+
+
+def checkout(connection_pool, label: str):
+    """get_connection() with its time and refusals recorded for /metrics, and the
+    checkout tracked until it is returned (services/connection_leaks.py)"""
+    start = time.perf_counter()
+    try:
+        cnx = connection_pool.get_connection()
+    except mysql.connector.errors.PoolError:
+        DB_POOL_EXHAUSTED.inc(label)
+        raise
+    DB_POOL_CHECKOUT.observe(time.perf_counter() - start, label)
+    connection_leaks.track(cnx, connection_pool, label, current_request())
+    return cnx
+
+
+class Replica:
+    """A read replica from DB_READ_HOSTS. Its pool is opened on first use, so a
+    replica that is down at startup does not stop the API from starting."""
+
+    def __init__(self, index: int, address: str):
+        host, _, port = address.strip().partition(":")
+        self.host = host
+        self.port = int(port) if port else 3306
+        self.name = f"read{index}"
+        self.pool = None
+        self.down_until = 0.0
+        self.lag = None
+        self.checked_at = 0.0
+        self.checkouts = 0
+        self.failures = 0
+        self.last_error = None
+        self._lock = threading.Lock()
+
+    def _open_pool(self):
+        with self._lock:
+            if self.pool is None:
+                self.pool = ConnectionPool(pool_name=self.name,
+                                           pool_size=REPLICA_POOL_SIZE,
+                                           pool_reset_session=False,
+                                           **{**dbconfig, "host": self.host, "port": self.port})
+        return self.pool
+
+    def _replication_lag(self, cnx):
+        """Seconds behind the source, None when it cannot be read (e.g. missing REPLICATION CLIENT)"""
+        cursor = cnx.cursor(dictionary=True)
+        try:
+            cursor.execute("SHOW REPLICA STATUS")
+            status = cursor.fetchone()
+        except mysql.connector.Error:
+            return None
+        finally:
+            cursor.close()
+        if status is None:
+            return None  # not a replica (e.g. a second standalone instance in development)
+        if status.get("Replica_SQL_Running") != "Yes":
+            return float("inf")
+        lag = status.get("Seconds_Behind_Source")
+        return float("inf") if lag is None else lag
+
+    def mark_down(self, err):
+        self.failures += 1
+        self.last_error = str(err)
+        self.down_until = time.monotonic() + REPLICA_RETRY_SECONDS
+        print(f"Read replica {self.host}:{self.port} unavailable for {REPLICA_RETRY_SECONDS}s: {err}")
+
+    def get_connection(self):
+        """Pooled connection, or None when the replica is down, lagging or out of connections"""
+        now = time.monotonic()
+        if now < self.down_until:
+            return None
+        try:
+            cnx = checkout(self._open_pool(), self.name)
+        except mysql.connector.errors.PoolError:
+            return None  # busy, not unhealthy
+        except mysql.connector.Error as err:
+            self.mark_down(err)
+            return None
+
+        if now - self.checked_at >= REPLICA_CHECK_SECONDS:
+            self.checked_at = now
+            try:
+                self.lag = self._replication_lag(cnx)
+            except mysql.connector.Error as err:
+                cnx.close()
+                self.mark_down(err)
+                return None
+        if self.lag is not None and self.lag > REPLICA_MAX_LAG_SECONDS:
+            cnx.close()
+            self.mark_down(f"replication lag {self.lag}s")
+            return None
+
+        self.checkouts += 1
+        return cnx
+
+    def status(self):
+        return {
+            "host": f"{self.host}:{self.port}",
+            "healthy": time.monotonic() >= self.down_until,
+            "lag_seconds": self.lag,
+            "checkouts": self.checkouts,
+            "failures": self.failures,
+            "last_error": self.last_error,
+        }
+
+
+# Comma-separated host[:port] list of read replicas; empty sends every read to the primary
+REPLICA_POOL_SIZE = int(os.getenv("DB_READ_POOL_SIZE", "5"))
+REPLICA_RETRY_SECONDS = float(os.getenv("DB_READ_RETRY_SECONDS", "10"))
+REPLICA_CHECK_SECONDS = float(os.getenv("DB_READ_CHECK_SECONDS", "5"))
+REPLICA_MAX_LAG_SECONDS = float(os.getenv("DB_READ_MAX_LAG_SECONDS", "5"))
+replicas = [Replica(i, address) for i, address in enumerate(os.getenv("DB_READ_HOSTS", "").split(",")) if address.strip()]
+_next_replica = itertools.count()
+
+# Set for requests that must see the caller's own recent writes
+_read_from_primary = contextvars.ContextVar("read_from_primary", default=False)
+
+
+def read_from_primary():
+    """Route this request's read-only connections to the primary. Returns a token for reset_read_routing."""
+    return _read_from_primary.set(True)
+
+
+def reset_read_routing(token):
+    _read_from_primary.reset(token)
+
+
+def get_db(read_only: bool = False):
+    """Pooled connection. read_only=True may return a replica connection (round-robin over
+    healthy replicas); writes, and reads right after the caller's own writes, use the primary."""
+    if read_only and replicas and not _read_from_primary.get():
+        start = next(_next_replica)
+        for offset in range(len(replicas)):
+            cnx = replicas[(start + offset) % len(replicas)].get_connection()
+            if cnx is not None:
+                return wrap_connection(cnx)
+    return wrap_connection(checkout(pool, "primary"))
+
+
+def connect(read_only: bool = False):
+    """Dedicated, unpooled connection for long-running work such as streaming exports,
+    so it does not hold one of the pool's few connections for minutes"""
+    if read_only and replicas and not _read_from_primary.get():
+        start = next(_next_replica)
+        for offset in range(len(replicas)):
+            replica = replicas[(start + offset) % len(replicas)]
+            if time.monotonic() < replica.down_until:
+                continue
+            try:
+                return mysql.connector.connect(**{**dbconfig, "host": replica.host, "port": replica.port})
+            except mysql.connector.Error as err:
+                replica.mark_down(err)
+    return mysql.connector.connect(**dbconfig)
+
+
+def fetch_dicts(cursor):
+    """Fetch all rows of a tuple cursor as dicts, zipping against the column names once per result"""
+    columns = cursor.column_names
+    return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+def fetch_dict(cursor):
+    """Fetch the first row of a tuple cursor as a dict, or None. Reads the whole result
+    so the connection is free for the next statement."""
+    rows = cursor.fetchall()
+    return dict(zip(cursor.column_names, rows[0])) if rows else None
@@ -1,8 +1,8 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
 from starlette.middleware.sessions import SessionMiddleware
 from pathlib import Path
+import asyncio
 
 from routers.users import router as users_router
 from routers.student import router as student_router
@@ -19,19 +19,54 @@ from routers.product_images import router as product_images_router
 from routers.payments import router as payments_router
 from routers.stock import router as stock_router
 from routers.oauth import router as oauth_router
+from routers.uploads import router as uploads_router
+from routers.admin import router as admin_router
+from routers.export import router as export_router
+from routers.analytics import router as analytics_router
+from routers.live import router as live_router
+from routers.metrics import router as metrics_router
+from middleware.compression import CompressionMiddleware
+from middleware.read_your_writes import ReadYourWritesMiddleware
+from middleware.admission import AdmissionMiddleware, Limit
+from middleware.metrics import MetricsMiddleware
+from middleware.sql_trace import SqlTraceMiddleware
+from middleware.memory_profile import MemoryProfileMiddleware
+from services import image_variants, upvote_counter, metrics, memory_profile, connection_leaks, ids
 
 app = FastAPI()
 
-# Serve uploaded images
+# Uploaded images are served by routers/uploads.py (immutable caching, ETags, ranges)
 uploads_dir = Path("uploads")
 uploads_dir.mkdir(exist_ok=True)
-app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
 
 # Add SessionMiddleware for OAuth (must be before CORS)
 import os
 from dotenv import load_dotenv
 load_dotenv()
 
+# Admission control per path prefix (most specific wins), innermost so 429/503
+# responses still get CORS headers. "/" keeps the threadpool and the 5-connection
+# DB pool from queueing work that would only time out; bcrypt and OTP routes
+# also get per-client rate limits. Counters: GET /admin/admission
+app.add_middleware(
+    AdmissionMiddleware,
+    enabled=os.getenv("ADMISSION_ENABLED", "1") != "0",
+    limits={
+        "/": Limit(concurrency=int(os.getenv("ADMISSION_CONCURRENCY", "32")),
+                   queue=int(os.getenv("ADMISSION_QUEUE", "128")),
+                   queue_timeout=float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "10"))),
+        "/uploads": Limit(),                     # static files, no DB
+        "/live": Limit(rate=1, burst=10),        # long-lived streams: only pace new connections
+        "/export": Limit(concurrency=4),
+        "/products/import": Limit(concurrency=1),
+        "/users/login": Limit(concurrency=4, queue=32, queue_timeout=5, rate=0.2, burst=5),
+        "/users/register": Limit(concurrency=4, queue=32, queue_timeout=5, rate=0.1, burst=3),
+        "/payments/initiate": Limit(concurrency=8, queue=32, rate=0.05, burst=3),
+        "/payments/resend-otp": Limit(concurrency=8, queue=32, rate=1 / 30, burst=2),
+        "/payments/verify": Limit(concurrency=8, queue=32, rate=0.2, burst=5),
+    }
+)
+
 SESSION_SECRET_KEY = os.getenv("SESSION_SECRET_KEY", "your-secret-key-change-in-production-min-32-chars-long-please-change-this")
 app.add_middleware(
     SessionMiddleware,
@@ -46,8 +81,36 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Primary-Until", "Retry-After", "Server-Timing"],
+)
+
+# Per-route allocation sampling while tracemalloc runs (MEMORY_PROFILE=1 or POST /admin/memory/start)
+app.add_middleware(MemoryProfileMiddleware)
+
+# Per-request SQL trace: Server-Timing header, slow-query EXPLAIN log, N+1 warnings
+# (SQL_TRACE=0 disables, SQL_SLOW_MS, SQL_REPEAT_THRESHOLD; recent findings at GET /admin/sql-trace)
+app.add_middleware(SqlTraceMiddleware)
+
+# Send a client's reads to the primary for a few seconds after its own writes (only with DB_READ_HOSTS)
+app.add_middleware(
+    ReadYourWritesMiddleware,
+    window_seconds=float(os.getenv("DB_READ_STICKY_SECONDS", "5"))
 )
 
+# Compress JSON/text responses (br/zstd/gzip, whichever the client accepts)
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=int(os.getenv("COMPRESSION_MIN_SIZE", "1024")),
+    levels={
+        "gzip": int(os.getenv("COMPRESSION_LEVEL_GZIP", "6")),
+        "br": int(os.getenv("COMPRESSION_LEVEL_BR", "5")),
+        "zstd": int(os.getenv("COMPRESSION_LEVEL_ZSTD", "3")),
+    }
+)
+
+# Outermost, so latency includes compression and admission rejections are counted (GET /metrics)
+app.add_middleware(MetricsMiddleware)
+
 app.include_router(users_router)
 app.include_router(student_router)
 app.include_router(faculty_router)
@@ -63,6 +126,43 @@ app.include_router(product_images_router)
 app.include_router(payments_router)
 app.include_router(stock_router)
 app.include_router(oauth_router)
+app.include_router(uploads_router)
+app.include_router(admin_router)
+app.include_router(export_router)
+app.include_router(analytics_router)
+app.include_router(live_router)
+app.include_router(metrics_router)
+
+@app.on_event("startup")
+def lease_id_worker():
+    # Fail at startup rather than on the first product insert when no worker ID can be leased
+    if ids.lease is not None:
+        ids.lease.current()
+
+@app.on_event("startup")
+def start_memory_profile():
+    if os.getenv("MEMORY_PROFILE", "0") == "1":
+        memory_profile.start()
+
+@app.on_event("startup")
+async def start_event_loop_monitor():
+    app.state.loop_monitor = asyncio.create_task(metrics.monitor_event_loop())
+
+@app.on_event("shutdown")
+async def stop_event_loop_monitor():
+    app.state.loop_monitor.cancel()
+
+@app.on_event("shutdown")
+def stop_image_workers():
+    image_variants.shutdown()
+
+@app.on_event("shutdown")
+def flush_upvote_counters():
+    upvote_counter.shutdown()
+
+@app.on_event("shutdown")
+def stop_leak_watchdog():
+    connection_leaks.shutdown()
 
 @app.get("/")
 def home():
@@ -0,0 +1,202 @@
+"""
+Admission control: turn excess load away before it reaches the threadpool.
+
+Each request is matched to the most specific configured path prefix (for
+example "/users/login", else "/"), whose Limit can set:
+
+- concurrency: requests of the group running at once. Others wait in an
+  async FIFO (no thread held) of at most `queue` entries for `queue_timeout`
+  seconds; a full queue or a timed-out wait gets 503 with a Retry-After
+  estimated from the queue depth and recent service times.
+- rate / burst: a token bucket per client IP (rate tokens per second, up to
+  burst); an empty bucket gets 429 with the seconds until the next token.
+
+A Limit with neither is exempt. Counters per group are served at
+GET /admin/admission.
+"""
+from collections import deque
+from responses import FastJSONResponse
+import asyncio
+import math
+import time
+
+MAX_BUCKETS = 10000
+
+groups = {}
+
+
+class Limit:
+    def __init__(self, concurrency: int = None, queue: int = 0, queue_timeout: float = 5.0,
+                 rate: float = None, burst: int = 1):
+        self.concurrency = concurrency
+        self.queue = queue
+        self.queue_timeout = queue_timeout
+        self.rate = rate
+        self.burst = burst
+
+
+class Group:
+    """Concurrency slots, waiters, client buckets and counters of one prefix. Event loop only."""
+
+    def __init__(self, prefix: str, limit: Limit):
+        self.prefix = prefix
+        self.limit = limit
+        self.inflight = 0
+        self.waiters = deque()
+        self.buckets = {}
+        self.service_seconds = 0.05  # moving average of time holding a slot
+        self.counters = {"admitted": 0, "queued": 0, "rate_limited": 0, "shed_queue_full": 0, "shed_timeout": 0}
+
+    def take_token(self, client: str):
+        """0 when the client may proceed, else seconds until its next token"""
+        rate, burst = self.limit.rate, self.limit.burst
+        now = time.monotonic()
+        tokens, updated = self.buckets.get(client, (burst, now))
+        tokens = min(burst, tokens + (now - updated) * rate)
+        if tokens < 1:
+            self.buckets[client] = (tokens, now)
+            return (1 - tokens) / rate
+        self.buckets[client] = (tokens - 1, now)
+        if len(self.buckets) > MAX_BUCKETS:
+            self.prune(now)
+        return 0
+
+    def prune(self, now: float):
+        """Forget clients whose bucket has refilled; they are indistinguishable from new ones"""
+        rate, burst = self.limit.rate, self.limit.burst
+        self.buckets = {
+            client: (tokens, updated) for client, (tokens, updated) in self.buckets.items()
+            if tokens + (now - updated) * rate < burst
+        }
+
+    async def acquire(self):
+        """Take a concurrency slot; returns None, or "queue_full" / "timeout" when shed"""
+        if self.inflight < self.limit.concurrency and not self.waiters:
+            self.inflight += 1
+            return None
+        if len(self.waiters) >= self.limit.queue:
+            return "queue_full"
+
+        self.counters["queued"] += 1
+        waiter = asyncio.get_running_loop().create_future()
+        self.waiters.append(waiter)
+        try:
+            async with asyncio.timeout(self.limit.queue_timeout):
+                await waiter
+            return None
+        except TimeoutError:
+            # A slot handed over just as the wait expired is still ours
+            return None if waiter.done() and not waiter.cancelled() else "timeout"
+        except BaseException:
+            # Client went away: hand on a slot that was passed to us meanwhile
+            if waiter.done() and not waiter.cancelled():
+                self.release(0)
+            raise
+        finally:
+            if not waiter.done():
+                waiter.cancel()
+            try:
+                self.waiters.remove(waiter)
+            except ValueError:
+                pass
+
+    def release(self, seconds: float):
+        """Free a slot, passing it straight to the oldest live waiter if there is one"""
+        if seconds:
+            self.service_seconds += (seconds - self.service_seconds) * 0.1
+        while self.waiters:
+            waiter = self.waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.inflight -= 1
+
+    def retry_after(self):
+        """Seconds until a slot is likely free at the current queue depth"""
+        per_slot = self.service_seconds * (len(self.waiters) + 1) / self.limit.concurrency
+        return max(1, math.ceil(per_slot))
+
+    def snapshot(self):
+        limit = self.limit
+        return {
+            "concurrency": limit.concurrency,
+            "queue": limit.queue if limit.concurrency else None,
+            "rate_per_second": limit.rate,
+            "burst": limit.burst if limit.rate else None,
+            "inflight": self.inflight,
+            "waiting": len(self.waiters),
+            "tracked_clients": len(self.buckets),
+            "avg_service_ms": round(self.service_seconds * 1000, 1),
+            **self.counters,
+        }
+
+
+def snapshot():
+    return {prefix: group.snapshot() for prefix, group in groups.items()}
+
+
+def reject(status: int, detail: str, retry_after: float):
+    return FastJSONResponse(
+        {"detail": detail},
+        status_code=status,
+        headers={"Retry-After": str(max(1, math.ceil(retry_after)))}
+    )
+
+
+class AdmissionMiddleware:
+    def __init__(self, app, limits: dict, enabled: bool = True):
+        self.app = app
+        self.enabled = enabled
+        for prefix, limit in limits.items():
+            groups[prefix.rstrip("/") or "/"] = Group(prefix, limit)
+        # Longest prefix first so the most specific group wins
+        self.groups = sorted(groups.values(), key=lambda group: len(group.prefix), reverse=True)
+
+    def match(self, path: str):
+        for group in self.groups:
+            prefix = group.prefix.rstrip("/")
+            if not prefix or path == prefix or path.startswith(prefix + "/"):
+                return group
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket") or not self.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        group = self.match(scope["path"])
+        if group is None or (group.limit.rate is None and group.limit.concurrency is None):
+            await self.app(scope, receive, send)
+            return
+
+        if group.limit.rate is not None:
+            client = scope.get("client")
+            wait = group.take_token(client[0] if client else "unknown")
+            if wait:
+                group.counters["rate_limited"] += 1
+                if scope["type"] == "websocket":
+                    await send({"type": "websocket.close", "code": 1013})
+                    return
+                await reject(429, "Too many requests, slow down", wait)(scope, receive, send)
+                return
+
+        if group.limit.concurrency is None:
+            group.counters["admitted"] += 1
+            await self.app(scope, receive, send)
+            return
+
+        shed = await group.acquire()
+        if shed:
+            group.counters["shed_" + shed] += 1
+            if scope["type"] == "websocket":
+                await send({"type": "websocket.close", "code": 1013})
+                return
+            await reject(503, "Server busy, try again shortly", group.retry_after())(scope, receive, send)
+            return
+
+        group.counters["admitted"] += 1
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            group.release(time.perf_counter() - started)
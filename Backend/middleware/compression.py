@@ -0,0 +1,244 @@
+"""
+Negotiated response compression (br / zstd / gzip).
+
+Only complete, compressible bodies above a size threshold are compressed;
+streaming responses pass through untouched. Bodies above `offload_size` are
+compressed in a worker thread so large catalog payloads do not stall the
+event loop, and compressed representations are cached by body digest so the
+same payload served repeatedly is only compressed once.
+"""
+from collections import OrderedDict
+from starlette.datastructures import Headers, MutableHeaders
+import anyio
+import gzip
+import hashlib
+import threading
+import time
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "text/",
+    "image/svg+xml",
+)
+
+
+def _gzip(body: bytes, level: int):
+    return gzip.compress(body, compresslevel=level, mtime=0)
+
+
+def _brotli(body: bytes, level: int):
+    return brotli.compress(body, quality=level)
+
+
+def _zstd(body: bytes, level: int):
+    return zstandard.ZstdCompressor(level=level).compress(body)
+
+
+# Server preference order when the client accepts several encodings equally
+ENCODERS = {}
+if brotli is not None:
+    ENCODERS["br"] = _brotli
+if zstandard is not None:
+    ENCODERS["zstd"] = _zstd
+ENCODERS["gzip"] = _gzip
+
+
+class CompressionStats:
+    """Per-route counters: bytes in/out, compression CPU time and cache hits"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes = {}
+
+    def record(self, route: str, encoding: str, raw: int, compressed: int, cpu: float, cache_hit: bool):
+        with self._lock:
+            entry = self._routes.setdefault(route, {
+                "responses": 0, "bytes_in": 0, "bytes_out": 0,
+                "cpu_seconds": 0.0, "cache_hits": 0, "encodings": {},
+            })
+            entry["responses"] += 1
+            entry["bytes_in"] += raw
+            entry["bytes_out"] += compressed
+            entry["cpu_seconds"] += cpu
+            entry["cache_hits"] += int(cache_hit)
+            entry["encodings"][encoding] = entry["encodings"].get(encoding, 0) + 1
+
+    def snapshot(self):
+        with self._lock:
+            routes = {}
+            for route, entry in self._routes.items():
+                routes[route] = {
+                    **entry,
+                    "encodings": dict(entry["encodings"]),
+                    "bytes_saved": entry["bytes_in"] - entry["bytes_out"],
+                    "ratio": round(entry["bytes_out"] / entry["bytes_in"], 4) if entry["bytes_in"] else None,
+                    "cpu_ms_per_response": round(entry["cpu_seconds"] * 1000 / entry["responses"], 3),
+                }
+            return routes
+
+
+class CompressedCache:
+    """LRU of compressed bodies keyed by (encoding, level, body digest), bounded by total bytes"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value: bytes):
+        if len(value) > self.max_bytes // 4:
+            return
+        with self._lock:
+            if key in self._entries:
+                return
+            self._entries[key] = value
+            self._size += len(value)
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+
+stats = CompressionStats()
+cache = CompressedCache(max_bytes=32 * 1024 * 1024)
+
+
+def route_label(scope):
+    """Route template (e.g. /products/{pid}) so per-route stats do not explode per ID"""
+    route = scope.get("route")
+    return getattr(route, "path", None) or scope.get("path", "")
+
+
+def negotiate(accept_encoding: str):
+    """Pick the best supported encoding from an Accept-Encoding header, or None"""
+    accepted = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+
+    wildcard = accepted.get("*", 0.0)
+    best, best_quality = None, 0.0
+    for encoding in ENCODERS:
+        quality = accepted.get(encoding, wildcard)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+class CompressionMiddleware:
+    def __init__(self, app, minimum_size: int = 1024, offload_size: int = 64 * 1024, levels: dict = None):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.offload_size = offload_size
+        self.levels = {"gzip": 6, "br": 5, "zstd": 3, **(levels or {})}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, passthrough
+
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] != "http.response.body":
+                # e.g. http.response.pathsend (zero-copy FileResponse): nothing to
+                # compress, but the held-back start message has to go first
+                passthrough = True
+                if start_message is not None:
+                    await send(start_message)
+                await send(message)
+                return
+
+            headers = MutableHeaders(raw=start_message["headers"])
+            body = message.get("body", b"")
+
+            if message.get("more_body", False) or not self._should_compress(start_message, headers, body):
+                # Streaming or not worth compressing: send as-is from here on
+                passthrough = True
+                await send(start_message)
+                await send(message)
+                return
+
+            compressed = await self._compress(scope, encoding, body)
+            headers["content-encoding"] = encoding
+            headers["content-length"] = str(len(compressed))
+            headers.add_vary_header("Accept-Encoding")
+            await send(start_message)
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, send_wrapper)
+
+    def _should_compress(self, start_message, headers, body):
+        if start_message["status"] < 200 or start_message["status"] in (204, 206, 304):
+            return False
+        if "content-encoding" in headers or len(body) < self.minimum_size:
+            return False
+        content_type = headers.get("content-type", "")
+        return content_type.startswith(COMPRESSIBLE_TYPES)
+
+    async def _compress(self, scope, encoding, body):
+        level = self.levels[encoding]
+        key = (encoding, level, hashlib.blake2b(body, digest_size=16).digest())
+        cached = cache.get(key)
+        if cached is not None:
+            stats.record(route_label(scope), encoding, len(body), len(cached), 0.0, True)
+            return cached
+
+        def compress():
+            started = time.thread_time()
+            result = ENCODERS[encoding](body, level)
+            return result, time.thread_time() - started
+
+        if len(body) >= self.offload_size:
+            compressed, cpu = await anyio.to_thread.run_sync(compress)
+        else:
+            compressed, cpu = compress()
+
+        cache.put(key, compressed)
+        stats.record(route_label(scope), encoding, len(body), len(compressed), cpu, False)
+        return compressed
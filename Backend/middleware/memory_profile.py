@@ -0,0 +1,48 @@
+"""
+Per-route allocation sampling for services.memory_profile; a single
+tracemalloc.is_tracing() check per request while profiling is off.
+"""
+from anyio import to_thread
+from services import memory_profile
+import tracemalloc
+
+
+class MemoryProfileMiddleware:
+    def __init__(self, app):
+        self.app = app
+        self.inflight = 0
+        self.started = 0
+        self.alone_count = 0
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not tracemalloc.is_tracing():
+            await self.app(scope, receive, send)
+            return
+
+        alone = self.inflight == 0
+        self.inflight += 1
+        self.started += 1
+        started = self.started
+        before = None
+        try:
+            if alone:
+                self.alone_count += 1
+                if self.alone_count % memory_profile.SNAPSHOT_EVERY == 1 or memory_profile.SNAPSHOT_EVERY == 1:
+                    before = await to_thread.run_sync(memory_profile.take_snapshot)
+                base = tracemalloc.get_traced_memory()[0]
+                tracemalloc.reset_peak()
+            await self.app(scope, receive, send)
+        finally:
+            self.inflight -= 1
+            # Raw paths of unmatched requests (scanners, typos) would each get an entry
+            route = getattr(scope.get("route"), "path", None) or "<unmatched>"
+            # Measured only if no other request started meanwhile
+            if alone and self.started == started and tracemalloc.is_tracing():
+                current, peak = tracemalloc.get_traced_memory()
+                growth = None
+                if before is not None:
+                    after = await to_thread.run_sync(memory_profile.take_snapshot)
+                    growth = memory_profile.growth_between(before, after)
+                memory_profile.record(route, peak - base, current - base, growth)
+            else:
+                memory_profile.record_unmeasured(route)
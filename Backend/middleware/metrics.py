@@ -0,0 +1,40 @@
+"""
+Per-route request counts, status codes and latency for GET /metrics.
+
+Requests are labelled with the matched route template (e.g. /products/{pid}),
+so product IDs do not create new series; paths that match no route share the
+"<unmatched>" label.
+"""
+from services.metrics import HTTP_REQUESTS, HTTP_DURATION
+import time
+
+in_progress = 0
+
+
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        global in_progress
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        started = time.perf_counter()
+        in_progress += 1
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            in_progress -= 1
+            route = getattr(scope.get("route"), "path", None) or "<unmatched>"
+            HTTP_REQUESTS.inc(scope["method"], route, status)
+            HTTP_DURATION.observe(time.perf_counter() - started, scope["method"], route)
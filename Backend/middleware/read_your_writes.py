@@ -0,0 +1,55 @@
+"""
+Read-your-writes for replica routing.
+
+After a successful write (POST/PUT/PATCH/DELETE) the response carries an
+`X-Primary-Until` header with a Unix timestamp a few seconds ahead. Clients
+echo it back on their next requests, and while it has not passed, reads made
+through get_db(read_only=True) go to the primary, so a user never sees a
+replica that has not caught up with their own change yet.
+
+The header only moves reads to the primary, so a client sending a forged
+value gains nothing; values further ahead than the window are ignored.
+"""
+from starlette.datastructures import Headers, MutableHeaders
+import db
+import time
+
+HEADER = "x-primary-until"
+WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+
+class ReadYourWritesMiddleware:
+    def __init__(self, app, window_seconds: float = 5.0):
+        self.app = app
+        self.window_seconds = window_seconds
+
+    def _sticky(self, scope):
+        value = Headers(scope=scope).get(HEADER)
+        if not value:
+            return False
+        try:
+            until = float(value)
+        except ValueError:
+            return False
+        now = time.time()
+        return now < until <= now + self.window_seconds
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not db.replicas:
+            await self.app(scope, receive, send)
+            return
+
+        is_write = scope["method"] in WRITE_METHODS
+
+        async def send_wrapper(message):
+            if is_write and message["type"] == "http.response.start" and message["status"] < 400:
+                headers = MutableHeaders(scope=message)
+                headers[HEADER] = f"{time.time() + self.window_seconds:.3f}"
+            await send(message)
+
+        token = db.read_from_primary() if self._sticky(scope) else None
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if token is not None:
+                db.reset_read_routing(token)
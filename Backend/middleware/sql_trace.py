@@ -0,0 +1,32 @@
+"""
+Opens a services.sql_trace Trace per request, adds the Server-Timing header
+and reports slow and repeated statements once the response is sent.
+"""
+from starlette.datastructures import MutableHeaders
+from services import sql_trace
+
+
+class SqlTraceMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        trace, token = sql_trace.start(scope["method"], scope["path"])
+        if trace is None:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", trace.server_timing())
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            sql_trace.finish(trace, token, getattr(scope.get("route"), "path", None))
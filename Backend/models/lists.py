@@ -1,6 +1,20 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field
+from typing import List
 
 class ListCreate(BaseModel):
     EmailID: EmailStr
     PID: str
     Stock: int
+
+class ListBatchItem(BaseModel):
+    PID: str
+    Stock: int = Field(ge=0)
+
+class ListBatch(BaseModel):
+    """Stock changes for many of one seller's listings"""
+    EmailID: EmailStr
+    Items: List[ListBatchItem] = Field(min_length=1, max_length=1000)
+
+class ListRemoveBatch(BaseModel):
+    EmailID: EmailStr
+    PIDs: List[str] = Field(min_length=1, max_length=1000)
@@ -1,12 +1,14 @@
 from pydantic import BaseModel
+from typing import Optional
 
 class OrderDetailCreate(BaseModel):
     OrderID: int
     PID: str
     Order_Qty: int
+    SellerEmail: Optional[str] = None
 
 class OrderDetailOut(BaseModel):
     OrderID: int
     PID: str
     Order_Qty: int
-
+    SellerEmail: Optional[str] = None
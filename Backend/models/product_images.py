@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field, field_validator
+from typing import List, Optional
 
 class ProductImageCreate(BaseModel):
     PID: str
@@ -12,3 +12,28 @@ class ProductImageOut(BaseModel):
     ImageURL: str
     DisplayOrder: int
 
+class ProductImageBulkCreate(BaseModel):
+    PID: str
+    ImageURLs: List[str] = Field(min_length=1, max_length=50)
+
+    @field_validator('ImageURLs')
+    @classmethod
+    def validate_unique(cls, v: List[str]):
+        if len(set(v)) != len(v):
+            raise ValueError('ImageURLs must not contain duplicates')
+        return v
+
+class ImageOrder(BaseModel):
+    ImageID: int
+    DisplayOrder: int = Field(ge=0)
+
+class ProductImageReorder(BaseModel):
+    PID: str
+    Images: List[ImageOrder] = Field(min_length=1)
+
+    @field_validator('Images')
+    @classmethod
+    def validate_unique(cls, v: List[ImageOrder]):
+        if len({item.ImageID for item in v}) != len(v):
+            raise ValueError('Each ImageID may only appear once')
+        return v
@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, EmailStr, Field, field_validator
+from typing import List, Optional
 
 class ProductCreate(BaseModel):
     PID: Optional[str] = None  # Auto-generated if not provided
@@ -9,8 +9,28 @@ class ProductCreate(BaseModel):
     # Note: Images are now managed via Product_Images table, use /product-images endpoints
 
 
+class PriceUpdate(BaseModel):
+    Price: float = Field(gt=0)
+
+
 class ProductOut(BaseModel):
     EmailID:str
     ProductName:str
     Description:str
-    Price:float
\ No newline at end of file
+    Price:float
+
+class CatalogImportRow(ProductCreate):
+    """One product of a bulk catalog import (CSV column or NDJSON key per field).
+    In CSV, CategoryIDs and ImageURLs are separated by '|'."""
+    EmailID: Optional[EmailStr] = None  # Seller; defaults to the importing seller
+    Stock: int = Field(1, ge=0)
+    CategoryIDs: List[int] = []
+    ImageURLs: List[str] = Field([], max_length=20)
+
+    @field_validator('CategoryIDs', 'ImageURLs', mode='before')
+    @classmethod
+    def split_lists(cls, v):
+        if isinstance(v, str):
+            return [item.strip() for item in v.split('|') if item.strip()]
+        return v
+
@@ -1,4 +1,5 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field
+from typing import List
 
 class ReviewUpvoteCreate(BaseModel):
     FeedBackID: int
@@ -8,3 +9,7 @@ class ReviewUpvoteOut(BaseModel):
     UpvoteID: int
     FeedBackID: int
     VoterEmail: EmailStr
+
+class UpvoteLookup(BaseModel):
+    VoterEmail: EmailStr
+    FeedBackIDs: List[int] = Field(min_length=1, max_length=100)
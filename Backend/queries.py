@@ -0,0 +1,184 @@
+"""
+Registry of the SQL statements the routers run, executed as server-side prepared statements.
+
+Routers register each statement once under a name at import time:
+
+    GET_PRODUCT = queries.register("products.get", "SELECT ... WHERE PID = %s")
+
+and run it with queries.execute(conn, GET_PRODUCT, (pid,)), or multi-row
+INSERTs with queries.execute_many(conn, NAME, rows). Every pooled
+connection keeps one prepared cursor per statement, so the server parses a
+statement once per connection and later executions only send the statement
+id and binary-encoded parameters. Statements whose text is built per request
+(filters, field selections) pass the SQL in `sql=` and are cached per
+connection in a small LRU. Statements with one placeholder per item (IN
+lists, CASE lists) would give a new variant for every batch size and churn
+that LRU, so they also pass `prepared=False` and run on a plain cursor.
+
+The cache belongs to the server session: it is dropped when a connection
+reconnects (new connection id), and a statement the server no longer knows
+is re-prepared and retried once.
+"""
+from collections import OrderedDict
+from mysql.connector import errorcode
+from services.metrics import DB_QUERY_DURATION, DB_QUERY_ERRORS
+from services import sql_trace
+import mysql.connector
+import threading
+import time
+
+# Dynamic statement variants kept prepared per connection
+MAX_DYNAMIC_PER_CONNECTION = 32
+
+STATEMENTS = {}
+
+_stats_lock = threading.Lock()
+_stats = {}
+
+
+def register(name: str, sql: str):
+    """Register a statement under a unique name and return the name"""
+    if STATEMENTS.get(name, sql) != sql:
+        raise ValueError(f"Statement {name} is already registered with different SQL")
+    STATEMENTS[name] = sql
+    return name
+
+
+def _record(name: str, seconds: float, prepared: bool, failed: bool):
+    with _stats_lock:
+        entry = _stats.get(name)
+        if entry is None:
+            entry = _stats[name] = {"executions": 0, "errors": 0, "prepares": 0,
+                                    "total_seconds": 0.0, "max_seconds": 0.0}
+        entry["executions"] += 1
+        entry["errors"] += int(failed)
+        entry["prepares"] += int(prepared)
+        entry["total_seconds"] += seconds
+        entry["max_seconds"] = max(entry["max_seconds"], seconds)
+    DB_QUERY_DURATION.observe(seconds, name)
+    if failed:
+        DB_QUERY_ERRORS.inc(name)
+
+
+def stats():
+    """Per-statement execution counters and timings"""
+    with _stats_lock:
+        return {
+            name: {
+                **entry,
+                "avg_ms": round(entry["total_seconds"] * 1000 / entry["executions"], 3) if entry["executions"] else 0.0,
+                "max_ms": round(entry["max_seconds"] * 1000, 3),
+            }
+            for name, entry in sorted(_stats.items())
+        }
+
+
+def _connection_cache(cnx):
+    """Prepared cursors of this server session, keyed by statement"""
+    cache = getattr(cnx, "_prepared_statements", None)
+    if cache is None or cache["connection_id"] != cnx.connection_id:
+        # New connection, or reconnected: the server has forgotten every statement
+        cache = {"connection_id": cnx.connection_id, "static": {}, "dynamic": OrderedDict()}
+        cnx._prepared_statements = cache
+    return cache
+
+
+def _cursor_for(cnx, name: str, sql: str):
+    """Cached (prepared cursor, sql) for a statement, and whether it still has to be prepared.
+
+    The connector only reuses a prepared statement when it is executed with
+    the very same string object, so the cache also hands back the string
+    the cursor was first prepared with.
+    """
+    cache = _connection_cache(cnx)
+    if sql is STATEMENTS.get(name):
+        cursors, key = cache["static"], name
+    else:
+        cursors, key = cache["dynamic"], (name, sql)
+
+    entry = cursors.get(key)
+    if entry is not None:
+        if cursors is cache["dynamic"]:
+            cursors.move_to_end(key)
+        return entry, False
+
+    entry = cursors[key] = (cnx.cursor(prepared=True), sql)
+    if cursors is cache["dynamic"] and len(cursors) > MAX_DYNAMIC_PER_CONNECTION:
+        _, (evicted, _) = cursors.popitem(last=False)
+        try:
+            evicted.close()
+        except mysql.connector.Error:
+            pass
+    return entry, True
+
+
+def _forget(cnx):
+    cnx._prepared_statements = None
+
+
+def execute(conn, name: str, params=(), sql: str = None, prepared: bool = True):
+    """Execute a registered statement on a prepared cursor and return the cursor.
+
+    Read every row before running another statement on the same connection.
+    Pass `sql` for statements whose text varies per request; they are counted
+    under `name`. With prepared=False the statement runs on a plain buffered
+    cursor that is not cached, for SQL whose placeholder count varies.
+    """
+    cnx = getattr(conn, "_cnx", conn)  # PooledMySQLConnection wraps the real connection
+    if sql is None:
+        sql = STATEMENTS[name]
+    params = tuple(params)
+
+    plain = not prepared
+    if plain:
+        cursor = cnx.cursor(buffered=True)
+    else:
+        (cursor, sql), prepared = _cursor_for(cnx, name, sql)
+    start = time.perf_counter()
+    try:
+        try:
+            cursor.execute(sql, params)
+        except mysql.connector.Error as err:
+            if plain or err.errno != errorcode.ER_UNKNOWN_STMT_HANDLER:
+                raise
+            # Server lost the statement (e.g. reset session): prepare again and retry once
+            _forget(cnx)
+            (cursor, sql), prepared = _cursor_for(cnx, name, sql)
+            cursor.execute(sql, params)
+    except mysql.connector.Error:
+        seconds = time.perf_counter() - start
+        _record(name, seconds, prepared, True)
+        sql_trace.record(name, sql, params, seconds)
+        raise
+
+    seconds = time.perf_counter() - start
+    _record(name, seconds, prepared, False)
+    statement = sql_trace.record(name, sql, params, seconds, sql_trace.affected_rows(cursor))
+    return sql_trace.wrap_cursor(cursor, statement)
+
+
+def execute_many(conn, name: str, rows, sql: str = None):
+    """executemany() of a registered INSERT ... VALUES statement. Returns the
+    (closed) cursor for its rowcount and lastrowid.
+
+    Runs on a plain cursor, which the connector rewrites into a single
+    multi-row INSERT; a prepared cursor would send one execution per row.
+    """
+    cnx = getattr(conn, "_cnx", conn)
+    if sql is None:
+        sql = STATEMENTS[name]
+    cursor = cnx.cursor()
+    start = time.perf_counter()
+    try:
+        cursor.executemany(sql, rows)
+    except mysql.connector.Error:
+        seconds = time.perf_counter() - start
+        _record(name, seconds, False, True)
+        sql_trace.record(name, sql, rows, seconds)
+        raise
+    finally:
+        cursor.close()
+    seconds = time.perf_counter() - start
+    _record(name, seconds, False, False)
+    sql_trace.record(name, sql, rows, seconds, max(cursor.rowcount or 0, 0))
+    return cursor
@@ -0,0 +1,28 @@
+"""
+Fast JSON rendering for hot endpoints.
+
+FastAPI runs jsonable_encoder over any plain dict/list an endpoint returns
+before serializing it. Returning FastJSONResponse directly skips that walk:
+orjson serializes dates natively and Decimal is converted the same way
+jsonable_encoder does (int when integral, float otherwise).
+"""
+from decimal import Decimal
+from fastapi.responses import JSONResponse
+import orjson
+
+
+def _default(obj):
+    if isinstance(obj, Decimal):
+        return int(obj) if obj.as_tuple().exponent >= 0 else float(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(content) -> bytes:
+    return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content) -> bytes:
+        return dumps(content)
@@ -0,0 +1,98 @@
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from middleware import compression, admission
+from services.broker import broker
+from services import sql_trace, memory_profile, connection_leaks
+from routers import payments
+import queries
+import db
+import os
+import secrets
+
+router = APIRouter(prefix="/admin", tags=["Admin"])
+
+# Endpoints that expose source locations and stacks, or change how the whole
+# process runs, need this token in X-Admin-Token; without ADMIN_TOKEN they are disabled
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+
+def require_admin_token(x_admin_token: str = Header(None)):
+    if not ADMIN_TOKEN:
+        raise HTTPException(403, "Disabled; set ADMIN_TOKEN to enable")
+    if x_admin_token is None or not secrets.compare_digest(x_admin_token.encode(), ADMIN_TOKEN.encode()):
+        raise HTTPException(403, "Invalid admin token")
+
+@router.get("/compression")
+def get_compression_stats():
+    """Bytes saved and compression CPU cost per route"""
+    return {
+        "cache": {"hits": compression.cache.hits, "misses": compression.cache.misses},
+        "routes": compression.stats.snapshot()
+    }
+
+@router.get("/statements")
+def get_statement_stats():
+    """Executions, prepares and timings per registered SQL statement"""
+    return {
+        "registered": len(queries.STATEMENTS),
+        "statements": queries.stats()
+    }
+
+@router.get("/replicas")
+def get_replica_status():
+    """Health, replication lag and checkouts per read replica (DB_READ_HOSTS)"""
+    return {"replicas": [replica.status() for replica in db.replicas]}
+
+@router.get("/db/connections", dependencies=[Depends(require_admin_token)])
+def get_connection_holders():
+    """Pooled connections checked out right now, longest-held first, with the stack that took each"""
+    return connection_leaks.snapshot()
+
+@router.get("/live")
+def get_live_stats():
+    """Open live subscriptions, watched products and delivered/conflated updates"""
+    return broker.status()
+
+@router.get("/admission")
+def get_admission_stats():
+    """In-flight, waiting, admitted and shed requests per admission group"""
+    return admission.snapshot()
+
+@router.get("/sql-trace", dependencies=[Depends(require_admin_token)])
+def get_sql_trace():
+    """Recent slow statements and requests that repeated a statement (likely N+1)"""
+    return sql_trace.snapshot()
+
+@router.get("/memory", dependencies=[Depends(require_admin_token)])
+def get_memory_profile(limit: int = Query(20, ge=1, le=200)):
+    """RSS, traced memory, per-route allocation stats and the largest allocation sites (tracing must be on)"""
+    return {
+        **memory_profile.dump(limit),
+        "module_state": {"otp_storage_entries": len(payments.otp_storage)},
+    }
+
+def memory_diff(limit: int, reset: bool):
+    sites = memory_profile.diff(limit, reset)
+    if sites is None:
+        raise HTTPException(409, "Memory profiling is not running; POST /admin/memory/start first")
+    return {"sites": sites}
+
+@router.get("/memory/diff", dependencies=[Depends(require_admin_token)])
+def get_memory_diff(limit: int = Query(20, ge=1, le=200)):
+    """Allocation sites that grew since tracing started, or since the last POST /admin/memory/diff/reset"""
+    return memory_diff(limit, False)
+
+@router.post("/memory/diff/reset", dependencies=[Depends(require_admin_token)])
+def reset_memory_diff(limit: int = Query(20, ge=1, le=200)):
+    """Same as GET /admin/memory/diff, then take the current allocations as the new baseline"""
+    return memory_diff(limit, True)
+
+@router.post("/memory/start", dependencies=[Depends(require_admin_token)])
+def start_memory_profile(frames: int = Query(memory_profile.FRAMES, ge=1, le=50)):
+    """Start tracemalloc; slows allocations down while on"""
+    memory_profile.start(frames)
+    return memory_profile.status()
+
+@router.post("/memory/stop", dependencies=[Depends(require_admin_token)])
+def stop_memory_profile():
+    """Stop tracemalloc and drop the collected stats"""
+    memory_profile.stop()
+    return memory_profile.status()
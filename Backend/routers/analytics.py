@@ -0,0 +1,83 @@
+"""
+Seller dashboard, answered from the Seller_Daily_Stats rollup.
+
+The rollup is kept current by triggers on Order_Details and Feedbacks (see
+Database/migrations/004_seller_daily_stats.sql), so a date range is a primary
+key range scan over at most one row per product per day instead of a join
+across every order. `python -m tools.backfill_seller_stats` fills in history.
+"""
+from fastapi import APIRouter, HTTPException, Query
+from datetime import date, timedelta
+from db import get_db, fetch_dict, fetch_dicts
+from responses import FastJSONResponse
+import queries
+import mysql.connector
+
+router = APIRouter(prefix="/analytics", tags=["Analytics"])
+
+DEFAULT_RANGE_DAYS = 30
+MAX_RANGE_DAYS = 731
+
+STAT_COLUMNS = """
+            COALESCE(SUM(s.UnitsSold), 0) as UnitsSold,
+            COALESCE(SUM(s.Revenue), 0) as Revenue,
+            COALESCE(SUM(s.OrderCount), 0) as Orders,
+            COALESCE(SUM(s.ReviewCount), 0) as Reviews,
+            ROUND(SUM(s.RatingSum) / NULLIF(SUM(s.ReviewCount), 0), 2) as AvgRating
+        """
+
+SELLER_TOTALS = queries.register("analytics.seller_totals", f"""
+            SELECT {STAT_COLUMNS}
+            FROM Seller_Daily_Stats s
+            WHERE s.EmailID = %s AND s.StatDate BETWEEN %s AND %s
+        """)
+
+SELLER_DAILY = queries.register("analytics.seller_daily", f"""
+            SELECT s.StatDate as Day, {STAT_COLUMNS}
+            FROM Seller_Daily_Stats s
+            WHERE s.EmailID = %s AND s.StatDate BETWEEN %s AND %s
+            GROUP BY s.StatDate
+            ORDER BY s.StatDate
+        """)
+
+SELLER_PRODUCTS = queries.register("analytics.seller_products", f"""
+            SELECT s.PID, p.ProductName, {STAT_COLUMNS}
+            FROM Seller_Daily_Stats s
+            INNER JOIN Products p ON p.PID = s.PID
+            WHERE s.EmailID = %s AND s.StatDate BETWEEN %s AND %s
+            GROUP BY s.PID, p.ProductName
+            ORDER BY Revenue DESC, s.PID
+        """)
+
+
+def date_range(start: date = None, end: date = None):
+    """Inclusive (start, end); defaults to the last DEFAULT_RANGE_DAYS days"""
+    end = end or date.today()
+    start = start or end - timedelta(days=DEFAULT_RANGE_DAYS - 1)
+    if start > end:
+        raise HTTPException(400, "start must not be after end")
+    if (end - start).days >= MAX_RANGE_DAYS:
+        raise HTTPException(400, f"Date range is limited to {MAX_RANGE_DAYS} days")
+    return start, end
+
+
+@router.get("/seller/{email_id}")
+def get_seller_dashboard(email_id: str, start: date = Query(None), end: date = Query(None)):
+    """Totals, a per-day series and a per-product breakdown of a seller's sales and reviews"""
+    start, end = date_range(start, end)
+    params = (email_id, start, end)
+    conn = get_db(read_only=True)
+
+    try:
+        return FastJSONResponse({
+            "EmailID": email_id,
+            "start": start,
+            "end": end,
+            "totals": fetch_dict(queries.execute(conn, SELLER_TOTALS, params)),
+            "daily": fetch_dicts(queries.execute(conn, SELLER_DAILY, params)),
+            "products": fetch_dicts(queries.execute(conn, SELLER_PRODUCTS, params)),
+        })
+    except mysql.connector.Error as err:
+        raise HTTPException(400, str(err))
+    finally:
+        conn.close()
@@ -1,36 +1,36 @@
 from fastapi import APIRouter, HTTPException
 from models.category import CategoryCreate
-from db import get_db
+from db import get_db, fetch_dicts
+import queries
 import mysql.connector
 
 router = APIRouter(prefix="/category", tags=["Category"])
 
+ALL_CATEGORIES = queries.register("category.all", "SELECT CategoryID, CategoryName FROM Category ORDER BY CategoryName")
+
 @router.get("/")
 def get_all_categories():
     """Get all categories"""
-    conn = get_db()
-    cursor = conn.cursor(dictionary=True)
+    conn = get_db(read_only=True)
 
     try:
-        cursor.execute("SELECT CategoryID, CategoryName FROM Category ORDER BY CategoryName")
-        results = cursor.fetchall()
-        return results
+        return fetch_dicts(queries.execute(conn, ALL_CATEGORIES))
     except mysql.connector.Error as err:
         raise HTTPException(400, str(err))
     finally:
-        cursor.close()
         conn.close()
 
+INSERT_CATEGORY = queries.register("category.insert", """
+            INSERT INTO Category (CategoryID, CategoryName)
+            VALUES (%s, %s)
+        """)
+
 @router.post("/add")
 def add_category(category: CategoryCreate):
     conn = get_db()
-    cursor = conn.cursor()
 
     try:
-        cursor.execute("""
-            INSERT INTO Category (CategoryID, CategoryName)
-            VALUES (%s, %s)
-        """, (category.CategoryID, category.CategoryName))
+        queries.execute(conn, INSERT_CATEGORY, (category.CategoryID, category.CategoryName))
 
         conn.commit()
         return {"message": "Category added"}
@@ -39,5 +39,4 @@ def add_category(category: CategoryCreate):
         raise HTTPException(400, str(err))
 
     finally:
-        cursor.close()
         conn.close()
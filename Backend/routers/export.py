@@ -0,0 +1,145 @@
+"""
+Streaming exports (NDJSON or CSV) of the catalog, seller listings and order history.
+
+Rows are read from an unbuffered cursor in chunks of EXPORT_CHUNK_SIZE and
+written out as they arrive, so memory stays flat however large the table and
+the first rows reach the client right away. Each export runs on its own
+connection (a replica when configured) instead of holding a pool slot. The
+statements are registered in queries.py like every other router's, but run
+on that connection's plain unbuffered cursor rather than through
+queries.execute.
+"""
+from fastapi import APIRouter, Header, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from responses import dumps
+from routers.admin import require_admin_token
+import db
+import queries
+import mysql.connector
+import csv
+import io
+import os
+
+router = APIRouter(prefix="/export", tags=["Export"])
+
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", "1000"))
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+# Stock per product via the (PID, Stock) index, so rows stream in primary key
+# order without a GROUP BY temporary table
+PRODUCTS_EXPORT = queries.register("export.products", """
+    SELECT p.PID, p.ProductName, p.Description, p.Price,
+           (SELECT COALESCE(SUM(l.Stock), 0) FROM Lists l WHERE l.PID = p.PID) as TotalStock,
+           (SELECT COUNT(*) FROM Lists l WHERE l.PID = p.PID) as SellerCount
+    FROM Products p
+    ORDER BY p.PID
+""")
+
+LISTINGS_EXPORT = queries.register("export.listings", """
+    SELECT p.PID, p.ProductName, p.Description, p.Price, l.Stock
+    FROM Lists l
+    INNER JOIN Products p ON p.PID = l.PID
+    WHERE l.EmailID = %s
+    ORDER BY p.PID
+""")
+
+ORDER_LINES = """
+    SELECT o.OrderID, o.OrderDate, o.EmailID, od.PID, p.ProductName, p.Price, od.Order_Qty,
+           p.Price * od.Order_Qty as LineTotal
+    FROM Orders o
+    INNER JOIN Order_Details od ON od.OrderID = o.OrderID
+    INNER JOIN Products p ON p.PID = od.PID
+"""
+
+ORDERS_EXPORT = queries.register("export.orders", ORDER_LINES + " ORDER BY o.OrderID")
+
+USER_ORDERS_EXPORT = queries.register(
+    "export.user_orders", ORDER_LINES + " WHERE o.EmailID = %s ORDER BY o.OrderDate DESC, o.OrderID DESC")
+
+
+def stream_rows(conn, cursor, fmt: str):
+    """Yield encoded chunks of the cursor's result; closes the cursor and connection when done"""
+    try:
+        columns = cursor.column_names
+        if fmt == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(columns)
+            yield buffer.getvalue().encode()
+
+        while True:
+            rows = cursor.fetchmany(EXPORT_CHUNK_SIZE)
+            if not rows:
+                break
+            if fmt == "csv":
+                buffer.seek(0)
+                buffer.truncate()
+                writer.writerows(rows)
+                yield buffer.getvalue().encode()
+            else:
+                yield b"".join(dumps(dict(zip(columns, row))) + b"\n" for row in rows)
+    except mysql.connector.Error as err:
+        # Headers are already sent; the body simply ends early
+        print(f"Export aborted: {err}")
+    finally:
+        # Ended early (client went away, fetch failed): the cursor still has unread
+        # rows and refuses to close, which must not keep the connection open
+        try:
+            cursor.close()
+        except mysql.connector.Error:
+            pass
+        finally:
+            try:
+                conn.close()
+            except mysql.connector.Error as err:
+                print(f"Could not close export connection: {err}")
+
+
+def export_response(name: str, fmt: str, statement: str, params=()):
+    if fmt not in MEDIA_TYPES:
+        raise HTTPException(400, "format must be ndjson or csv")
+
+    try:
+        conn = db.connect(read_only=True)
+    except mysql.connector.Error as err:
+        raise HTTPException(503, f"Database unavailable: {err}")
+
+    try:
+        cursor = conn.cursor()  # unbuffered: rows stay on the server until fetched
+        cursor.execute(queries.STATEMENTS[statement], params)
+    except mysql.connector.Error as err:
+        conn.close()
+        raise HTTPException(400, str(err))
+
+    return StreamingResponse(
+        stream_rows(conn, cursor, fmt),
+        media_type=MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{name}.{fmt}"'}
+    )
+
+
+@router.get("/products")
+def export_products(format: str = Query("ndjson")):
+    """Every product with its total stock and number of sellers"""
+    return export_response("products", format, PRODUCTS_EXPORT)
+
+
+@router.get("/listings/{email_id}")
+def export_seller_listings(email_id: str, format: str = Query("ndjson")):
+    """A seller's listings with stock"""
+    return export_response("listings", format, LISTINGS_EXPORT, (email_id,))
+
+
+@router.get("/orders")
+def export_orders(email_id: str = Query(None), format: str = Query("ndjson"),
+                  x_admin_token: str = Header(None)):
+    """Order history, one row per order line. Without email_id every user's orders
+    (buyer emails included) are exported, which needs the admin token."""
+    if email_id:
+        return export_response("orders", format, USER_ORDERS_EXPORT, (email_id,))
+    require_admin_token(x_admin_token)
+    return export_response("orders", format, ORDERS_EXPORT)
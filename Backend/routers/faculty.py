@@ -1,20 +1,22 @@
 from fastapi import APIRouter, HTTPException
 from models.faculty import FacultyCreate
 from db import get_db
+import queries
 import mysql.connector
 
 router = APIRouter(prefix="/faculty", tags=["Faculty"])
 
+INSERT_FACULTY = queries.register("faculty.insert", """
+            INSERT INTO Faculty (FacultyID, Department, Designation, EmailID)
+            VALUES (%s, %s, %s, %s)
+        """)
+
 @router.post("/register")
 def register_faculty(faculty: FacultyCreate):
     conn = get_db()
-    cursor = conn.cursor()
 
     try:
-        cursor.execute("""
-            INSERT INTO Faculty (FacultyID, Department, Designation, EmailID)
-            VALUES (%s, %s, %s, %s)
-        """, (faculty.FacultyID, faculty.Department, faculty.Designation, faculty.EmailID))
+        queries.execute(conn, INSERT_FACULTY, (faculty.FacultyID, faculty.Department, faculty.Designation, faculty.EmailID))
 
         conn.commit()
         return {"message": "Faculty registered"}
@@ -23,5 +25,4 @@ def register_faculty(faculty: FacultyCreate):
         raise HTTPException(status_code=400, detail=str(err))
 
     finally:
-        cursor.close()
         conn.close()
@@ -1,50 +1,104 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query
 from models.feedbacks import FeedbackCreate
-from db import get_db
+from db import get_db, fetch_dicts
+from responses import FastJSONResponse
+import queries
+from services.pagination import encode_cursor, decode_cursor
+from services.broker import publish_rating
 import mysql.connector
 
 router = APIRouter(prefix="/feedback", tags=["Feedback"])
 
-@router.get("/product/{pid}")
-def get_product_feedbacks(pid: str):
-    """Get all feedbacks for a product"""
-    conn = get_db()
-    cursor = conn.cursor(dictionary=True)
-
-    try:
-        cursor.execute("""
+REVIEW_COLUMNS = """
             SELECT f.FeedBackID, f.Date, f.Rating, f.Review, f.Upvotes, 
                    f.EmailID, u.FirstName, u.LastName
             FROM FeedBacks f
             INNER JOIN Users u ON f.EmailID = u.EmailID
+        """
+
+# Reviews are ordered by (Upvotes, Date, FeedBackID) descending, which
+# idx_pid_upvotes_date serves directly (InnoDB appends the primary key).
+# The keyset predicate relies on all three being NOT NULL (migration 007).
+FIRST_REVIEWS = queries.register("feedback.page_first", REVIEW_COLUMNS + """
             WHERE f.PID = %s
-            ORDER BY f.Upvotes DESC, f.Date DESC
-        """, (pid,))
-        results = cursor.fetchall()
-        return results
+            ORDER BY f.Upvotes DESC, f.Date DESC, f.FeedBackID DESC
+            LIMIT %s
+        """)
+
+NEXT_REVIEWS = queries.register("feedback.page_after", REVIEW_COLUMNS + """
+            WHERE f.PID = %s
+              AND (f.Upvotes < %s
+                   OR (f.Upvotes = %s AND (f.Date < %s
+                                           OR (f.Date = %s AND f.FeedBackID < %s))))
+            ORDER BY f.Upvotes DESC, f.Date DESC, f.FeedBackID DESC
+            LIMIT %s
+        """)
+
+RATING_SUMMARY = queries.register("feedback.summary", """
+            SELECT ReviewCount, RatingSum, Star1, Star2, Star3, Star4, Star5
+            FROM Product_Rating_Summary
+            WHERE PID = %s
+        """)
+
+def rating_summary(row):
+    """Summary dict from a Product_Rating_Summary row (or None for a product without reviews)"""
+    count, total, *stars = row if row else (0, 0, 0, 0, 0, 0, 0)
+    return {
+        "ReviewCount": count,
+        "AvgRating": round(total / count, 2) if count else None,
+        "Histogram": {str(star): stars[star - 1] for star in range(1, 6)}
+    }
+
+@router.get("/product/{pid}")
+def get_product_feedbacks(pid: str, cursor: str = Query(None), limit: int = Query(10, ge=1, le=50)):
+    """Get a page of feedbacks for a product, most upvoted first.
+    The first page (no cursor) also carries the rating summary; pass next_cursor to get the following page.
+    """
+    conn = get_db(read_only=True)
+
+    try:
+        # One extra row tells whether another page follows
+        if cursor:
+            upvotes, review_date, feedback_id = decode_cursor(cursor, 3)
+            reviews = fetch_dicts(queries.execute(conn, NEXT_REVIEWS, (
+                pid, upvotes, upvotes, review_date, review_date, feedback_id, limit + 1)))
+        else:
+            reviews = fetch_dicts(queries.execute(conn, FIRST_REVIEWS, (pid, limit + 1)))
+
+        next_cursor = None
+        if len(reviews) > limit:
+            reviews = reviews[:limit]
+            last = reviews[-1]
+            next_cursor = encode_cursor([last["Upvotes"], last["Date"], last["FeedBackID"]])
+
+        page = {"items": reviews, "next_cursor": next_cursor}
+        if not cursor:
+            summary = queries.execute(conn, RATING_SUMMARY, (pid,)).fetchall()
+            page["summary"] = rating_summary(summary[0] if summary else None)
+        return FastJSONResponse(page)
     except mysql.connector.Error as err:
         raise HTTPException(400, str(err))
     finally:
-        cursor.close()
         conn.close()
 
+INSERT_FEEDBACK = queries.register("feedback.insert", """
+            INSERT INTO FeedBacks (FeedBackID, Date, Rating, Review, Upvotes, EmailID, PID)
+            VALUES (%s, %s, %s, %s, 0, %s, %s)
+        """)
+
 @router.post("/add")
 def add_feedback(fb: FeedbackCreate):
     conn = get_db()
-    cursor = conn.cursor()
 
     try:
-        cursor.execute("""
-            INSERT INTO FeedBacks (FeedBackID, Date, Rating, Review, Upvotes, EmailID, PID)
-            VALUES (%s, %s, %s, %s, 0, %s, %s)
-        """, (fb.FeedBackID, fb.Date, fb.Rating, fb.Review, fb.EmailID, fb.PID))
+        queries.execute(conn, INSERT_FEEDBACK, (fb.FeedBackID, fb.Date, fb.Rating, fb.Review, fb.EmailID, fb.PID))
 
         conn.commit()
+        publish_rating(conn, fb.PID)
         return {"message": "Feedback added"}
 
     except mysql.connector.Error as err:
         raise HTTPException(400, str(err))
 
     finally:
-        cursor.close()
         conn.close()
@@ -1,155 +1,180 @@
 from fastapi import APIRouter, HTTPException, Query
-from models.lists import ListCreate
-from db import get_db
+from models.lists import ListCreate, ListBatch, ListRemoveBatch
+from db import get_db, fetch_dicts
+from responses import FastJSONResponse
+import queries
+from services.broker import publish_stock
+from services import image_store, image_variants
 import mysql.connector
+from collections import Counter
 
 router = APIRouter(prefix="/lists", tags=["Lists"])
 
+ADD_LISTING = queries.register("lists.add", """
+            INSERT INTO Lists (EmailID, PID, Stock)
+            VALUES (%s, %s, %s)
+            ON DUPLICATE KEY UPDATE Stock = Stock + %s
+        """)
+
 @router.post("/add")
 def add_to_list(list_item: ListCreate):
     """Add a product to a user's listing (seller adds product to their inventory)"""
     conn = get_db()
-    cursor = conn.cursor()
 
     try:
-        cursor.execute("""
-            INSERT INTO Lists (EmailID, PID, Stock)
-            VALUES (%s, %s, %s)
-            ON DUPLICATE KEY UPDATE Stock = Stock + %s
-        """, (list_item.EmailID, list_item.PID, list_item.Stock, list_item.Stock))
+        queries.execute(conn, ADD_LISTING, (list_item.EmailID, list_item.PID, list_item.Stock, list_item.Stock))
 
         conn.commit()
+        publish_stock(conn, [list_item.PID])
         return {"message": "Product added to list"}
 
     except mysql.connector.Error as err:
         raise HTTPException(400, str(err))
 
     finally:
-        cursor.close()
         conn.close()
 
+USER_LISTINGS = queries.register("lists.user", """
+            SELECT p.PID, p.ProductName, p.Description, p.Price, l.Stock
+            FROM Products p
+            INNER JOIN Lists l ON p.PID = l.PID
+            WHERE l.EmailID = %s
+        """)
+
 @router.get("/user/{email_id}")
 def get_user_listings(email_id: str):
     """Get all products listed by a specific user"""
     conn = get_db()
-    cursor = conn.cursor(dictionary=True)
 
     try:
-        cursor.execute("""
-            SELECT p.PID, p.ProductName, p.Description, p.Price, l.Stock
-            FROM Products p
-            INNER JOIN Lists l ON p.PID = l.PID
-            WHERE l.EmailID = %s
-        """, (email_id,))
-        results = cursor.fetchall()
-        return results
+        return FastJSONResponse(fetch_dicts(queries.execute(conn, USER_LISTINGS, (email_id,))))
     except mysql.connector.Error as err:
         raise HTTPException(400, str(err))
     finally:
-        cursor.close()
         conn.close()
 
+PRODUCT_SELLERS = queries.register("lists.product_sellers", """
+            SELECT l.EmailID, u.FirstName, u.LastName, l.Stock
+            FROM Lists l
+            INNER JOIN Users u ON l.EmailID = u.EmailID
+            WHERE l.PID = %s AND l.Stock > 0
+        """)
+
 @router.get("/product/{pid}")
 def get_product_sellers(pid: str):
     """Get all sellers (users) who have this product in their list"""
     conn = get_db()
-    cursor = conn.cursor(dictionary=True)
 
     try:
-        cursor.execute("""
-            SELECT l.EmailID, u.FirstName, u.LastName, l.Stock
-            FROM Lists l
-            INNER JOIN Users u ON l.EmailID = u.EmailID
-            WHERE l.PID = %s AND l.Stock > 0
-        """, (pid,))
-        results = cursor.fetchall()
-        return results
+        return FastJSONResponse(fetch_dicts(queries.execute(conn, PRODUCT_SELLERS, (pid,))))
     except mysql.connector.Error as err:
         raise HTTPException(400, str(err))
     finally:
-        cursor.close()
         conn.close()
 
+UPDATE_LISTING = queries.register("lists.update", """
+            UPDATE Lists
+            SET Stock = %s
+            WHERE EmailID = %s AND PID = %s
+        """)
+
 @router.put("/update")
 def update_listing(list_item: ListCreate):
     """Update stock for a product in user's listing"""
     conn = get_db()
-    cursor = conn.cursor()
 
     try:
-        cursor.execute("""
-            UPDATE Lists
-            SET Stock = %s
-            WHERE EmailID = %s AND PID = %s
-        """, (list_item.Stock, list_item.EmailID, list_item.PID))
+        cursor = queries.execute(conn, UPDATE_LISTING, (list_item.Stock, list_item.EmailID, list_item.PID))
 
         if cursor.rowcount == 0:
             raise HTTPException(404, "Listing not found")
 
         conn.commit()
+        publish_stock(conn, [list_item.PID])
         return {"message": "Listing updated"}
 
     except mysql.connector.Error as err:
         raise HTTPException(400, str(err))
     finally:
-        cursor.close()
         conn.close()
 
+REMOVE_LISTING = queries.register("lists.remove", """
+            DELETE FROM Lists
+            WHERE EmailID = %s AND PID = %s
+        """)
+
+COUNT_LISTINGS = queries.register("lists.count_listings", """
+            SELECT COUNT(*) as count
+            FROM Lists
+            WHERE PID = %s
+        """)
+
+COUNT_ORDER_LINES = queries.register("lists.count_order_lines", """
+                SELECT COUNT(*) as order_count
+                FROM Order_Details
+                WHERE PID = %s
+            """)
+
+DELETE_PRODUCT = queries.register("lists.delete_product", """
+                    DELETE FROM Products
+                    WHERE PID = %s
+                """)
+
+# One row per image, so a URL attached twice is released twice
+PRODUCT_IMAGE_URLS = queries.register("lists.product_image_urls", """
+                    SELECT ImageURL FROM Product_Images WHERE PID = %s FOR UPDATE
+                """)
+
+def release_images(conn, image_urls: list):
+    """Drop the references of Product_Images rows that went with their deleted product.
+    Call inside the deleting transaction; returns the files to unlink after committing."""
+    unused_files = []
+    for image_url in image_urls:
+        if image_store.release(conn, image_url):
+            unused_files += [image_url] + image_variants.discard(conn, image_url)
+    return unused_files
+
 @router.delete("/remove")
 def remove_listing(email_id: str = Query(...), pid: str = Query(...)):
     """Remove a product from user's listing. If no users have it listed, delete the product entirely."""
     conn = get_db()
-    cursor = conn.cursor()
 
     try:
         # First, remove the listing
-        cursor.execute("""
-            DELETE FROM Lists
-            WHERE EmailID = %s AND PID = %s
-        """, (email_id, pid))
+        cursor = queries.execute(conn, REMOVE_LISTING, (email_id, pid))
 
         if cursor.rowcount == 0:
             raise HTTPException(404, "Listing not found")
 
         # Check if any other users still have this product listed
-        cursor.execute("""
-            SELECT COUNT(*) as count
-            FROM Lists
-            WHERE PID = %s
-        """, (pid,))
-        
-        remaining_listings = cursor.fetchone()[0]
+        remaining_listings = queries.execute(conn, COUNT_LISTINGS, (pid,)).fetchall()[0][0]
         
         # If no one else has this product listed, try to delete it from Products table
         # Note: Products with order history will NOT be deleted (foreign key constraint prevents it)
         if remaining_listings == 0:
             # Check if product has order history before attempting deletion
-            cursor.execute("""
-                SELECT COUNT(*) as order_count
-                FROM Order_Details
-                WHERE PID = %s
-            """, (pid,))
-            
-            order_count = cursor.fetchone()[0]
+            order_count = queries.execute(conn, COUNT_ORDER_LINES, (pid,)).fetchall()[0][0]
             
             if order_count > 0:
                 # Product has order history - don't delete it, just remove from listings
                 conn.commit()
+                publish_stock(conn, [pid])
                 return {
                     "message": "Listing removed. Product kept in database due to order history.",
                     "product_deleted": False,
                     "has_order_history": True
                 }
             else:
-                # No order history - safe to delete
-                cursor.execute("""
-                    DELETE FROM Products
-                    WHERE PID = %s
-                """, (pid,))
+                # No order history - safe to delete; its Product_Images rows cascade
+                image_urls = [row[0] for row in queries.execute(conn, PRODUCT_IMAGE_URLS, (pid,)).fetchall()]
+                cursor = queries.execute(conn, DELETE_PRODUCT, (pid,))
                 
                 # Check if product was actually deleted
                 if cursor.rowcount > 0:
+                    unused_files = release_images(conn, image_urls)
                     conn.commit()
+                    image_store.remove_files(unused_files)
+                    publish_stock(conn, [pid])
                     return {
                         "message": "Listing removed and product deleted (no longer listed by anyone)",
                         "product_deleted": True,
@@ -158,6 +183,7 @@ def remove_listing(email_id: str = Query(...), pid: str = Query(...)):
                 else:
                     # Product might have been deleted already or doesn't exist
                     conn.commit()
+                    publish_stock(conn, [pid])
                     return {
                         "message": "Listing removed",
                         "product_deleted": False,
@@ -166,6 +192,7 @@ def remove_listing(email_id: str = Query(...), pid: str = Query(...)):
         else:
             # Other users still have this product listed
             conn.commit()
+            publish_stock(conn, [pid])
             return {
                 "message": "Listing removed",
                 "product_deleted": False
@@ -175,6 +202,226 @@ def remove_listing(email_id: str = Query(...), pid: str = Query(...)):
         conn.rollback()
         raise HTTPException(400, str(err))
     finally:
-        cursor.close()
         conn.close()
 
+
+# Batch endpoints: each runs a fixed number of set-based statements in one
+# transaction whatever the number of items, and reports an outcome per PID.
+# Repeated PIDs are merged (stock added up for upsert, last value wins for update).
+# Statements with an IN list are registered with a single-PID variant (for
+# the stats and the index advisor) and run unprepared, since every list
+# length would be another prepared statement.
+
+def in_markers(count: int):
+    return ", ".join(["%s"] * count)
+
+def lock_products_query(count: int):
+    return f"""
+            SELECT p.PID, l.Stock
+            FROM Products p
+            LEFT JOIN Lists l ON l.PID = p.PID AND l.EmailID = %s
+            WHERE p.PID IN ({in_markers(count)})
+            FOR UPDATE
+        """
+
+def lock_listings_query(count: int):
+    return f"""
+            SELECT PID FROM Lists
+            WHERE EmailID = %s AND PID IN ({in_markers(count)})
+            FOR UPDATE
+        """
+
+def set_stock_query(count: int):
+    values = " UNION ALL ".join(["SELECT %s as PID, %s as Stock"] * count)
+    return f"""
+                UPDATE Lists l
+                INNER JOIN ({values}) v ON v.PID = l.PID
+                SET l.Stock = v.Stock
+                WHERE l.EmailID = %s
+            """
+
+def remove_listings_query(count: int):
+    return f"""
+                DELETE FROM Lists
+                WHERE EmailID = %s AND PID IN ({in_markers(count)})
+            """
+
+def orphans_query(count: int):
+    return f"""
+                SELECT p.PID, EXISTS (SELECT 1 FROM Order_Details od WHERE od.PID = p.PID) as HasOrders
+                FROM Products p
+                WHERE p.PID IN ({in_markers(count)})
+                  AND NOT EXISTS (SELECT 1 FROM Lists l WHERE l.PID = p.PID)
+                FOR UPDATE
+            """
+
+def delete_orphans_query(count: int):
+    return f"""
+                DELETE FROM Products
+                WHERE PID IN ({in_markers(count)})
+                  AND NOT EXISTS (SELECT 1 FROM Lists l WHERE l.PID = Products.PID)
+                  AND NOT EXISTS (SELECT 1 FROM Order_Details od WHERE od.PID = Products.PID)
+            """
+
+def remaining_products_query(count: int):
+    return f"SELECT PID FROM Products WHERE PID IN ({in_markers(count)})"
+
+def products_image_urls_query(count: int):
+    return f"SELECT PID, ImageURL FROM Product_Images WHERE PID IN ({in_markers(count)}) FOR UPDATE"
+
+USER_EXISTS = queries.register("lists.user_exists", "SELECT EmailID FROM Users WHERE EmailID = %s")
+LOCK_PRODUCTS = queries.register("lists.batch_lock_products", lock_products_query(1))
+UPSERT_LISTINGS = queries.register("lists.batch_upsert", """
+                INSERT INTO Lists (EmailID, PID, Stock)
+                VALUES (%s, %s, %s)
+                ON DUPLICATE KEY UPDATE Stock = Stock + VALUES(Stock)
+            """)
+LOCK_LISTINGS = queries.register("lists.batch_lock_listings", lock_listings_query(1))
+SET_STOCK = queries.register("lists.batch_set_stock", set_stock_query(1))
+REMOVE_LISTINGS = queries.register("lists.batch_remove", remove_listings_query(1))
+ORPHANS = queries.register("lists.batch_orphans", orphans_query(1))
+DELETE_ORPHANS = queries.register("lists.batch_delete_orphans", delete_orphans_query(1))
+REMAINING_PRODUCTS = queries.register("lists.batch_remaining_products", remaining_products_query(1))
+PRODUCTS_IMAGE_URLS = queries.register("lists.batch_product_image_urls", products_image_urls_query(1))
+
+def batch_response(email_id: str, results: list):
+    return FastJSONResponse({
+        "EmailID": email_id,
+        "counts": dict(Counter(result["status"] for result in results)),
+        "results": results,
+    })
+
+@router.post("/batch/upsert")
+def upsert_listings(batch: ListBatch):
+    """Add stock to many listings, creating the ones the seller does not have yet"""
+    stock = {}
+    for item in batch.Items:
+        stock[item.PID] = stock.get(item.PID, 0) + item.Stock
+    pids = sorted(stock)
+
+    conn = get_db()
+
+    try:
+        if not queries.execute(conn, USER_EXISTS, (batch.EmailID,)).fetchall():
+            raise HTTPException(404, "User not found")
+
+        current = dict(queries.execute(conn, LOCK_PRODUCTS, [batch.EmailID, *pids],
+                                       sql=lock_products_query(len(pids)), prepared=False).fetchall())
+
+        known = [pid for pid in pids if pid in current]
+        if known:
+            queries.execute_many(conn, UPSERT_LISTINGS, [(batch.EmailID, pid, stock[pid]) for pid in known])
+        conn.commit()
+        publish_stock(conn, known)
+
+        results = []
+        for pid in stock:
+            if pid not in current:
+                results.append({"PID": pid, "status": "unknown_product"})
+            elif current[pid] is None:
+                results.append({"PID": pid, "status": "created", "Stock": stock[pid]})
+            else:
+                results.append({"PID": pid, "status": "updated", "Stock": current[pid] + stock[pid]})
+        return batch_response(batch.EmailID, results)
+
+    except mysql.connector.Error as err:
+        conn.rollback()
+        raise HTTPException(400, str(err))
+    finally:
+        conn.close()
+
+@router.put("/batch/update")
+def update_listings(batch: ListBatch):
+    """Set the stock of many existing listings"""
+    stock = {item.PID: item.Stock for item in batch.Items}
+    pids = sorted(stock)
+
+    conn = get_db()
+
+    try:
+        # Lock the seller's rows in PID order before writing them
+        rows = queries.execute(conn, LOCK_LISTINGS, [batch.EmailID, *pids],
+                               sql=lock_listings_query(len(pids)), prepared=False).fetchall()
+        found = {row[0] for row in rows}
+
+        if found:
+            queries.execute(conn, SET_STOCK,
+                            [value for pid in sorted(found) for value in (pid, stock[pid])] + [batch.EmailID],
+                            sql=set_stock_query(len(found)), prepared=False)
+        conn.commit()
+        publish_stock(conn, found)
+
+        results = [
+            {"PID": pid, "status": "updated", "Stock": stock[pid]} if pid in found
+            else {"PID": pid, "status": "not_found"}
+            for pid in stock
+        ]
+        return batch_response(batch.EmailID, results)
+
+    except mysql.connector.Error as err:
+        conn.rollback()
+        raise HTTPException(400, str(err))
+    finally:
+        conn.close()
+
+@router.post("/batch/remove")
+def remove_listings(batch: ListRemoveBatch):
+    """Remove many listings. Products no longer listed by anyone are deleted unless they have order history."""
+    pids = sorted(set(batch.PIDs))
+
+    conn = get_db()
+
+    try:
+        rows = queries.execute(conn, LOCK_LISTINGS, [batch.EmailID, *pids],
+                               sql=lock_listings_query(len(pids)), prepared=False).fetchall()
+        found = sorted(row[0] for row in rows)
+
+        orphans = {}
+        if found:
+            queries.execute(conn, REMOVE_LISTINGS, [batch.EmailID, *found],
+                            sql=remove_listings_query(len(found)), prepared=False)
+
+            # Removed products nobody lists any more, with whether they were ever ordered
+            rows = queries.execute(conn, ORPHANS, found, sql=orphans_query(len(found)), prepared=False).fetchall()
+            orphans = {pid: bool(has_orders) for pid, has_orders in rows}
+
+        # Products with order history are kept: deleting them would cascade into Order_Details
+        deletable = sorted(pid for pid, has_orders in orphans.items() if not has_orders)
+        deleted = set()
+        unused_files = []
+        if deletable:
+            # Their Product_Images rows cascade with them; each one holds an image reference
+            images = queries.execute(conn, PRODUCTS_IMAGE_URLS, deletable,
+                                     sql=products_image_urls_query(len(deletable)), prepared=False).fetchall()
+            cursor = queries.execute(conn, DELETE_ORPHANS, deletable,
+                                     sql=delete_orphans_query(len(deletable)), prepared=False)
+            if cursor.rowcount == len(deletable):
+                deleted = set(deletable)
+            else:
+                rows = queries.execute(conn, REMAINING_PRODUCTS, deletable,
+                                       sql=remaining_products_query(len(deletable)), prepared=False).fetchall()
+                deleted = set(deletable) - {row[0] for row in rows}
+            unused_files = release_images(conn, [image_url for pid, image_url in images if pid in deleted])
+        conn.commit()
+        image_store.remove_files(unused_files)
+        publish_stock(conn, found)
+
+        found = set(found)
+        results = []
+        for pid in dict.fromkeys(batch.PIDs):
+            if pid not in found:
+                results.append({"PID": pid, "status": "not_found"})
+            else:
+                results.append({
+                    "PID": pid,
+                    "status": "removed",
+                    "product_deleted": pid in deleted,
+                    "has_order_history": orphans.get(pid, False),
+                })
+        return batch_response(batch.EmailID, results)
+
+    except mysql.connector.Error as err:
+        conn.rollback()
+        raise HTTPException(400, str(err))
+    finally:
+        conn.close()
@@ -0,0 +1,164 @@
+"""
+Live product updates: stock, price and rating changes pushed as they happen.
+
+    GET /live/products?pids=PID1,PID2   Server-Sent Events
+    WS  /live/ws                        {"subscribe": [...]} / {"unsubscribe": [...]}
+
+A subscriber first gets a snapshot of the products it asked for, then only
+the fields that changed. Updates come from services.broker, which conflates
+them per product, so a client that reads slowly gets the latest values
+instead of a backlog.
+"""
+from fastapi import APIRouter, HTTPException, Query, WebSocket, WebSocketDisconnect
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from services.broker import broker, MAX_PIDS_PER_SUBSCRIPTION
+from responses import dumps
+from db import get_db, fetch_dicts
+import queries
+import mysql.connector
+import orjson
+import anyio
+import os
+
+router = APIRouter(prefix="/live", tags=["Live"])
+
+HEARTBEAT_SECONDS = float(os.getenv("LIVE_HEARTBEAT_SECONDS", "20"))
+
+
+def parse_pids(value):
+    if isinstance(value, str):
+        value = value.split(",")
+    if not isinstance(value, list) or not all(isinstance(pid, str) for pid in value):
+        raise ValueError("pids must be a list of product IDs")
+    pids = list(dict.fromkeys(pid.strip() for pid in value if pid.strip()))
+    if len(pids) > MAX_PIDS_PER_SUBSCRIPTION:
+        raise ValueError(f"At most {MAX_PIDS_PER_SUBSCRIPTION} products per subscription")
+    return pids
+
+
+def snapshot_query(count: int):
+    markers = ", ".join(["%s"] * count)
+    return f"""
+            SELECT p.PID, p.Price,
+                   (SELECT COALESCE(SUM(l.Stock), 0) FROM Lists l WHERE l.PID = p.PID) as TotalStock,
+                   COALESCE(r.ReviewCount, 0) as ReviewCount,
+                   ROUND(r.RatingSum / NULLIF(r.ReviewCount, 0), 2) as AvgRating
+            FROM Products p
+            LEFT JOIN Product_Rating_Summary r ON r.PID = p.PID
+            WHERE p.PID IN ({markers})
+        """
+
+# Single-product variant; lists of any length run unprepared (see queries.execute)
+SNAPSHOT = queries.register("live.snapshot", snapshot_query(1))
+
+
+def load_snapshot(pids: list):
+    """Current price, total stock and rating of the given products (from the primary)"""
+    if not pids:
+        return []
+    conn = get_db()
+
+    try:
+        return fetch_dicts(queries.execute(conn, SNAPSHOT, pids, sql=snapshot_query(len(pids)), prepared=False))
+    finally:
+        conn.close()
+
+
+def updates(changes: dict):
+    return [{"PID": pid, **fields} for pid, fields in changes.items()]
+
+
+async def sse_events(pids: list):
+    subscription = broker.open()
+    try:
+        # Subscribe before the snapshot so no change between the two is lost
+        broker.subscribe(subscription, pids)
+        try:
+            snapshot = await run_in_threadpool(load_snapshot, pids)
+        except mysql.connector.Error as err:
+            yield b"event: error\ndata: " + dumps({"detail": str(err)}) + b"\n\n"
+            return
+        yield b"retry: 5000\nevent: snapshot\ndata: " + dumps(snapshot) + b"\n\n"
+
+        while True:
+            changes = await subscription.wait(HEARTBEAT_SECONDS)
+            if not changes:
+                yield b": ping\n\n"
+                continue
+            yield b"".join(b"event: update\ndata: " + dumps(update) + b"\n\n" for update in updates(changes))
+    finally:
+        broker.close(subscription)
+
+
+@router.get("/products")
+async def stream_products(pids: str = Query(..., description="Comma-separated product IDs")):
+    """Server-Sent Events: a `snapshot` event, then an `update` event per changed product"""
+    try:
+        pid_list = parse_pids(pids)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    if not pid_list:
+        raise HTTPException(400, "No product IDs given")
+
+    return StreamingResponse(
+        sse_events(pid_list),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+async def send(websocket: WebSocket, message: dict):
+    await websocket.send_text(dumps(message).decode())
+
+
+async def push_updates(websocket: WebSocket, subscription):
+    try:
+        while True:
+            changes = await subscription.wait(HEARTBEAT_SECONDS)
+            if changes:
+                await send(websocket, {"type": "update", "items": updates(changes)})
+    except (WebSocketDisconnect, RuntimeError):
+        pass  # socket closed; the receive loop ends too
+
+
+async def handle_commands(websocket: WebSocket, subscription):
+    """Apply subscribe/unsubscribe messages until the client disconnects"""
+    try:
+        while True:
+            try:
+                message = orjson.loads(await websocket.receive_text())
+                if not isinstance(message, dict):
+                    raise ValueError("Expected a JSON object")
+                added = parse_pids(message.get("subscribe", []))
+                removed = parse_pids(message.get("unsubscribe", []))
+                broker.unsubscribe(subscription, removed)
+                broker.subscribe(subscription, added)
+            except ValueError as e:  # includes orjson.JSONDecodeError
+                await send(websocket, {"type": "error", "detail": str(e)})
+                continue
+
+            if added:
+                try:
+                    snapshot = await run_in_threadpool(load_snapshot, added)
+                except mysql.connector.Error as err:
+                    await send(websocket, {"type": "error", "detail": str(err)})
+                    continue
+                await send(websocket, {"type": "snapshot", "items": snapshot})
+    except (WebSocketDisconnect, RuntimeError):
+        return
+
+
+@router.websocket("/ws")
+async def live_socket(websocket: WebSocket):
+    """WebSocket: send {"subscribe": [PIDs]} or {"unsubscribe": [PIDs]}; receive snapshot and update messages"""
+    await websocket.accept()
+    subscription = broker.open()
+
+    try:
+        async with anyio.create_task_group() as tasks:
+            tasks.start_soon(push_updates, websocket, subscription)
+            await handle_commands(websocket, subscription)
+            tasks.cancel_scope.cancel()
+    finally:
+        broker.close(subscription)
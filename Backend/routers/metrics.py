@@ -0,0 +1,74 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from middleware import admission, compression
+from middleware import metrics as http_metrics
+from services import metrics, upvote_counter, connection_leaks
+from services.broker import broker
+import queries
+import db
+
+router = APIRouter(tags=["Metrics"])
+
+
+def pool_usage():
+    """(label, size, in use) per opened connection pool"""
+    pools = [("primary", db.pool)] + [(replica.name, replica.pool) for replica in db.replicas if replica.pool]
+    return [(label, p.pool_size, p.pool_size - p._cnx_queue.qsize()) for label, p in pools]
+
+
+def collect():
+    """Values kept by other modules, read at scrape time"""
+    pools = pool_usage()
+    statements = queries.stats()
+    groups = admission.snapshot()
+    live = broker.status()
+    outcomes = ("admitted", "rate_limited", "shed_queue_full", "shed_timeout")
+
+    lines = []
+    lines += metrics.collected("http_requests_in_progress", "gauge", "Requests being handled",
+                               [((), http_metrics.in_progress)])
+    lines += metrics.collected("db_pool_size", "gauge", "Connections per pool",
+                               [((label,), size) for label, size, _ in pools], ("pool",))
+    lines += metrics.collected("db_pool_in_use", "gauge", "Connections checked out per pool",
+                               [((label,), used) for label, _, used in pools], ("pool",))
+    lines += metrics.collected("db_connection_leaks_total", "counter",
+                               "Pooled connections garbage-collected unreturned, held too long or reclaimed",
+                               [((kind,), connection_leaks.stats[kind]) for kind in ("collected", "held_too_long", "reclaimed")],
+                               ("kind",))
+    lines += metrics.collected("db_replica_healthy", "gauge", "1 when the replica is receiving reads",
+                               [((r.name,), int(r.status()["healthy"])) for r in db.replicas], ("replica",))
+    lines += metrics.collected("db_replica_lag_seconds", "gauge", "Last measured replication lag",
+                               [((r.name,), r.lag) for r in db.replicas if r.lag is not None], ("replica",))
+    lines += metrics.collected("db_statement_prepares_total", "counter",
+                               "Server-side prepares per statement (executions minus prepares hit the cache)",
+                               [((name,), entry["prepares"]) for name, entry in statements.items()], ("statement",))
+    lines += metrics.collected("compression_cache_hits_total", "counter", "Compressed bodies served from cache",
+                               [((), compression.cache.hits)])
+    lines += metrics.collected("compression_cache_misses_total", "counter", "Compressed bodies not in cache",
+                               [((), compression.cache.misses)])
+    lines += metrics.collected("upvote_flushes_total", "counter", "Upvote counter flushes",
+                               [((), upvote_counter.stats["flushes"])])
+    lines += metrics.collected("upvote_flush_failures_total", "counter", "Upvote counter flushes that failed",
+                               [((), upvote_counter.stats["failures"])])
+    lines += metrics.collected("upvote_pending_reviews", "gauge", "Reviews waiting for a counter flush",
+                               [((), upvote_counter.pending())])
+    lines += metrics.collected("live_subscriptions", "gauge", "Open live update subscriptions",
+                               [((), live["subscriptions"])])
+    lines += metrics.collected("live_watched_products", "gauge", "Products with at least one subscriber",
+                               [((), live["watched_products"])])
+    lines += metrics.collected("live_updates_total", "counter", "Live updates queued to subscribers",
+                               [(("delivered",), live["delivered"]), (("conflated",), live["conflated"])], ("outcome",))
+    lines += metrics.collected("admission_inflight", "gauge", "Requests holding a slot per admission group",
+                               [((prefix,), group["inflight"]) for prefix, group in groups.items()], ("group",))
+    lines += metrics.collected("admission_waiting", "gauge", "Requests queued per admission group",
+                               [((prefix,), group["waiting"]) for prefix, group in groups.items()], ("group",))
+    lines += metrics.collected("admission_requests_total", "counter", "Admission decisions per group",
+                               [((prefix, outcome), group[outcome]) for prefix, group in groups.items() for outcome in outcomes],
+                               ("group", "outcome"))
+    return lines
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    """Prometheus text exposition format"""
+    return PlainTextResponse(metrics.render(collect()), media_type="text/plain; version=0.0.4; charset=utf-8")
@@ -1,8 +1,10 @@
 from fastapi import APIRouter, HTTPException, Request
 from fastapi.responses import RedirectResponse
 from authlib.integrations.starlette_client import OAuth
-from db import get_db
+from db import get_db, fetch_dict
+from routers.users import INSERT_USER, GET_USER, GET_STUDENT, GET_FACULTY
 import mysql.connector
+import queries
 from passlib.hash import bcrypt
 import secrets
 import os
@@ -99,17 +101,10 @@ async def oauth_callback(request: Request):
         
         # Check if user exists, if not create one
         conn = get_db()
-        cursor = conn.cursor(dictionary=True)
         
         try:
             # Check if user exists
-            cursor.execute("""
-                SELECT EmailID, FirstName, LastName
-                FROM Users
-                WHERE EmailID = %s
-            """, (email,))
-            
-            user = cursor.fetchone()
+            user = fetch_dict(queries.execute(conn, GET_USER, (email,)))
             
             if not user:
                 # For signup mode, create new user
@@ -119,43 +114,20 @@ async def oauth_callback(request: Request):
                 try:
                     # Use safe bcrypt hash to avoid 72-byte errors
                     hashed_password = safe_bcrypt_hash(random_password)
-                    cursor.execute("""
-                        INSERT INTO Users (EmailID, FirstName, LastName, Password)
-                        VALUES (%s, %s, %s, %s)
-                    """, (email, first_name, last_name, hashed_password))
+                    queries.execute(conn, INSERT_USER, (email, first_name, last_name, hashed_password))
                     conn.commit()
                     
                     # Fetch the newly created user
-                    cursor.execute("""
-                        SELECT EmailID, FirstName, LastName
-                        FROM Users
-                        WHERE EmailID = %s
-                    """, (email,))
-                    user = cursor.fetchone()
+                    user = fetch_dict(queries.execute(conn, GET_USER, (email,)))
                 except mysql.connector.IntegrityError:
                     # User might have been created between check and insert
-                    cursor.execute("""
-                        SELECT EmailID, FirstName, LastName
-                        FROM Users
-                        WHERE EmailID = %s
-                    """, (email,))
-                    user = cursor.fetchone()
+                    user = fetch_dict(queries.execute(conn, GET_USER, (email,)))
             
             # Check if user is a student
-            cursor.execute("""
-                SELECT EnrollmentNo, Course, Batch
-                FROM Student
-                WHERE EmailID = %s
-            """, (email,))
-            student = cursor.fetchone()
+            student = fetch_dict(queries.execute(conn, GET_STUDENT, (email,)))
 
             # Check if user is faculty
-            cursor.execute("""
-                SELECT FacultyID, Department, Designation
-                FROM Faculty
-                WHERE EmailID = %s
-            """, (email,))
-            faculty = cursor.fetchone()
+            faculty = fetch_dict(queries.execute(conn, GET_FACULTY, (email,)))
 
             response_data = {
                 "EmailID": user["EmailID"],
@@ -185,7 +157,6 @@ async def oauth_callback(request: Request):
         except mysql.connector.Error as err:
             raise HTTPException(400, f"Database error: {err}")
         finally:
-            cursor.close()
             conn.close()
             
     except Exception as e:
@@ -1,22 +1,27 @@
 from fastapi import APIRouter, HTTPException
 from models.order_details import OrderDetailCreate
 from db import get_db
+from services.broker import publish_stock
+import queries
 import mysql.connector
 
 router = APIRouter(prefix="/order-details", tags=["Order Details"])
 
+INSERT_ORDER_DETAIL = queries.register("order_details.insert", """
+            INSERT INTO Order_Details (OrderID, PID, Order_Qty, SellerEmail)
+            VALUES (%s, %s, %s, %s)
+        """)
+
 @router.post("/add")
 def add_order_detail(od: OrderDetailCreate):
     conn = get_db()
-    cursor = conn.cursor()
 
     try:
-        cursor.execute("""
-            INSERT INTO Order_Details (OrderID, PID, Order_Qty)
-            VALUES (%s, %s, %s)
-        """, (od.OrderID, od.PID, od.Order_Qty))
+        queries.execute(conn, INSERT_ORDER_DETAIL, (od.OrderID, od.PID, od.Order_Qty, od.SellerEmail))
 
         conn.commit()
+        # trg_reduce_stock lowered the listing stock
+        publish_stock(conn, [od.PID])
         return {"message": "Order item added"}
 
     except mysql.connector.Error as err:
@@ -26,9 +31,10 @@ def add_order_detail(od: OrderDetailCreate):
             raise HTTPException(400, "Insufficient stock for this product. Please check availability.")
         elif "Product not found in seller List" in error_msg:
             raise HTTPException(400, "Product is not available from any seller.")
+        elif "Seller does not list this product" in error_msg:
+            raise HTTPException(400, "This seller does not sell this product.")
         else:
             raise HTTPException(400, error_msg)
 
     finally:
-        cursor.close()
         conn.close()
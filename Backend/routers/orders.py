@@ -1,20 +1,24 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query
 from models.orders import OrderCreate
-from db import get_db
+from db import get_db, fetch_dicts, fetch_dict
+from responses import FastJSONResponse
+from services.fieldsets import parse_fields, select_list
+import queries
 import mysql.connector
 
 router = APIRouter(prefix="/orders", tags=["Orders"])
 
+INSERT_ORDER = queries.register("orders.insert", """
+            INSERT INTO Orders (OrderDate, EmailID)
+            VALUES (%s, %s)
+        """)
+
 @router.post("/create")
 def create_order(order: OrderCreate):
     conn = get_db()
-    cursor = conn.cursor()
 
     try:
-        cursor.execute("""
-            INSERT INTO Orders (OrderDate, EmailID)
-            VALUES (%s, %s)
-        """, (order.OrderDate, order.EmailID))
+        cursor = queries.execute(conn, INSERT_ORDER, (order.OrderDate, order.EmailID))
 
         conn.commit()
         return {"message": "Order created", "OrderID": cursor.lastrowid}
@@ -23,83 +27,100 @@ def create_order(order: OrderCreate):
         raise HTTPException(400, str(err))
 
     finally:
-        cursor.close()
         conn.close()
 
-@router.get("/user/{email_id}")
-def get_user_orders(email_id: str):
-    """Get all orders for a specific user with order details"""
-    conn = get_db()
-    cursor = conn.cursor(dictionary=True)
+# Order line fields GET /orders/user/{email_id} can return (?fields=...) and the SQL behind each one
+ORDER_ITEM_FIELDS = {
+    "PID": "od.PID",
+    "Order_Qty": "od.Order_Qty",
+    "SellerEmail": "od.SellerEmail",
+    "ProductName": "p.ProductName",
+    "Description": "p.Description",
+    "Price": "p.Price",
+}
+
+def order_items_query(selected):
+    """Order line query for the selected ORDER_ITEM_FIELDS"""
+    return f"""
+                SELECT {select_list(selected, ORDER_ITEM_FIELDS)}
+                FROM Order_Details od
+                INNER JOIN Products p ON od.PID = p.PID
+                WHERE od.OrderID = %s
+            """
 
-    try:
-        # Get all orders for the user
-        cursor.execute("""
+USER_ORDERS = queries.register("orders.user", """
             SELECT OrderID, OrderDate, EmailID
             FROM Orders
             WHERE EmailID = %s
             ORDER BY OrderDate DESC, OrderID DESC
-        """, (email_id,))
-        orders = cursor.fetchall()
+        """)
+
+GET_ORDER = queries.register("orders.get", """
+            SELECT OrderID, OrderDate, EmailID
+            FROM Orders
+            WHERE OrderID = %s
+        """)
+
+ORDER_ITEMS = queries.register("orders.items", order_items_query(list(ORDER_ITEM_FIELDS)))
+
+@router.get("/user/{email_id}")
+def get_user_orders(email_id: str, fields: str = Query(None)):
+    """Get all orders for a specific user with order details.
+    `fields` limits the columns of each order line, e.g. PID,ProductName,Order_Qty
+    """
+    requested = parse_fields(fields, ORDER_ITEM_FIELDS)
+    # Price and quantity are always needed for the order total
+    selected = list(dict.fromkeys(requested + ["Order_Qty", "Price"]))
+    items_query = order_items_query(selected)
+
+    conn = get_db()
+
+    try:
+        # Get all orders for the user
+        orders = fetch_dicts(queries.execute(conn, USER_ORDERS, (email_id,)))
 
         # Get order details for each order
         for order in orders:
-            cursor.execute("""
-                SELECT od.PID, od.Order_Qty, p.ProductName, p.Description, p.Price
-                FROM Order_Details od
-                INNER JOIN Products p ON od.PID = p.PID
-                WHERE od.OrderID = %s
-            """, (order["OrderID"],))
-            order_items = cursor.fetchall()
+            order_items = fetch_dicts(queries.execute(conn, ORDER_ITEMS, (order["OrderID"],), sql=items_query))
             
             # Calculate total for each order
             total = sum(item["Price"] * item["Order_Qty"] for item in order_items)
+            if len(selected) != len(requested):
+                for item in order_items:
+                    for name in selected[len(requested):]:
+                        del item[name]
             order["Items"] = order_items
             order["Total"] = total
 
-        return orders
+        return FastJSONResponse(orders)
 
     except mysql.connector.Error as err:
         raise HTTPException(400, str(err))
     finally:
-        cursor.close()
         conn.close()
 
 @router.get("/{order_id}")
 def get_order(order_id: int):
     """Get a specific order with details"""
     conn = get_db()
-    cursor = conn.cursor(dictionary=True)
 
     try:
-        cursor.execute("""
-            SELECT OrderID, OrderDate, EmailID
-            FROM Orders
-            WHERE OrderID = %s
-        """, (order_id,))
-        order = cursor.fetchone()
+        order = fetch_dict(queries.execute(conn, GET_ORDER, (order_id,)))
 
         if not order:
             raise HTTPException(404, "Order not found")
 
-        cursor.execute("""
-            SELECT od.PID, od.Order_Qty, p.ProductName, p.Description, p.Price
-            FROM Order_Details od
-            INNER JOIN Products p ON od.PID = p.PID
-            WHERE od.OrderID = %s
-        """, (order_id,))
-        order_items = cursor.fetchall()
+        order_items = fetch_dicts(queries.execute(conn, ORDER_ITEMS, (order_id,)))
         
         total = sum(item["Price"] * item["Order_Qty"] for item in order_items)
         order["Items"] = order_items
         order["Total"] = total
 
-        return order
+        return FastJSONResponse(order)
 
     except HTTPException:
         raise
     except mysql.connector.Error as err:
         raise HTTPException(400, str(err))
     finally:
-        cursor.close()
-        conn.close()
\ No newline at end of file
+        conn.close()
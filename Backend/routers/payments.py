@@ -1,13 +1,16 @@
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel, EmailStr
-from db import get_db
+from db import get_db, fetch_dict
+from services.metrics import EMAIL_SEND
 import mysql.connector
+import queries
 import random
 import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from datetime import datetime, timedelta
 import os
+import time
 
 router = APIRouter(prefix="/payments", tags=["Payments"])
 
@@ -41,6 +44,7 @@ def generate_otp():
 
 def send_email(to_email: str, subject: str, body: str):
     """Send email using SMTP"""
+    started = time.perf_counter()
     try:
         # Check if email credentials are configured
         if EMAIL_USER == "your-email@gmail.com" or EMAIL_PASSWORD == "your-app-password":
@@ -53,6 +57,7 @@ def send_email(to_email: str, subject: str, body: str):
             print(f"BODY:\n{body}")
             print(f"{'='*60}\n")
             print("⚠️  To enable actual email sending, configure EMAIL_USER and EMAIL_PASSWORD in .env")
+            EMAIL_SEND.observe(time.perf_counter() - started, "demo")
             return True
         
         # Actual email sending
@@ -69,10 +74,12 @@ def send_email(to_email: str, subject: str, body: str):
         server.quit()
         
         print(f"✅ Email sent successfully to {to_email}")
+        EMAIL_SEND.observe(time.perf_counter() - started, "sent")
         return True
         
     except Exception as e:
         print(f"❌ Email sending error: {e}")
+        EMAIL_SEND.observe(time.perf_counter() - started, "failed")
         # In demo mode, still return True so flow continues
         # In production, you might want to raise an exception or log to monitoring service
         if EMAIL_USER == "your-email@gmail.com" or EMAIL_PASSWORD == "your-app-password":
@@ -82,32 +89,31 @@ def send_email(to_email: str, subject: str, body: str):
         # raise HTTPException(500, f"Failed to send email: {str(e)}")
         return False
 
+USER_NAME = queries.register("payments.user_name", "SELECT FirstName, LastName FROM Users WHERE EmailID = %s")
+
 def get_user_name(email_id: str):
     """Get user's full name from database"""
     conn = get_db()
-    cursor = conn.cursor(dictionary=True)
     try:
-        cursor.execute("SELECT FirstName, LastName FROM Users WHERE EmailID = %s", (email_id,))
-        user = cursor.fetchone()
+        user = fetch_dict(queries.execute(conn, USER_NAME, (email_id,)))
         if user:
             return f"{user['FirstName']} {user['LastName']}"
         return "Customer"
     except:
         return "Customer"
     finally:
-        cursor.close()
         conn.close()
 
+ORDER_OWNER = queries.register("payments.order_owner", "SELECT OrderID, EmailID FROM Orders WHERE OrderID = %s")
+
 @router.post("/initiate")
 def initiate_payment(payment: PaymentInitiate):
     """Initiate payment and send OTP to user's registered email"""
     conn = get_db()
-    cursor = conn.cursor(dictionary=True)
     
     try:
         # Verify order exists and get registered email
-        cursor.execute("SELECT OrderID, EmailID FROM Orders WHERE OrderID = %s", (payment.OrderID,))
-        order = cursor.fetchone()
+        order = fetch_dict(queries.execute(conn, ORDER_OWNER, (payment.OrderID,)))
         
         if not order:
             raise HTTPException(404, "Order not found")
@@ -167,14 +173,29 @@ def initiate_payment(payment: PaymentInitiate):
     except Exception as e:
         raise HTTPException(400, f"Failed to initiate payment: {str(e)}")
     finally:
-        cursor.close()
         conn.close()
 
+ORDER_SUMMARY = queries.register("payments.order_summary", """
+            SELECT o.OrderID, o.OrderDate, o.EmailID,
+                   SUM(od.Order_Qty * p.Price) as Total
+            FROM Orders o
+            INNER JOIN Order_Details od ON o.OrderID = od.OrderID
+            INNER JOIN Products p ON od.PID = p.PID
+            WHERE o.OrderID = %s
+            GROUP BY o.OrderID, o.OrderDate, o.EmailID
+        """)
+
+ORDER_LINES = queries.register("payments.order_lines", """
+            SELECT p.ProductName, od.Order_Qty, p.Price
+            FROM Order_Details od
+            INNER JOIN Products p ON od.PID = p.PID
+            WHERE od.OrderID = %s
+        """)
+
 @router.post("/verify")
 def verify_payment(otp_data: OTPVerify):
     """Verify OTP and process payment"""
     conn = get_db()
-    cursor = conn.cursor()
     
     try:
         # Check if OTP exists
@@ -200,24 +221,9 @@ def verify_payment(otp_data: OTPVerify):
         # In real implementation, integrate with payment gateway
         
         # Get order details for confirmation email
-        cursor.execute("""
-            SELECT o.OrderID, o.OrderDate, o.EmailID,
-                   SUM(od.Order_Qty * p.Price) as Total
-            FROM Orders o
-            INNER JOIN Order_Details od ON o.OrderID = od.OrderID
-            INNER JOIN Products p ON od.PID = p.PID
-            WHERE o.OrderID = %s
-            GROUP BY o.OrderID, o.OrderDate, o.EmailID
-        """, (otp_data.OrderID,))
-        order = cursor.fetchone()
+        order = queries.execute(conn, ORDER_SUMMARY, (otp_data.OrderID,)).fetchall()[0]
         
-        cursor.execute("""
-            SELECT p.ProductName, od.Order_Qty, p.Price
-            FROM Order_Details od
-            INNER JOIN Products p ON od.PID = p.PID
-            WHERE od.OrderID = %s
-        """, (otp_data.OrderID,))
-        order_items = cursor.fetchall()
+        order_items = queries.execute(conn, ORDER_LINES, (otp_data.OrderID,)).fetchall()
         
         # Get user name
         user_name = get_user_name(otp_data.EmailID)
@@ -319,9 +325,15 @@ def verify_payment(otp_data: OTPVerify):
     except Exception as e:
         raise HTTPException(400, f"Payment verification failed: {str(e)}")
     finally:
-        cursor.close()
         conn.close()
 
+ORDER_TOTAL = queries.register("payments.order_total", """
+            SELECT SUM(od.Order_Qty * p.Price) as Total
+            FROM Order_Details od
+            INNER JOIN Products p ON od.PID = p.PID
+            WHERE od.OrderID = %s
+        """)
+
 @router.post("/resend-otp")
 def resend_otp(request: ResendOTPRequest):
     """Resend OTP to user's email"""
@@ -329,12 +341,10 @@ def resend_otp(request: ResendOTPRequest):
     order_id = request.order_id
     
     conn = get_db()
-    cursor = conn.cursor(dictionary=True)
     
     try:
         # Verify order exists
-        cursor.execute("SELECT OrderID, EmailID FROM Orders WHERE OrderID = %s", (order_id,))
-        order = cursor.fetchone()
+        order = fetch_dict(queries.execute(conn, ORDER_OWNER, (order_id,)))
         
         if not order:
             raise HTTPException(404, "Order not found")
@@ -347,13 +357,7 @@ def resend_otp(request: ResendOTPRequest):
             raise HTTPException(403, "Order does not belong to this user")
         
         # Get order total
-        cursor.execute("""
-            SELECT SUM(od.Order_Qty * p.Price) as Total
-            FROM Order_Details od
-            INNER JOIN Products p ON od.PID = p.PID
-            WHERE od.OrderID = %s
-        """, (order_id,))
-        result = cursor.fetchone()
+        result = fetch_dict(queries.execute(conn, ORDER_TOTAL, (order_id,)))
         amount = float(result["Total"]) if result["Total"] else 0.0
         
         # Generate new OTP
@@ -404,6 +408,5 @@ def resend_otp(request: ResendOTPRequest):
     except Exception as e:
         raise HTTPException(400, f"Failed to resend OTP: {str(e)}")
     finally:
-        cursor.close()
         conn.close()
 
@@ -1,20 +1,22 @@
 from fastapi import APIRouter, HTTPException
 from models.product_category import ProductCategoryCreate
 from db import get_db
+import queries
 import mysql.connector
 
 router = APIRouter(prefix="/product-category", tags=["Product Category"])
 
+ASSIGN_CATEGORY = queries.register("product_category.insert", """
+            INSERT INTO Product_Category (PID, CategoryID)
+            VALUES (%s, %s)
+        """)
+
 @router.post("/assign")
 def assign_category(item: ProductCategoryCreate):
     conn = get_db()
-    cursor = conn.cursor()
 
     try:
-        cursor.execute("""
-            INSERT INTO Product_Category (PID, CategoryID)
-            VALUES (%s, %s)
-        """, (item.PID, item.CategoryID))
+        queries.execute(conn, ASSIGN_CATEGORY, (item.PID, item.CategoryID))
 
         conn.commit()
         return {"message": "Category assigned to product"}
@@ -23,5 +25,4 @@ def assign_category(item: ProductCategoryCreate):
         raise HTTPException(400, str(err))
 
     finally:
-        cursor.close()
         conn.close()
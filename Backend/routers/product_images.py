@@ -1,10 +1,11 @@
-from fastapi import APIRouter, HTTPException, UploadFile, File
+from fastapi import APIRouter, HTTPException, UploadFile, File, Response
 from fastapi.responses import FileResponse
-from models.product_images import ProductImageCreate, ProductImageOut
-from db import get_db
+from fastapi.concurrency import run_in_threadpool
+from models.product_images import ProductImageCreate, ProductImageOut, ProductImageBulkCreate, ProductImageReorder
+from db import get_db, fetch_dict, fetch_dicts
+import queries
+from services import image_store, image_variants
 import mysql.connector
-import uuid
-import shutil
 from pathlib import Path
 
 router = APIRouter(prefix="/product-images", tags=["Product Images"])
@@ -21,60 +22,73 @@ async def upload_product_image(file: UploadFile = File(...)):
         if not file.content_type or not file.content_type.startswith('image/'):
             raise HTTPException(400, "File must be an image")
         
-        # Validate file size (max 5MB)
-        file.file.seek(0, 2)  # Seek to end
-        file_size = file.file.tell()
-        file.file.seek(0)  # Reset to start
-        
-        if file_size > 5 * 1024 * 1024:  # 5MB
-            raise HTTPException(400, "Image size must be less than 5MB")
-        
-        # Generate unique filename
-        file_extension = Path(file.filename).suffix
-        unique_filename = f"{uuid.uuid4()}{file_extension}"
-        file_path = UPLOAD_DIR / unique_filename
-        
-        # Save file
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-        
+        # Save under the content hash (max 5MB); identical files are stored once
+        image_url, created = await run_in_threadpool(image_store.save_upload, file.file, file.filename)
+        if created:
+            image_variants.enqueue(image_url)
+
         # Return relative path for storage in database
-        image_url = f"uploads/products/{unique_filename}"
         return {"image_url": image_url, "message": "Image uploaded successfully"}
     
+    except image_store.ImageTooLargeError as e:
+        raise HTTPException(400, str(e))
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(400, f"Failed to upload image: {str(e)}")
 
+@router.api_route("/blobs/{content_hash}", methods=["GET", "HEAD"])
+def lookup_image_blob(content_hash: str, response: Response):
+    """Check whether an image with this SHA-256 is already stored, so clients can skip the upload"""
+    content_hash = content_hash.lower()
+    if not image_store.is_content_hash(content_hash):
+        raise HTTPException(400, "Content hash must be a hex SHA-256 digest")
+
+    try:
+        blob = image_store.find_blob(content_hash)
+    except mysql.connector.Error as err:
+        raise HTTPException(400, str(err))
+
+    if not blob:
+        raise HTTPException(404, "Image not found")
+
+    response.headers["X-Image-URL"] = blob["ImageURL"]
+    return {"image_url": blob["ImageURL"], "bytes": blob["Bytes"]}
+
+PRODUCT_EXISTS = queries.register("product_images.product_exists", "SELECT PID FROM Products WHERE PID = %s")
+
+NEXT_ORDER = queries.register("product_images.next_order", """
+            SELECT COALESCE(MAX(DisplayOrder), -1) + 1 as next_order
+            FROM Product_Images
+            WHERE PID = %s
+        """)
+
+INSERT_IMAGE = queries.register("product_images.insert", """
+            INSERT INTO Product_Images (PID, ImageURL, DisplayOrder)
+            VALUES (%s, %s, %s)
+        """)
+
 @router.post("/add")
 def add_product_image(image_data: ProductImageCreate):
     """Add an image to a product"""
     conn = get_db()
-    cursor = conn.cursor()
 
     try:
         # Verify product exists
-        cursor.execute("SELECT PID FROM Products WHERE PID = %s", (image_data.PID,))
-        if not cursor.fetchone():
+        if not queries.execute(conn, PRODUCT_EXISTS, (image_data.PID,)).fetchall():
             raise HTTPException(404, "Product not found")
 
         # Get max display order for this product
-        cursor.execute("""
-            SELECT COALESCE(MAX(DisplayOrder), -1) + 1 as next_order
-            FROM Product_Images
-            WHERE PID = %s
-        """, (image_data.PID,))
-        result = cursor.fetchone()
-        display_order = result[0] if result else 0
+        rows = queries.execute(conn, NEXT_ORDER, (image_data.PID,)).fetchall()
+        display_order = rows[0][0] if rows else 0
 
-        cursor.execute("""
-            INSERT INTO Product_Images (PID, ImageURL, DisplayOrder)
-            VALUES (%s, %s, %s)
-        """, (image_data.PID, image_data.ImageURL, display_order))
+        image_id = queries.execute(conn, INSERT_IMAGE, (image_data.PID, image_data.ImageURL, display_order)).lastrowid
+
+        if image_store.acquire(conn, [image_data.ImageURL]):
+            conn.rollback()
+            raise HTTPException(404, "Image file no longer exists. Please upload it again.")
 
         conn.commit()
-        image_id = cursor.lastrowid
         return {"message": "Image added", "ImageID": image_id}
 
     except HTTPException:
@@ -82,62 +96,62 @@ def add_product_image(image_data: ProductImageCreate):
     except mysql.connector.Error as err:
         raise HTTPException(400, str(err))
     finally:
-        cursor.close()
         conn.close()
 
+PRODUCT_IMAGES = queries.register("product_images.product", """
+            SELECT ImageID, PID, ImageURL, DisplayOrder
+            FROM Product_Images
+            WHERE PID = %s
+            ORDER BY DisplayOrder, ImageID
+        """)
+
 @router.get("/product/{pid}")
 def get_product_images(pid: str):
     """Get all images for a product"""
-    conn = get_db()
-    cursor = conn.cursor(dictionary=True)
+    conn = get_db(read_only=True)
 
     try:
-        cursor.execute("""
-            SELECT ImageID, PID, ImageURL, DisplayOrder
-            FROM Product_Images
-            WHERE PID = %s
-            ORDER BY DisplayOrder, ImageID
-        """, (pid,))
-        results = cursor.fetchall()
+        results = fetch_dicts(queries.execute(conn, PRODUCT_IMAGES, (pid,)))
+        image_variants.attach_variants(conn, results)
         return results
     except mysql.connector.Error as err:
         raise HTTPException(400, str(err))
     finally:
-        cursor.close()
         conn.close()
 
+IMAGE_URL = queries.register("product_images.url", """
+            SELECT ImageURL FROM Product_Images WHERE ImageID = %s
+        """)
+
+DELETE_IMAGE = queries.register("product_images.delete", "DELETE FROM Product_Images WHERE ImageID = %s")
+
 @router.delete("/{image_id}")
 def delete_product_image(image_id: int):
     """Delete a product image"""
     conn = get_db()
-    cursor = conn.cursor(dictionary=True)
 
     try:
         # Get image info before deletion
-        cursor.execute("""
-            SELECT ImageURL FROM Product_Images WHERE ImageID = %s
-        """, (image_id,))
-        image = cursor.fetchone()
+        image = fetch_dict(queries.execute(conn, IMAGE_URL, (image_id,)))
 
         if not image:
             raise HTTPException(404, "Image not found")
 
         # Delete from database
-        cursor.execute("DELETE FROM Product_Images WHERE ImageID = %s", (image_id,))
+        cursor = queries.execute(conn, DELETE_IMAGE, (image_id,))
         
         if cursor.rowcount == 0:
             raise HTTPException(404, "Image not found")
 
+        # Other listings may share the same file; only remove it with the last reference
+        unused_files = []
+        if image_store.release(conn, image["ImageURL"]):
+            unused_files = [image["ImageURL"]] + image_variants.discard(conn, image["ImageURL"])
+
         conn.commit()
 
-        # Delete file from filesystem
-        try:
-            image_path = Path(image["ImageURL"])
-            if image_path.exists():
-                image_path.unlink()
-        except Exception as e:
-            # Log error but don't fail the request
-            print(f"Failed to delete image file: {e}")
+        # Delete files from filesystem
+        image_store.remove_files(unused_files)
 
         return {"message": "Image deleted successfully"}
 
@@ -146,31 +160,98 @@ def delete_product_image(image_id: int):
     except mysql.connector.Error as err:
         raise HTTPException(400, str(err))
     finally:
-        cursor.close()
         conn.close()
 
+PRODUCT_NEXT_ORDER = queries.register("product_images.product_next_order", """
+            SELECT COALESCE(MAX(pi.DisplayOrder), -1) + 1 as next_order
+            FROM Products p
+            LEFT JOIN Product_Images pi ON pi.PID = p.PID
+            WHERE p.PID = %s
+            GROUP BY p.PID
+        """)
+
+@router.post("/bulk-add")
+def bulk_add_product_images(bulk: ProductImageBulkCreate):
+    """Attach several images to a product in one transaction, appended in the given order"""
+    conn = get_db()
+
+    try:
+        # Verify product exists and get the next display order in one query
+        rows = queries.execute(conn, PRODUCT_NEXT_ORDER, (bulk.PID,)).fetchall()
+        if not rows:
+            raise HTTPException(404, "Product not found")
+        next_order = rows[0][0]
+
+        # Sent as a single multi-row INSERT
+        first_id = queries.execute_many(conn, INSERT_IMAGE,
+                                        [(bulk.PID, url, next_order + i) for i, url in enumerate(bulk.ImageURLs)]).lastrowid
+
+        missing = image_store.acquire(conn, bulk.ImageURLs)
+        if missing:
+            conn.rollback()
+            raise HTTPException(404, f"Image files no longer exist, please upload again: {', '.join(missing)}")
+
+        conn.commit()
+        # A multi-row INSERT allocates consecutive auto-increment IDs
+        image_ids = list(range(first_id, first_id + len(bulk.ImageURLs)))
+        return {"message": f"{len(image_ids)} images added", "ImageIDs": image_ids}
+
+    except HTTPException:
+        raise
+    except mysql.connector.Error as err:
+        conn.rollback()
+        raise HTTPException(400, str(err))
+    finally:
+        conn.close()
+
+# IN list and CASE arms follow the number of images; registered with a single
+# image and run unprepared
+def count_images_query(count: int):
+    markers = ", ".join(["%s"] * count)
+    return f"""
+            SELECT COUNT(*) FROM Product_Images
+            WHERE PID = %s AND ImageID IN ({markers})
+        """
+
+def reorder_query(count: int):
+    markers = ", ".join(["%s"] * count)
+    cases = " ".join(["WHEN %s THEN %s"] * count)
+    return f"""
+            UPDATE Product_Images
+            SET DisplayOrder = CASE ImageID {cases} END
+            WHERE PID = %s AND ImageID IN ({markers})
+        """
+
+COUNT_IMAGES = queries.register("product_images.count_owned", count_images_query(1))
+REORDER_IMAGES = queries.register("product_images.reorder", reorder_query(1))
+
 @router.put("/reorder")
-def reorder_images(pid: str, image_orders: list):
-    """Reorder product images
-    Expects: [{"ImageID": 1, "DisplayOrder": 0}, ...]
+def reorder_images(reorder: ProductImageReorder):
+    """Reorder product images with a single UPDATE
+    Expects: {"PID": "...", "Images": [{"ImageID": 1, "DisplayOrder": 0}, ...]}
     """
     conn = get_db()
-    cursor = conn.cursor()
 
     try:
-        for item in image_orders:
-            cursor.execute("""
-                UPDATE Product_Images
-                SET DisplayOrder = %s
-                WHERE ImageID = %s AND PID = %s
-            """, (item["DisplayOrder"], item["ImageID"], pid))
+        image_ids = [item.ImageID for item in reorder.Images]
+
+        rows = queries.execute(conn, COUNT_IMAGES, [reorder.PID] + image_ids,
+                               sql=count_images_query(len(image_ids)), prepared=False).fetchall()
+        if rows[0][0] != len(image_ids):
+            raise HTTPException(404, "One or more images do not belong to this product")
+
+        queries.execute(conn, REORDER_IMAGES,
+                        [value for item in reorder.Images for value in (item.ImageID, item.DisplayOrder)]
+                        + [reorder.PID] + image_ids,
+                        sql=reorder_query(len(image_ids)), prepared=False)
 
         conn.commit()
         return {"message": "Images reordered successfully"}
 
+    except HTTPException:
+        raise
     except mysql.connector.Error as err:
+        conn.rollback()
         raise HTTPException(400, str(err))
     finally:
-        cursor.close()
         conn.close()
-
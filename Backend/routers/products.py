@@ -1,12 +1,15 @@
-from fastapi import APIRouter, HTTPException, UploadFile, File, Form, Query
-from fastapi.responses import FileResponse
-from models.products import ProductCreate
-from db import get_db
+from fastapi import APIRouter, HTTPException, UploadFile, File, Form, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from models.products import ProductCreate, PriceUpdate
+from db import get_db, fetch_dicts, fetch_dict
+from responses import FastJSONResponse
+import queries
+from services import image_store, image_variants, ids, catalog_import
+from services.image_serving import image_response
+from services.fieldsets import parse_fields, select_list
+from services.broker import broker
 import mysql.connector
-import uuid
-import time
 import os
-import shutil
 from pathlib import Path
 
 router = APIRouter(prefix="/products", tags=["Products"])
@@ -15,39 +18,20 @@ router = APIRouter(prefix="/products", tags=["Products"])
 UPLOAD_DIR = Path("uploads/products")
 UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
 
-def generate_product_id():
-    """Generate a unique product ID"""
-    # Format: PROD + timestamp + short UUID
-    timestamp = int(time.time() * 1000)  # milliseconds
-    short_uuid = str(uuid.uuid4())[:8].upper()
-    return f"PROD{timestamp}{short_uuid}"
+INSERT_PRODUCT = queries.register("products.insert", """
+            INSERT INTO Products (PID, ProductName, Description, Price)
+            VALUES (%s, %s, %s, %s)
+        """)
 
 @router.post("/add")
 def add_product(product: ProductCreate):
     """Add a product to the Products table. Product ID is auto-generated if not provided."""
+    # Generated IDs are unique by construction (services/ids.py), so no lookup before inserting
+    pid = product.PID if product.PID else ids.new_product_id()
     conn = get_db()
-    cursor = conn.cursor()
 
     try:
-        # Generate PID if not provided
-        pid = product.PID if product.PID else generate_product_id()
-        
-        # Ensure PID is unique
-        max_attempts = 5
-        for attempt in range(max_attempts):
-            cursor.execute("SELECT PID FROM Products WHERE PID = %s", (pid,))
-            if cursor.fetchone():
-                if attempt < max_attempts - 1:
-                    pid = generate_product_id()
-                else:
-                    raise HTTPException(400, "Failed to generate unique product ID")
-            else:
-                break
-
-        cursor.execute("""
-            INSERT INTO Products (PID, ProductName, Description, Price)
-            VALUES (%s, %s, %s, %s)
-        """, (pid, product.ProductName, product.Description, product.Price))
+        queries.execute(conn, INSERT_PRODUCT, (pid, product.ProductName, product.Description, product.Price))
 
         conn.commit()
         return {"message": "Product added", "PID": pid}
@@ -59,127 +43,205 @@ def add_product(product: ProductCreate):
         raise HTTPException(400, str(err))
 
     finally:
-        cursor.close()
         conn.close()
 
 
+@router.post("/import")
+async def import_catalog(
+    file: UploadFile = File(...),
+    seller_email: str = Query(None),  # seller for rows without an EmailID
+    format: str = Query(None),  # csv or ndjson; taken from the file extension when omitted
+    chunk_size: int = Query(catalog_import.CHUNK_SIZE, ge=1, le=5000)
+):
+    """Bulk-import products with their listing, categories and images from CSV or NDJSON.
+    Returns counts and a per-row error report; valid rows are imported even when others fail.
+    """
+    fmt = (format or Path(file.filename or "").suffix.lstrip(".")).lower()
+    if fmt == "jsonl":
+        fmt = "ndjson"
+    if fmt not in ("csv", "ndjson"):
+        raise HTTPException(400, "Format must be csv or ndjson")
+
+    try:
+        return await run_in_threadpool(catalog_import.import_stream, file.file, fmt, seller_email, chunk_size)
+    except mysql.connector.Error as err:
+        raise HTTPException(400, str(err))
+    except UnicodeDecodeError:
+        raise HTTPException(400, "File must be UTF-8 encoded")
+
+
+# Fields GET /products/ can return (?fields=...) and the SQL behind each one
+PRODUCT_LIST_FIELDS = {
+    "PID": "p.PID",
+    "ProductName": "p.ProductName",
+    "Description": "p.Description",
+    "Price": "p.Price",
+    "TotalStock": "COALESCE(SUM(l.Stock), 0)",
+    "SellerCount": "COUNT(DISTINCT l.EmailID)",
+    "PrimaryImage": """(SELECT ImageURL FROM Product_Images 
+                    WHERE PID = p.PID 
+                    ORDER BY DisplayOrder, ImageID 
+                    LIMIT 1)""",
+    # Ratings come from the trigger-maintained summary, one primary-key lookup per product
+    "AvgRating": "(SELECT RatingSum / NULLIF(ReviewCount, 0) FROM Product_Rating_Summary WHERE PID = p.PID)",
+    "ReviewCount": "COALESCE((SELECT ReviewCount FROM Product_Rating_Summary WHERE PID = p.PID), 0)",
+}
+
+# Fields that need the Lists join and GROUP BY
+LISTING_AGGREGATES = {"TotalStock", "SellerCount"}
+
+def build_product_list_query(requested, category_id=None, search=None,
+                             min_price=None, max_price=None, sort_by="name"):
+    """SQL and parameters for GET /products/"""
+    needs_lists = not LISTING_AGGREGATES.isdisjoint(requested)
+
+    # Build query with only the requested columns
+    query = f"""
+            SELECT {select_list(requested, PRODUCT_LIST_FIELDS)}
+            FROM Products p
+        """
+    if needs_lists:
+        query += """
+            LEFT JOIN Lists l ON p.PID = l.PID
+            """
+    
+    conditions = []
+    params = []
+    
+    # Category filter
+    if category_id:
+        query += """
+                INNER JOIN Product_Category pc ON p.PID = pc.PID
+            """
+        conditions.append("pc.CategoryID = %s")
+        params.append(category_id)
+    
+    # Search filter
+    if search:
+        conditions.append("(p.ProductName LIKE %s OR p.Description LIKE %s)")
+        search_param = f"%{search}%"
+        params.extend([search_param, search_param])
+    
+    # Price filters
+    if min_price is not None:
+        conditions.append("p.Price >= %s")
+        params.append(min_price)
+    if max_price is not None:
+        conditions.append("p.Price <= %s")
+        params.append(max_price)
+    
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    
+    if needs_lists:
+        # The other Products columns depend on the primary key, so grouping by
+        # it alone is valid and avoids sorting the TEXT Description
+        query += " GROUP BY p.PID"
+    
+    # Sorting
+    if sort_by == "price_asc":
+        query += " ORDER BY p.Price ASC"
+    elif sort_by == "price_desc":
+        query += " ORDER BY p.Price DESC"
+    elif sort_by == "newest":
+        query += " ORDER BY p.PID DESC"  # Generated PIDs are time-ordered, so this walks the primary key
+    else:  # name
+        query += " ORDER BY p.ProductName ASC"
+
+    return query, params
+
+# Default variant (all fields, no filters); other combinations are prepared on demand
+LIST_PRODUCTS = queries.register("products.list", build_product_list_query(list(PRODUCT_LIST_FIELDS))[0])
+
 @router.get("/")
 def get_all_products(
     category_id: int = Query(None),
     min_price: float = Query(None),
     max_price: float = Query(None),
     sort_by: str = Query("name"),  # name, price_asc, price_desc, newest
-    search: str = Query(None)
+    search: str = Query(None),
+    fields: str = Query(None)  # e.g. PID,ProductName,Price,PrimaryImage for grid views
 ):
     """Get all products with available stock information, filtering and sorting"""
-    conn = get_db()
-    cursor = conn.cursor(dictionary=True)
+    requested = parse_fields(fields, PRODUCT_LIST_FIELDS)
+    query, params = build_product_list_query(requested, category_id, search, min_price, max_price, sort_by)
+
+    conn = get_db(read_only=True)
 
     try:
-        # Build query with filters
-        query = """
-            SELECT p.PID, p.ProductName, p.Description, p.Price,
-                   COALESCE(SUM(l.Stock), 0) as TotalStock,
-                   COUNT(DISTINCT l.EmailID) as SellerCount,
-                   (SELECT ImageURL FROM Product_Images 
-                    WHERE PID = p.PID 
-                    ORDER BY DisplayOrder, ImageID 
-                    LIMIT 1) as PrimaryImage,
-                   (SELECT AVG(Rating) FROM FeedBacks WHERE PID = p.PID) as AvgRating,
-                   (SELECT COUNT(*) FROM FeedBacks WHERE PID = p.PID) as ReviewCount
-            FROM Products p
-            LEFT JOIN Lists l ON p.PID = l.PID
-        """
-        
-        conditions = []
-        params = []
-        
-        # Category filter
-        if category_id:
-            query += """
-                INNER JOIN Product_Category pc ON p.PID = pc.PID
-            """
-            conditions.append("pc.CategoryID = %s")
-            params.append(category_id)
-        
-        # Search filter
-        if search:
-            conditions.append("(p.ProductName LIKE %s OR p.Description LIKE %s)")
-            search_param = f"%{search}%"
-            params.extend([search_param, search_param])
-        
-        # Price filters
-        if min_price is not None:
-            conditions.append("p.Price >= %s")
-            params.append(min_price)
-        if max_price is not None:
-            conditions.append("p.Price <= %s")
-            params.append(max_price)
-        
-        if conditions:
-            query += " WHERE " + " AND ".join(conditions)
-        
-        query += " GROUP BY p.PID, p.ProductName, p.Description, p.Price"
-        
-        # Sorting
-        if sort_by == "price_asc":
-            query += " ORDER BY p.Price ASC"
-        elif sort_by == "price_desc":
-            query += " ORDER BY p.Price DESC"
-        elif sort_by == "newest":
-            query += " ORDER BY p.PID DESC"  # Assuming newer products have higher IDs
-        else:  # name
-            query += " ORDER BY p.ProductName ASC"
-        
-        cursor.execute(query, params)
-        results = cursor.fetchall()
-        return results
+        results = fetch_dicts(queries.execute(conn, LIST_PRODUCTS, params, sql=query))
+        if "PrimaryImage" in requested:
+            image_variants.attach_variants(conn, results, url_key="PrimaryImage", prefix="PrimaryImage")
+        return FastJSONResponse(results)
     except mysql.connector.Error as err:
         raise HTTPException(400, str(err))
     finally:
-        cursor.close()
         conn.close()
 
 
-@router.get("/{pid}")
-def get_product(pid: str):
-    """Get product details with seller information and ratings"""
-    conn = get_db()
-    cursor = conn.cursor(dictionary=True)
-
-    try:
-        # Get product with stock and rating info
-        cursor.execute("""
+GET_PRODUCT = queries.register("products.get", """
             SELECT p.*,
                    COALESCE(SUM(l.Stock), 0) as TotalStock,
                    COUNT(DISTINCT l.EmailID) as SellerCount,
-                   (SELECT AVG(Rating) FROM FeedBacks WHERE PID = p.PID) as AvgRating,
-                   (SELECT COUNT(*) FROM FeedBacks WHERE PID = p.PID) as ReviewCount
+                   (SELECT RatingSum / NULLIF(ReviewCount, 0) FROM Product_Rating_Summary WHERE PID = p.PID) as AvgRating,
+                   COALESCE((SELECT ReviewCount FROM Product_Rating_Summary WHERE PID = p.PID), 0) as ReviewCount
             FROM Products p
             LEFT JOIN Lists l ON p.PID = l.PID
             WHERE p.PID = %s
             GROUP BY p.PID, p.ProductName, p.Description, p.Price
-        """, (pid,))
-        result = cursor.fetchone()
-
-        if not result:
-            raise HTTPException(404, "Product not found")
+        """)
 
-        # Get sellers for this product
-        cursor.execute("""
+GET_PRODUCT_SELLERS = queries.register("products.sellers", """
             SELECT l.EmailID, u.FirstName, u.LastName, l.Stock
             FROM Lists l
             INNER JOIN Users u ON l.EmailID = u.EmailID
             WHERE l.PID = %s AND l.Stock > 0
-        """, (pid,))
-        sellers = cursor.fetchall()
-        result["Sellers"] = sellers
+        """)
+
+@router.get("/{pid}")
+def get_product(pid: str):
+    """Get product details with seller information and ratings"""
+    conn = get_db(read_only=True)
+
+    try:
+        # Get product with stock and rating info
+        result = fetch_dict(queries.execute(conn, GET_PRODUCT, (pid,)))
+
+        if not result:
+            raise HTTPException(404, "Product not found")
+
+        # Get sellers for this product
+        result["Sellers"] = fetch_dicts(queries.execute(conn, GET_PRODUCT_SELLERS, (pid,)))
+
+        return FastJSONResponse(result)
+    except mysql.connector.Error as err:
+        raise HTTPException(400, str(err))
+    finally:
+        conn.close()
+
+UPDATE_PRICE = queries.register("products.update_price", """
+            UPDATE Products SET Price = %s WHERE PID = %s
+        """)
+
+@router.put("/{pid}/price")
+def update_product_price(pid: str, update: PriceUpdate):
+    """Change a product's price; live subscribers get the new price"""
+    conn = get_db()
+
+    try:
+        cursor = queries.execute(conn, UPDATE_PRICE, (update.Price, pid))
+        if cursor.rowcount == 0:
+            # Also 0 when the price is unchanged, so check the product exists
+            if not fetch_dict(queries.execute(conn, GET_PRODUCT, (pid,))):
+                raise HTTPException(404, "Product not found")
+
+        conn.commit()
+        broker.publish(pid, Price=update.Price)
+        return {"message": "Price updated", "PID": pid, "Price": update.Price}
 
-        return result
     except mysql.connector.Error as err:
         raise HTTPException(400, str(err))
     finally:
-        cursor.close()
         conn.close()
 
 @router.post("/upload-image")
@@ -190,28 +252,22 @@ async def upload_product_image(file: UploadFile = File(...)):
         if not file.content_type or not file.content_type.startswith('image/'):
             raise HTTPException(400, "File must be an image")
         
-        # Generate unique filename
-        file_extension = Path(file.filename).suffix
-        unique_filename = f"{uuid.uuid4()}{file_extension}"
-        file_path = UPLOAD_DIR / unique_filename
-        
-        # Save file
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-        
+        # Save under the content hash; identical files are stored once
+        image_url, created = await run_in_threadpool(image_store.save_upload, file.file, file.filename)
+        if created:
+            image_variants.enqueue(image_url)
+
         # Return relative path for storage in database
-        image_url = f"uploads/products/{unique_filename}"
         return {"image_url": image_url, "message": "Image uploaded successfully"}
     
+    except image_store.ImageTooLargeError as e:
+        raise HTTPException(400, str(e))
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(400, f"Failed to upload image: {str(e)}")
 
-@router.get("/images/{filename}")
-async def get_product_image(filename: str):
+@router.get("/images/{filename:path}")
+def get_product_image(filename: str, request: Request):
     """Serve product images"""
-    file_path = UPLOAD_DIR / filename
-    if not file_path.exists():
-        raise HTTPException(404, "Image not found")
-    return FileResponse(file_path)
+    return image_response(request, f"products/{filename}")
@@ -1,7 +1,8 @@
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from typing import List
-from db import get_db
+from db import get_db, fetch_dict
+import queries
 import mysql.connector
 
 router = APIRouter(prefix="/stock", tags=["Stock"])
@@ -23,21 +24,21 @@ class StockCheckItem(BaseModel):
 class StockCheckMultipleRequest(BaseModel):
     items: List[StockCheckItem]
 
+TOTAL_STOCK = queries.register("stock.total", """
+            SELECT COALESCE(SUM(Stock), 0) as TotalStock
+            FROM Lists
+            WHERE PID = %s
+        """)
+
 @router.post("/check")
 def check_stock(request: StockCheckRequest):
     """Check if sufficient stock is available for a product"""
     conn = get_db()
-    cursor = conn.cursor(dictionary=True)
 
     try:
-        cursor.execute("""
-            SELECT COALESCE(SUM(Stock), 0) as TotalStock
-            FROM Lists
-            WHERE PID = %s
-        """, (request.PID,))
-        result = cursor.fetchone()
+        result = fetch_dict(queries.execute(conn, TOTAL_STOCK, (request.PID,)))
         
-        available = result["TotalStock"] if result else 0
+        available = int(result["TotalStock"]) if result else 0
         sufficient = available >= request.Quantity
 
         return {
@@ -50,28 +51,22 @@ def check_stock(request: StockCheckRequest):
     except mysql.connector.Error as err:
         raise HTTPException(400, str(err))
     finally:
-        cursor.close()
         conn.close()
 
 @router.post("/check-multiple")
 def check_stock_multiple(request: StockCheckMultipleRequest):
     """Check stock for multiple products at once"""
     conn = get_db()
-    cursor = conn.cursor(dictionary=True)
 
     try:
         results = []
         insufficient_items = []
 
         for item in request.items:
-            cursor.execute("""
-                SELECT COALESCE(SUM(Stock), 0) as TotalStock
-                FROM Lists
-                WHERE PID = %s
-            """, (item.PID,))
-            result = cursor.fetchone()
+            # Prepared once per connection; each item only sends its PID
+            result = fetch_dict(queries.execute(conn, TOTAL_STOCK, (item.PID,)))
             
-            available = result["TotalStock"] if result else 0
+            available = int(result["TotalStock"]) if result else 0
             requested = item.Quantity
             sufficient = available >= requested
 
@@ -98,6 +93,5 @@ def check_stock_multiple(request: StockCheckMultipleRequest):
     except mysql.connector.Error as err:
         raise HTTPException(400, str(err))
     finally:
-        cursor.close()
         conn.close()
 
@@ -1,20 +1,22 @@
 from fastapi import APIRouter, HTTPException
 from models.student import StudentCreate, StudentOut
 from db import get_db
+import queries
 import mysql.connector
 
 router = APIRouter(prefix="/students", tags=["Student"])
 
+INSERT_STUDENT = queries.register("student.insert", """
+            INSERT INTO Student (EnrollmentNo, Course, Batch, EmailID)
+            VALUES (%s, %s, %s, %s)
+        """)
+
 @router.post("/register")
 def register_student(student: StudentCreate):
     conn = get_db()
-    cursor = conn.cursor()
 
     try:
-        cursor.execute("""
-            INSERT INTO Student (EnrollmentNo, Course, Batch, EmailID)
-            VALUES (%s, %s, %s, %s)
-        """, (student.EnrollmentNo, student.Course, student.Batch, student.EmailID))
+        queries.execute(conn, INSERT_STUDENT, (student.EnrollmentNo, student.Course, student.Batch, student.EmailID))
 
         conn.commit()
         return {"message": "Student registered"}
@@ -23,5 +25,4 @@ def register_student(student: StudentCreate):
         raise HTTPException(status_code=400, detail=str(err))
 
     finally:
-        cursor.close()
         conn.close()
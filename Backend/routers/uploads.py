@@ -0,0 +1,9 @@
+from fastapi import APIRouter, Request
+from services.image_serving import image_response
+
+router = APIRouter(prefix="/uploads", tags=["Uploads"])
+
+@router.api_route("/{file_path:path}", methods=["GET", "HEAD"])
+def get_upload(file_path: str, request: Request):
+    """Serve uploaded files with long-lived caching for content-named images"""
+    return image_response(request, file_path)
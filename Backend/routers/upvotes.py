@@ -1,27 +1,124 @@
 from fastapi import APIRouter, HTTPException
-from models.review_upvotes import ReviewUpvoteCreate
+from models.review_upvotes import ReviewUpvoteCreate, UpvoteLookup
 from db import get_db
+from services import upvote_counter
+import queries
 import mysql.connector
+from mysql.connector import errorcode
 
 router = APIRouter(prefix="/upvotes", tags=["Upvotes"])
 
+# Author of the review and the voter's existing vote, in one lookup
+VOTE_STATE = queries.register("upvotes.state", """
+            SELECT f.EmailID,
+                   (SELECT UpvoteID FROM Review_Upvotes
+                    WHERE FeedBackID = f.FeedBackID AND VoterEmail = %s) as UpvoteID
+            FROM Feedbacks f
+            WHERE f.FeedBackID = %s
+        """)
+
+INSERT_VOTE = queries.register("upvotes.insert", """
+            INSERT INTO Review_Upvotes (FeedBackID, VoterEmail)
+            VALUES (%s, %s)
+        """)
+
+DELETE_VOTE = queries.register("upvotes.delete", "DELETE FROM Review_Upvotes WHERE UpvoteID = %s")
+
+COUNT_VOTES = queries.register("upvotes.count", "SELECT COUNT(*) FROM Review_Upvotes WHERE FeedBackID = %s")
+
+def vote_state(conn, vote: ReviewUpvoteCreate):
+    """Existing UpvoteID (or None) after rejecting unknown reviews and self-votes before any write"""
+    rows = queries.execute(conn, VOTE_STATE, (vote.VoterEmail, vote.FeedBackID)).fetchall()
+    if not rows:
+        raise HTTPException(404, "Review not found")
+    author, upvote_id = rows[0]
+    if author == vote.VoterEmail:
+        raise HTTPException(400, "You cannot upvote your own review")
+    return upvote_id
+
+def vote_count(conn, feedback_id: int):
+    """Current number of votes; Feedbacks.Upvotes catches up at the next counter flush"""
+    return queries.execute(conn, COUNT_VOTES, (feedback_id,)).fetchall()[0][0]
+
 @router.post("/add")
 def add_upvote(vote: ReviewUpvoteCreate):
     conn = get_db()
-    cursor = conn.cursor()
 
     try:
-        cursor.execute("""
-            INSERT INTO Review_Upvotes (FeedBackID, VoterEmail)
-            VALUES (%s, %s)
-        """, (vote.FeedBackID, vote.VoterEmail))
+        if vote_state(conn, vote) is not None:
+            raise HTTPException(400, "You have already upvoted this review")
 
+        queries.execute(conn, INSERT_VOTE, (vote.FeedBackID, vote.VoterEmail))
         conn.commit()
+        upvote_counter.mark_dirty(vote.FeedBackID)
         return {"message": "Upvote added"}
 
+    except mysql.connector.IntegrityError as err:
+        if err.errno == errorcode.ER_DUP_ENTRY:
+            # A concurrent identical vote won the unique key
+            raise HTTPException(400, "You have already upvoted this review")
+        raise HTTPException(status_code=400, detail=str(err))
+    except mysql.connector.Error as err:
+        raise HTTPException(status_code=400, detail=str(err))
+
+    finally:
+        conn.close()
+
+@router.post("/toggle")
+def toggle_upvote(vote: ReviewUpvoteCreate):
+    """Upvote a review, or remove the voter's upvote if they already gave one"""
+    conn = get_db()
+
+    try:
+        upvote_id = vote_state(conn, vote)
+        if upvote_id is None:
+            try:
+                queries.execute(conn, INSERT_VOTE, (vote.FeedBackID, vote.VoterEmail))
+            except mysql.connector.IntegrityError as err:
+                # A concurrent identical vote makes this a no-op; anything else (e.g. an unknown voter) is an error
+                if err.errno != errorcode.ER_DUP_ENTRY:
+                    raise
+        else:
+            queries.execute(conn, DELETE_VOTE, (upvote_id,))
+        conn.commit()
+        upvote_counter.mark_dirty(vote.FeedBackID)
+
+        return {
+            "FeedBackID": vote.FeedBackID,
+            "Upvoted": upvote_id is None,
+            "Upvotes": vote_count(conn, vote.FeedBackID)
+        }
+
+    except mysql.connector.Error as err:
+        raise HTTPException(status_code=400, detail=str(err))
+
+    finally:
+        conn.close()
+
+def voted_query(count: int):
+    markers = ", ".join(["%s"] * count)
+    return f"""
+            SELECT FeedBackID FROM Review_Upvotes
+            WHERE VoterEmail = %s AND FeedBackID IN ({markers})
+        """
+
+# Single-review variant; lists of any length run unprepared (see queries.execute)
+VOTED = queries.register("upvotes.voted", voted_query(1))
+
+@router.post("/voted")
+def get_voted_reviews(lookup: UpvoteLookup):
+    """Which of the given reviews (e.g. one page of reviews) the voter has upvoted, in one query"""
+    feedback_ids = list(dict.fromkeys(lookup.FeedBackIDs))
+    conn = get_db(read_only=True)
+
+    try:
+        rows = queries.execute(conn, VOTED, [lookup.VoterEmail] + feedback_ids,
+                               sql=voted_query(len(feedback_ids)), prepared=False).fetchall()
+        voted = {row[0] for row in rows}
+        return {"VoterEmail": lookup.VoterEmail, "Voted": [fid for fid in feedback_ids if fid in voted]}
+
     except mysql.connector.Error as err:
         raise HTTPException(status_code=400, detail=str(err))
 
     finally:
-        cursor.close()
         conn.close()
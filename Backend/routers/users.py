@@ -1,7 +1,8 @@
 from fastapi import APIRouter, HTTPException
 from models.users import UserCreate, UserOut, UserLogin
 from passlib.hash import bcrypt
-from db import get_db
+from db import get_db, fetch_dict
+import queries
 import mysql.connector
 
 router = APIRouter(prefix="/users", tags=["Users"])
@@ -27,21 +28,46 @@ def safe_bcrypt_verify(password: str, hashed: str):
     password_safe = password_bytes.decode('utf-8', errors='ignore')
     return bcrypt.verify(password_safe, hashed)
 
+INSERT_USER = queries.register("users.insert", """
+            INSERT INTO Users (EmailID, FirstName, LastName, Password)
+            VALUES (%s, %s, %s, %s)
+        """)
+
+LOGIN_USER = queries.register("users.login", """
+            SELECT EmailID, FirstName, LastName, Password
+            FROM Users
+            WHERE EmailID = %s
+        """)
+
+GET_USER = queries.register("users.get", """
+            SELECT EmailID, FirstName, LastName
+            FROM Users
+            WHERE EmailID = %s
+        """)
+
+GET_STUDENT = queries.register("users.student", """
+            SELECT EnrollmentNo, Course, Batch
+            FROM Student
+            WHERE EmailID = %s
+        """)
+
+GET_FACULTY = queries.register("users.faculty", """
+            SELECT FacultyID, Department, Designation
+            FROM Faculty
+            WHERE EmailID = %s
+        """)
+
 @router.post("/register")
 def register_user(user: UserCreate):
     # Pydantic model already validates minimum password length (6 characters)
     
     conn = get_db()
-    cursor = conn.cursor()
 
     try:
         # Use safe bcrypt hash function that handles 72-byte limit automatically
         hashed_password = safe_bcrypt_hash(user.Password)
         
-        cursor.execute("""
-            INSERT INTO Users (EmailID, FirstName, LastName, Password)
-            VALUES (%s, %s, %s, %s)
-        """, (user.EmailID, user.FirstName, user.LastName, hashed_password))
+        queries.execute(conn, INSERT_USER, (user.EmailID, user.FirstName, user.LastName, hashed_password))
 
         conn.commit()
 
@@ -56,10 +82,7 @@ def register_user(user: UserCreate):
                 password_bytes = user.Password.encode('utf-8')[:72]
                 password_to_hash = password_bytes.decode('utf-8', errors='ignore')
                 hashed_password = bcrypt.hash(password_to_hash)
-                cursor.execute("""
-                    INSERT INTO Users (EmailID, FirstName, LastName, Password)
-                    VALUES (%s, %s, %s, %s)
-                """, (user.EmailID, user.FirstName, user.LastName, hashed_password))
+                queries.execute(conn, INSERT_USER, (user.EmailID, user.FirstName, user.LastName, hashed_password))
                 conn.commit()
                 return {"message": "User registered"}
             except Exception:
@@ -70,7 +93,6 @@ def register_user(user: UserCreate):
         raise HTTPException(400, f"Database error: {err}")
 
     finally:
-        cursor.close()
         conn.close()
 
 @router.post("/login")
@@ -78,16 +100,9 @@ def login_user(credentials: UserLogin):
     # Pydantic model already validates password length
     # For login, we'll truncate if needed to match what was stored
     conn = get_db()
-    cursor = conn.cursor(dictionary=True)
 
     try:
-        cursor.execute("""
-            SELECT EmailID, FirstName, LastName, Password
-            FROM Users
-            WHERE EmailID = %s
-        """, (credentials.EmailID,))
-        
-        user = cursor.fetchone()
+        user = fetch_dict(queries.execute(conn, LOGIN_USER, (credentials.EmailID,)))
 
         if not user:
             raise HTTPException(401, "Invalid email or password")
@@ -97,20 +112,10 @@ def login_user(credentials: UserLogin):
             raise HTTPException(401, "Invalid email or password")
 
         # Check if user is a student
-        cursor.execute("""
-            SELECT EnrollmentNo, Course, Batch
-            FROM Student
-            WHERE EmailID = %s
-        """, (user["EmailID"],))
-        student = cursor.fetchone()
+        student = fetch_dict(queries.execute(conn, GET_STUDENT, (user["EmailID"],)))
 
         # Check if user is faculty
-        cursor.execute("""
-            SELECT FacultyID, Department, Designation
-            FROM Faculty
-            WHERE EmailID = %s
-        """, (user["EmailID"],))
-        faculty = cursor.fetchone()
+        faculty = fetch_dict(queries.execute(conn, GET_FACULTY, (user["EmailID"],)))
 
         response = {
             "EmailID": user["EmailID"],
@@ -133,42 +138,24 @@ def login_user(credentials: UserLogin):
     except mysql.connector.Error as err:
         raise HTTPException(400, f"Database error: {err}")
     finally:
-        cursor.close()
         conn.close()
 
 @router.get("/{email_id}")
 def get_user_info(email_id: str):
     """Get user information including student/faculty status"""
     conn = get_db()
-    cursor = conn.cursor(dictionary=True)
 
     try:
-        cursor.execute("""
-            SELECT EmailID, FirstName, LastName
-            FROM Users
-            WHERE EmailID = %s
-        """, (email_id,))
-        
-        user = cursor.fetchone()
+        user = fetch_dict(queries.execute(conn, GET_USER, (email_id,)))
 
         if not user:
             raise HTTPException(404, "User not found")
 
         # Check if user is a student
-        cursor.execute("""
-            SELECT EnrollmentNo, Course, Batch
-            FROM Student
-            WHERE EmailID = %s
-        """, (email_id,))
-        student = cursor.fetchone()
+        student = fetch_dict(queries.execute(conn, GET_STUDENT, (email_id,)))
 
         # Check if user is faculty
-        cursor.execute("""
-            SELECT FacultyID, Department, Designation
-            FROM Faculty
-            WHERE EmailID = %s
-        """, (email_id,))
-        faculty = cursor.fetchone()
+        faculty = fetch_dict(queries.execute(conn, GET_FACULTY, (email_id,)))
 
         response = {
             **user,
@@ -189,5 +176,4 @@ def get_user_info(email_id: str):
     except mysql.connector.Error as err:
         raise HTTPException(400, f"Database error: {err}")
     finally:
-        cursor.close()
         conn.close()
@@ -0,0 +1,166 @@
+"""
+In-process fan-out of product changes (stock, price, rating) to live subscribers.
+
+Write paths call publish_stock / publish_rating / broker.publish after their
+commit, from whatever thread they run on; delivery is handed to the event
+loop with call_soon_threadsafe. Each subscription has a conflating mailbox:
+one pending dict per PID into which newer fields overwrite older ones, so a
+slow client is never more than one update per product behind and its memory
+is bounded by the PIDs it watches, not by how many changes happen. An idle
+subscription is a small object plus an asyncio.Event; nothing runs for it
+until something it watches changes.
+
+Only this worker's subscribers are reached; with several API workers each
+one publishes its own writes.
+"""
+from collections import defaultdict
+import mysql.connector
+import asyncio
+import os
+
+MAX_PIDS_PER_SUBSCRIPTION = int(os.getenv("LIVE_MAX_PIDS", "200"))
+
+
+class Subscription:
+    __slots__ = ("pids", "pending", "ready")
+
+    def __init__(self):
+        self.pids = set()
+        self.pending = {}
+        self.ready = asyncio.Event()
+
+    def offer(self, pid: str, fields: dict):
+        """Merge a change into the mailbox; returns True when it replaced an undelivered one"""
+        current = self.pending.get(pid)
+        if current is None:
+            self.pending[pid] = dict(fields)
+            self.ready.set()
+            return False
+        current.update(fields)
+        return True
+
+    def take(self):
+        """{PID: changed fields} accumulated since the last call"""
+        pending, self.pending = self.pending, {}
+        self.ready.clear()
+        return pending
+
+    async def wait(self, timeout: float):
+        """Next batch of changes, or {} after timeout seconds without any"""
+        if not self.pending:
+            try:
+                async with asyncio.timeout(timeout):
+                    await self.ready.wait()
+            except TimeoutError:
+                return {}
+        return self.take()
+
+
+class Broker:
+    def __init__(self):
+        self.loop = None
+        self.subscribers = defaultdict(set)
+        self.stats = {"subscriptions": 0, "published": 0, "delivered": 0, "conflated": 0}
+
+    def open(self):
+        self.stats["subscriptions"] += 1
+        return Subscription()
+
+    def close(self, subscription: Subscription):
+        self.unsubscribe(subscription)
+        self.stats["subscriptions"] -= 1
+
+    def subscribe(self, subscription: Subscription, pids):
+        """Add PIDs to a subscription (call on the event loop); raises ValueError over the limit"""
+        pids = set(pids) - subscription.pids
+        if len(subscription.pids) + len(pids) > MAX_PIDS_PER_SUBSCRIPTION:
+            raise ValueError(f"At most {MAX_PIDS_PER_SUBSCRIPTION} products per subscription")
+        self.loop = asyncio.get_running_loop()
+        for pid in pids:
+            self.subscribers[pid].add(subscription)
+        subscription.pids |= pids
+
+    def unsubscribe(self, subscription: Subscription, pids=None):
+        for pid in list(subscription.pids if pids is None else pids):
+            watchers = self.subscribers.get(pid)
+            if watchers is not None:
+                watchers.discard(subscription)
+                if not watchers:
+                    del self.subscribers[pid]
+            subscription.pids.discard(pid)
+            subscription.pending.pop(pid, None)
+
+    def watched(self, pids):
+        """The PIDs someone is subscribed to; lets writers skip work nobody would see"""
+        return [pid for pid in pids if pid in self.subscribers]
+
+    def publish(self, pid: str, **fields):
+        """Send changed fields of a product to its subscribers. Safe from any thread."""
+        loop = self.loop
+        if loop is None or pid not in self.subscribers:
+            return
+        self.stats["published"] += 1
+        try:
+            loop.call_soon_threadsafe(self._deliver, pid, fields)
+        except RuntimeError:
+            pass  # loop closed during shutdown
+
+    def _deliver(self, pid: str, fields: dict):
+        for subscription in self.subscribers.get(pid, ()):
+            if subscription.offer(pid, fields):
+                self.stats["conflated"] += 1
+            else:
+                self.stats["delivered"] += 1
+
+    def status(self):
+        return {
+            **self.stats,
+            "watched_products": len(self.subscribers),
+            "max_pids_per_subscription": MAX_PIDS_PER_SUBSCRIPTION,
+        }
+
+
+broker = Broker()
+
+
+def publish_stock(conn, pids):
+    """Publish the total stock of the given products, if anyone watches them. Call after commit."""
+    pids = broker.watched(dict.fromkeys(pids))
+    if not pids:
+        return
+    markers = ", ".join(["%s"] * len(pids))
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"""
+            SELECT PID, COALESCE(SUM(Stock), 0)
+            FROM Lists
+            WHERE PID IN ({markers})
+            GROUP BY PID
+        """, pids)
+        totals = dict(cursor.fetchall())
+        for pid in pids:
+            broker.publish(pid, TotalStock=int(totals.get(pid, 0)))
+    except mysql.connector.Error as err:
+        print(f"Failed to publish stock changes: {err}")
+    finally:
+        cursor.close()
+
+
+def publish_rating(conn, pid: str):
+    """Publish a product's review count and average rating, if anyone watches it. Call after commit."""
+    if not broker.watched([pid]):
+        return
+    cursor = conn.cursor()
+    try:
+        cursor.execute("""
+            SELECT ReviewCount, ROUND(RatingSum / NULLIF(ReviewCount, 0), 2)
+            FROM Product_Rating_Summary
+            WHERE PID = %s
+        """, (pid,))
+        row = cursor.fetchone()
+        if row:
+            broker.publish(pid, ReviewCount=row[0], AvgRating=float(row[1]) if row[1] is not None else None)
+    except mysql.connector.Error as err:
+        print(f"Failed to publish rating change: {err}")
+    finally:
+        cursor.close()
@@ -0,0 +1,227 @@
+"""
+Bulk catalog import: products with their listing, categories and images.
+
+Rows are streamed from CSV or NDJSON, validated with CatalogImportRow and
+written in chunks. Each chunk is one transaction of multi-row INSERTs
+(executemany is rewritten into a single INSERT ... VALUES (...), (...)),
+so a chunk of 1000 products costs a handful of round trips instead of
+thousands of requests and commits.
+
+Rows that fail validation, name an unknown seller or category, or use an
+image that is no longer stored are reported and left out of their chunk.
+If a chunk still fails, it is retried one row per transaction so the
+report can name the offending rows and every other row is still imported.
+"""
+from pydantic import ValidationError
+from models.products import CatalogImportRow
+from mysql.connector import errorcode
+from db import get_db
+from services import ids, image_store
+import mysql.connector
+import csv
+import io
+import json
+import time
+
+CHUNK_SIZE = 1000
+MAX_REPORTED_ERRORS = 1000
+
+
+class RowError(Exception):
+    pass
+
+
+def iter_csv(stream):
+    """(line number, dict) per CSV record of a binary stream; empty cells are left out"""
+    reader = csv.DictReader(io.TextIOWrapper(stream, encoding="utf-8-sig", newline=""))
+    for record in reader:
+        yield reader.line_num, {key: value for key, value in record.items() if key and value not in ("", None)}
+
+
+def iter_ndjson(stream):
+    """(line number, dict) per line of a binary NDJSON stream"""
+    for line_no, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield line_no, RowError(f"Invalid JSON: {e}")
+            continue
+        yield line_no, record if isinstance(record, dict) else RowError("Each line must be a JSON object")
+
+
+def iter_rows(stream, fmt: str):
+    if fmt == "csv":
+        return iter_csv(stream)
+    if fmt == "ndjson":
+        return iter_ndjson(stream)
+    raise ValueError("Format must be csv or ndjson")
+
+
+def validation_message(err: ValidationError):
+    return "; ".join(f"{'.'.join(str(loc) for loc in e['loc']) or 'row'}: {e['msg']}" for e in err.errors())
+
+
+def existing_keys(cursor, table: str, column: str, values: set):
+    if not values:
+        return set()
+    values = list(values)
+    markers = ", ".join(["%s"] * len(values))
+    cursor.execute(f"SELECT {column} FROM {table} WHERE {column} IN ({markers})", values)
+    return {row[0] for row in cursor.fetchall()}
+
+
+def write_rows(cursor, rows: list):
+    """Insert a batch of (line_no, row) with multi-row statements. Caller commits."""
+    cursor.executemany("""
+        INSERT INTO Products (PID, ProductName, Description, Price)
+        VALUES (%s, %s, %s, %s)
+    """, [(row.PID, row.ProductName, row.Description, row.Price) for _, row in rows])
+
+    cursor.executemany("""
+        INSERT INTO Lists (EmailID, PID, Stock)
+        VALUES (%s, %s, %s)
+        ON DUPLICATE KEY UPDATE Stock = Stock + VALUES(Stock)
+    """, [(row.EmailID, row.PID, row.Stock) for _, row in rows])
+
+    categories = [(row.PID, category_id) for _, row in rows for category_id in dict.fromkeys(row.CategoryIDs)]
+    if categories:
+        cursor.executemany("""
+            INSERT IGNORE INTO Product_Category (PID, CategoryID)
+            VALUES (%s, %s)
+        """, categories)
+
+    images = [(row.PID, url, order) for _, row in rows for order, url in enumerate(row.ImageURLs)]
+    if images:
+        cursor.executemany("""
+            INSERT INTO Product_Images (PID, ImageURL, DisplayOrder)
+            VALUES (%s, %s, %s)
+        """, images)
+
+
+class CatalogImporter:
+    """Collects rows into chunks, writes them and builds the report"""
+
+    def __init__(self, conn, default_email: str = None, chunk_size: int = CHUNK_SIZE):
+        self.conn = conn
+        self.cursor = conn.cursor()
+        self.default_email = default_email
+        self.chunk_size = chunk_size
+        self.imported = 0
+        self.errors = []
+        self.error_count = 0
+
+    def fail(self, line_no: int, message: str):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"row": line_no, "error": message})
+
+    def validate(self, line_no: int, record):
+        if isinstance(record, RowError):
+            self.fail(line_no, str(record))
+            return None
+        try:
+            row = CatalogImportRow(**record)
+        except ValidationError as e:
+            self.fail(line_no, validation_message(e))
+            return None
+        except TypeError as e:
+            self.fail(line_no, str(e))
+            return None
+        row.EmailID = row.EmailID or self.default_email
+        if not row.EmailID:
+            self.fail(line_no, "EmailID: a seller is required")
+            return None
+        row.PID = row.PID or ids.new_product_id()
+        return row
+
+    def precheck(self, rows: list):
+        """Drop rows whose seller or category does not exist, in two queries for the whole chunk"""
+        emails = existing_keys(self.cursor, "Users", "EmailID", {row.EmailID for _, row in rows})
+        categories = existing_keys(self.cursor, "Category", "CategoryID",
+                                   {category_id for _, row in rows for category_id in row.CategoryIDs})
+        kept = []
+        for line_no, row in rows:
+            if row.EmailID not in emails:
+                self.fail(line_no, f"Unknown seller {row.EmailID}")
+            elif any(category_id not in categories for category_id in row.CategoryIDs):
+                missing = sorted(set(row.CategoryIDs) - categories)
+                self.fail(line_no, f"Unknown CategoryID {', '.join(map(str, missing))}")
+            else:
+                kept.append((line_no, row))
+        return kept
+
+    def write_chunk(self, rows: list):
+        rows = self.precheck(rows)
+        if not rows:
+            return
+        try:
+            write_rows(self.cursor, rows)
+            missing = image_store.acquire(self.conn, [url for _, row in rows for url in row.ImageURLs])
+            if missing:
+                raise RowError(f"Images no longer stored: {', '.join(missing)}")
+            self.conn.commit()
+            self.imported += len(rows)
+        except (mysql.connector.Error, RowError):
+            self.conn.rollback()
+            self.write_one_by_one(rows)
+
+    def write_one_by_one(self, rows: list):
+        """Fallback for a failed chunk: one transaction per row to find the bad ones"""
+        for line_no, row in rows:
+            try:
+                write_rows(self.cursor, [(line_no, row)])
+                missing = image_store.acquire(self.conn, row.ImageURLs)
+                if missing:
+                    raise RowError(f"Images no longer stored: {', '.join(missing)}")
+                self.conn.commit()
+                self.imported += 1
+            except mysql.connector.IntegrityError as e:
+                self.conn.rollback()
+                self.fail(line_no, f"Product {row.PID} already exists" if e.errno == errorcode.ER_DUP_ENTRY else str(e))
+            except (mysql.connector.Error, RowError) as e:
+                self.conn.rollback()
+                self.fail(line_no, str(e))
+
+    def run(self, records):
+        started = time.perf_counter()
+        chunk = []
+        total = 0
+        for line_no, record in records:
+            total += 1
+            row = self.validate(line_no, record)
+            if row is None:
+                continue
+            chunk.append((line_no, row))
+            if len(chunk) >= self.chunk_size:
+                self.write_chunk(chunk)
+                chunk = []
+        if chunk:
+            self.write_chunk(chunk)
+
+        seconds = time.perf_counter() - started
+        return {
+            "rows": total,
+            "imported": self.imported,
+            "failed": self.error_count,
+            "errors": self.errors,
+            "errors_truncated": self.error_count > len(self.errors),
+            "seconds": round(seconds, 3),
+            "rows_per_second": round(total / seconds) if seconds else None,
+        }
+
+
+def import_stream(stream, fmt: str, default_email: str = None, chunk_size: int = CHUNK_SIZE):
+    """Import a binary CSV/NDJSON stream and return the report"""
+    records = iter_rows(stream, fmt)
+    conn = get_db()
+
+    try:
+        importer = CatalogImporter(conn, default_email, chunk_size)
+        try:
+            return importer.run(records)
+        finally:
+            importer.cursor.close()
+    finally:
+        conn.close()
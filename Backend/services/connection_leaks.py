@@ -0,0 +1,215 @@
+"""
+Tracking of pooled connections that are not given back.
+
+Each checkout through db.checkout() is recorded with the stack that took it,
+the thread, the request (when SQL tracing is on) and the time. Returning the
+connection (PooledMySQLConnection.close -> ConnectionPool.add_connection)
+forgets it. With a pool of five, a handful of forgotten connections starve
+every other request, so two cases are reported with the acquiring stack:
+
+- collected: the PooledMySQLConnection was garbage-collected while still
+  checked out (typically `conn = get_db(); cursor = conn.cursor()` raising
+  before the try/finally that closes it). The connection is rolled back and
+  put back in the pool straight away.
+- held: a connection checked out longer than DB_LEAK_WARN_SECONDS is
+  reported once by a background watchdog. When DB_LEAK_RECLAIM_SECONDS is set
+  and exceeded, the pool gets a fresh connection in its place; the holder keeps
+  its own, which is disconnected instead of pooled when it is finally closed.
+
+GET /admin/db/connections lists the current holders; it requires the admin
+token (routers/admin.py), since the stacks show file paths and source lines.
+"""
+from collections import Counter
+import linecache
+import mysql.connector
+import os
+import threading
+import time
+import traceback
+import weakref
+
+ENABLED = os.getenv("DB_LEAK_TRACKING", "1") != "0"
+WARN_SECONDS = float(os.getenv("DB_LEAK_WARN_SECONDS", "30"))
+RECLAIM_SECONDS = float(os.getenv("DB_LEAK_RECLAIM_SECONDS", "0"))  # 0 never takes back a held connection
+STACK_DEPTH = int(os.getenv("DB_LEAK_STACK_DEPTH", "12"))
+CHECK_SECONDS = 5
+
+# Frames of the pool plumbing itself say nothing about who leaked
+_SKIPPED_FILES = {os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "db.py"),
+                  os.path.abspath(__file__)}
+
+_holders = {}
+_owed = Counter()  # replacements that could not be opened yet, per pool
+# Reentrant: a finalizer can run on whichever thread triggers garbage collection
+_lock = threading.RLock()
+_stop = threading.Event()
+_thread = None
+
+stats = {"tracked": 0, "collected": 0, "held_too_long": 0, "reclaimed": 0}
+
+
+class Holder:
+    __slots__ = ("cnx", "pool", "label", "request", "thread", "started", "stack", "finalizer", "warned", "reclaimed")
+
+    def __init__(self, cnx, pool, label: str, request, stack):
+        self.cnx = cnx
+        self.pool = pool
+        self.label = label
+        self.request = request
+        self.thread = threading.current_thread().name
+        self.started = time.monotonic()
+        self.stack = stack
+        self.finalizer = None
+        self.warned = False
+        self.reclaimed = False
+
+    def age(self, now: float = None):
+        return (now or time.monotonic()) - self.started
+
+    def frames(self):
+        """Acquiring stack, outermost call first, as "file:line in function: code" """
+        return [
+            f"{frame.filename}:{frame.lineno} in {frame.name}: {linecache.getline(frame.filename, frame.lineno).strip()}"
+            for frame in reversed(self.stack)
+        ]
+
+    def describe(self, now: float = None):
+        return {
+            "pool": self.label,
+            "age_seconds": round(self.age(now), 3),
+            "thread": self.thread,
+            "request": self.request,
+            "reclaimed": self.reclaimed,
+            "stack": self.frames(),
+        }
+
+
+def _acquiring_stack():
+    """Caller frames, innermost first, without reading source lines (done only when reported)"""
+    frames = traceback.walk_stack(None)
+    stack = traceback.StackSummary.extract(frames, limit=STACK_DEPTH + 4, lookup_lines=False)
+    return [frame for frame in stack if frame.filename not in _SKIPPED_FILES][:STACK_DEPTH]
+
+
+def track(pooled, pool, label: str, request: str = None):
+    """Record a checkout; `pooled` is the PooledMySQLConnection handed to the caller"""
+    global _thread
+    if not ENABLED:
+        return
+    cnx = pooled._cnx
+    holder = Holder(cnx, pool, label, request, _acquiring_stack())
+    # The callback must not reference `pooled`, or it would never be collected
+    holder.finalizer = weakref.finalize(pooled, _collected, id(cnx), cnx)
+    holder.finalizer.atexit = False
+    with _lock:
+        _holders[id(cnx)] = holder
+        stats["tracked"] += 1
+        if _thread is None and not _stop.is_set():
+            _thread = threading.Thread(target=_run, name="db-leak-watchdog", daemon=True)
+            _thread.start()
+
+
+def returned(cnx):
+    """Forget a connection coming back to its pool. True when it was reclaimed
+    meanwhile: the pool already has a replacement, so disconnect it instead."""
+    if not ENABLED:
+        return False
+    with _lock:
+        holder = _holders.pop(id(cnx), None)
+    if holder is None:
+        return False
+    holder.finalizer.detach()
+    return holder.reclaimed
+
+
+def report(kind: str, holder: Holder):
+    print(f"DB connection leak ({kind}): {holder.label} connection checked out {holder.age():.1f}s ago "
+          f"by {holder.request or 'thread ' + holder.thread}, acquired at:")
+    for frame in holder.frames():
+        print(f"    {frame}")
+
+
+def _collected(key: int, cnx):
+    """Finalizer of a PooledMySQLConnection dropped without close()"""
+    with _lock:
+        holder = _holders.get(key)
+        if holder is None or holder.cnx is not cnx:
+            return
+        del _holders[key]
+        stats["collected"] += 1
+    report("garbage-collected without close()", holder)
+    try:
+        if holder.reclaimed:
+            cnx.disconnect()
+        else:
+            holder.pool.add_connection(cnx)
+    except mysql.connector.Error as err:
+        print(f"Could not return leaked {holder.label} connection: {err}")
+
+
+def _replace(pool, label: str):
+    try:
+        pool.add_connection()
+        return True
+    except mysql.connector.Error as err:
+        print(f"Could not open a replacement {label} connection: {err}")
+        return False
+
+
+def check():
+    """Report connections held past WARN_SECONDS and reclaim those past RECLAIM_SECONDS"""
+    now = time.monotonic()
+    to_warn, to_reclaim = [], []
+    with _lock:
+        for holder in list(_holders.values()):
+            age = holder.age(now)
+            if age >= WARN_SECONDS and not holder.warned:
+                holder.warned = True
+                stats["held_too_long"] += 1
+                to_warn.append(holder)
+            if RECLAIM_SECONDS and age >= RECLAIM_SECONDS and not holder.reclaimed:
+                holder.reclaimed = True
+                stats["reclaimed"] += 1
+                to_reclaim.append(holder)
+        owed = list(_owed.items())
+        _owed.clear()
+
+    for holder in to_warn:
+        report(f"held over {WARN_SECONDS:g}s", holder)
+    for holder in to_reclaim:
+        print(f"Reclaiming {holder.label} connection held {holder.age(now):.1f}s; the pool gets a new one")
+        if not _replace(holder.pool, holder.label):
+            with _lock:
+                _owed[holder.pool] += 1
+    for pool, count in owed:
+        for _ in range(count):
+            if not _replace(pool, pool.pool_name):
+                with _lock:
+                    _owed[pool] += 1
+
+
+def _run():
+    while not _stop.wait(CHECK_SECONDS):
+        check()
+
+
+def shutdown():
+    _stop.set()
+
+
+def holders():
+    """Current holders, longest-held first"""
+    now = time.monotonic()
+    with _lock:
+        current = sorted(_holders.values(), key=lambda holder: holder.started)
+    return [holder.describe(now) for holder in current]
+
+
+def snapshot():
+    return {
+        "enabled": ENABLED,
+        "warn_seconds": WARN_SECONDS,
+        "reclaim_seconds": RECLAIM_SECONDS or None,
+        **stats,
+        "holders": holders(),
+    }
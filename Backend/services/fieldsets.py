@@ -0,0 +1,30 @@
+"""
+Sparse fieldsets: `?fields=PID,ProductName,Price` on list endpoints.
+
+Each endpoint declares the fields it can return and the SQL expression behind
+each one, so unrequested columns (and expensive aggregates) are left out of
+the query itself rather than just dropped from the output.
+"""
+from fastapi import HTTPException
+
+
+def parse_fields(fields: str, allowed: dict):
+    """Requested field names in order, or every allowed field when `fields` is empty.
+
+    Raises HTTPException(400) for names the endpoint does not know.
+    """
+    if not fields:
+        return list(allowed)
+
+    requested = list(dict.fromkeys(name.strip() for name in fields.split(",") if name.strip()))
+    unknown = [name for name in requested if name not in allowed]
+    if unknown:
+        raise HTTPException(400, f"Unknown fields: {', '.join(unknown)}. Allowed: {', '.join(allowed)}")
+    if not requested:
+        raise HTTPException(400, "fields must name at least one field")
+    return requested
+
+
+def select_list(requested: list, allowed: dict):
+    """SELECT column list for the requested fields, aliased to their field names"""
+    return ",\n                   ".join(f"{allowed[name]} as {name}" for name in requested)
@@ -0,0 +1,191 @@
+"""
+Time-ordered, fixed-width IDs generated without a database round trip.
+
+    PROD 1718000000000 0A 00F
+    |    |             |  +-- sequence within the millisecond (3 Crockford base32 chars, 32768 values)
+    |    |             +----- worker ID (2 chars, 0-1023), unique per API process
+    |    +------------------- Unix time in milliseconds, zero-padded to 13 digits
+    +------------------------ prefix
+
+Every part has a fixed width and sorts the same way as text and as numbers,
+so IDs sort by creation time: inserts land at the right edge of the primary
+key B-tree and ORDER BY PID DESC means newest first. IDs are unique as long
+as no two running processes use the same worker ID at the same time.
+
+Each process leases its worker ID from Id_Worker_Leases (migration 005) on
+first use, so any number of uvicorn workers, containers and hosts get
+distinct IDs without configuration. The lease lasts ID_WORKER_LEASE_SECONDS
+(default 60) and is renewed by a background thread every quarter of that; a
+process stops using its worker ID a quarter before the lease could pass to
+another process, and leases again (possibly getting a different ID) if the
+renewals failed meanwhile. That margin also has to cover clock differences
+between hosts, since the IDs embed local time. Leases of stopped processes
+are simply left to expire. Setting ID_WORKER (0-1023) pins the worker ID
+and skips the lease; it must then be distinct for every process.
+"""
+import os
+import socket
+import threading
+import time
+import uuid
+
+import mysql.connector
+
+CROCKFORD_BASE32 = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+WORKER_CHARS = 2
+SEQUENCE_CHARS = 3
+MAX_WORKER = 32 ** WORKER_CHARS
+MAX_SEQUENCE = 32 ** SEQUENCE_CHARS
+
+
+def encode_base32(value: int, width: int):
+    chars = []
+    for _ in range(width):
+        value, digit = divmod(value, 32)
+        chars.append(CROCKFORD_BASE32[digit])
+    return "".join(reversed(chars))
+
+
+LEASE_SECONDS = float(os.getenv("ID_WORKER_LEASE_SECONDS", "60"))
+LEASE_MARGIN_SECONDS = LEASE_SECONDS / 4
+
+
+def check_worker_id(worker_id: int):
+    if not 0 <= worker_id < MAX_WORKER:
+        raise ValueError(f"worker_id must be between 0 and {MAX_WORKER - 1}")
+    return worker_id
+
+
+class WorkerLease:
+    """This process's worker ID, leased from Id_Worker_Leases and kept renewed"""
+
+    def __init__(self):
+        self.owner = f"{socket.gethostname()}/{os.getpid()}/{uuid.uuid4().hex[:8]}"
+        self.worker_id = None
+        self.valid_until = 0.0
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def current(self):
+        """Worker ID to use right now; leases (or renews) first when the lease is not known to be held"""
+        with self._lock:
+            if time.monotonic() >= self.valid_until:
+                self._refresh()
+            return self.worker_id
+
+    def _refresh(self):
+        # Imported here so benchmarks can use the encoding helpers without opening the pool
+        from db import get_db
+
+        # Counted from before the round trip, so the local deadline is never late
+        started = time.monotonic()
+        conn = get_db()
+        cursor = conn.cursor()
+        try:
+            if self.worker_id is None or not self._renew(cursor):
+                self.worker_id = None
+                self.worker_id = self._claim(conn, cursor)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+            conn.close()
+        self.valid_until = started + LEASE_SECONDS - LEASE_MARGIN_SECONDS
+
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="id-worker-lease", daemon=True)
+            self._thread.start()
+
+    def _renew(self, cursor):
+        """Extend our lease; False when another process has taken the worker ID over"""
+        cursor.execute("""
+            UPDATE Id_Worker_Leases SET ExpiresAt = NOW(6) + INTERVAL %s SECOND
+            WHERE WorkerID = %s AND Owner = %s
+        """, (LEASE_SECONDS, self.worker_id, self.owner))
+        return cursor.rowcount == 1
+
+    def _claim(self, conn, cursor, attempts: int = 5):
+        """Take over an expired lease, or add the next worker ID when none has expired"""
+        for _ in range(attempts):
+            cursor.execute("""
+                SELECT WorkerID FROM Id_Worker_Leases
+                WHERE ExpiresAt < NOW(6)
+                ORDER BY WorkerID LIMIT 1
+                FOR UPDATE SKIP LOCKED
+            """)
+            row = cursor.fetchone()
+            if row is not None:
+                cursor.execute("""
+                    UPDATE Id_Worker_Leases SET Owner = %s, ExpiresAt = NOW(6) + INTERVAL %s SECOND
+                    WHERE WorkerID = %s
+                """, (self.owner, LEASE_SECONDS, row[0]))
+                return row[0]
+
+            cursor.execute("SELECT COALESCE(MAX(WorkerID) + 1, 0) FROM Id_Worker_Leases")
+            worker_id = cursor.fetchone()[0]
+            if worker_id >= MAX_WORKER:
+                raise RuntimeError(f"All {MAX_WORKER} ID worker leases are held")
+            try:
+                cursor.execute("""
+                    INSERT INTO Id_Worker_Leases (WorkerID, Owner, ExpiresAt)
+                    VALUES (%s, %s, NOW(6) + INTERVAL %s SECOND)
+                """, (worker_id, self.owner, LEASE_SECONDS))
+                return worker_id
+            except mysql.connector.IntegrityError:
+                # Another process added the same ID first
+                conn.rollback()
+        raise RuntimeError("Could not lease an ID worker")
+
+    def _run(self):
+        while True:
+            time.sleep(LEASE_MARGIN_SECONDS)
+            try:
+                with self._lock:
+                    self._refresh()
+            except Exception as e:
+                print(f"Could not renew ID worker lease {self.worker_id}: {e}")
+
+
+class IdGenerator:
+    """Monotonic ID source for one prefix; safe to share between threads.
+    `worker` returns the worker ID to embed (fixed, or WorkerLease.current)."""
+
+    def __init__(self, prefix: str, worker):
+        self.prefix = prefix
+        self._worker = worker
+        self._lock = threading.Lock()
+        self._last_ms = 0
+        self._sequence = 0
+
+    def next_id(self):
+        with self._lock:
+            worker = encode_base32(self._worker(), WORKER_CHARS)
+            now = int(time.time() * 1000)
+            if now > self._last_ms:
+                self._last_ms = now
+                self._sequence = 0
+            else:
+                # Same millisecond, or the clock stepped back: keep counting from the last timestamp
+                self._sequence += 1
+                if self._sequence == MAX_SEQUENCE:
+                    self._last_ms += 1
+                    self._sequence = 0
+            return f"{self.prefix}{self._last_ms:013d}{worker}{encode_base32(self._sequence, SEQUENCE_CHARS)}"
+
+
+if os.getenv("ID_WORKER"):
+    WORKER_ID = check_worker_id(int(os.getenv("ID_WORKER")))
+    lease = None
+    current_worker_id = lambda: WORKER_ID
+else:
+    lease = WorkerLease()
+    current_worker_id = lease.current
+
+_product_ids = IdGenerator("PROD", current_worker_id)
+
+
+def new_product_id():
+    """22-character product ID, e.g. PROD17180000000000A00F"""
+    return _product_ids.next_id()
@@ -0,0 +1,70 @@
+"""
+Single serving path for uploaded images.
+
+Content-addressed files (named by SHA-256, see image_store) and their variants
+never change once written, so they are served with a year-long immutable
+Cache-Control and the hash as a strong ETag. Range requests and zero-copy
+transfer are handled by Starlette's FileResponse (it uses the ASGI pathsend
+extension when the server supports it, e.g. Granian).
+"""
+from fastapi import HTTPException, Request, Response
+from fastapi.responses import FileResponse
+from pathlib import Path
+from services import image_store
+import mimetypes
+import stat
+import os
+
+UPLOAD_ROOT = Path("uploads").resolve()
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# Legacy uuid-named uploads are never overwritten either, but revalidate them daily
+DEFAULT_CACHE_CONTROL = "public, max-age=86400"
+
+mimetypes.add_type("image/webp", ".webp")
+mimetypes.add_type("image/avif", ".avif")
+
+
+def _content_hash(path: Path):
+    """Hash a file is named after (originals: <hash>.ext, variants: <hash>_<variant>.ext)"""
+    stem = path.stem.split("_", 1)[0]
+    return stem if image_store.is_content_hash(stem) else None
+
+
+def _etag_matches(if_none_match: str, etag: str):
+    if if_none_match.strip() == "*":
+        return True
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return etag in candidates
+
+
+def image_response(request: Request, relative_path: str):
+    """Build the response for a file under uploads/. Call from a sync endpoint so stat() runs off the event loop."""
+    file_path = (UPLOAD_ROOT / relative_path).resolve()
+    # Dot-files and anything under a dot-directory (e.g. image_store's .incoming) are private
+    if not file_path.is_relative_to(UPLOAD_ROOT) or any(
+            part.startswith(".") for part in file_path.relative_to(UPLOAD_ROOT).parts):
+        raise HTTPException(404, "Image not found")
+
+    try:
+        stat_result = os.stat(file_path)
+    except (FileNotFoundError, NotADirectoryError):
+        raise HTTPException(404, "Image not found")
+    if not stat.S_ISREG(stat_result.st_mode):
+        raise HTTPException(404, "Image not found")
+
+    content_hash = _content_hash(file_path)
+    if content_hash:
+        etag = f'"{file_path.stem}"'
+        cache_control = IMMUTABLE_CACHE_CONTROL
+    else:
+        etag = f'"{stat_result.st_size:x}-{stat_result.st_mtime_ns:x}"'
+        cache_control = DEFAULT_CACHE_CONTROL
+
+    headers = {"etag": etag, "cache-control": cache_control}
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+
+    return FileResponse(file_path, stat_result=stat_result, headers=headers)
@@ -0,0 +1,187 @@
+"""
+Content-addressed storage for uploaded product images.
+
+Files are named by the SHA-256 of their bytes and sharded two levels deep
+(uploads/products/ab/cd/abcd....webp), so identical uploads share one file.
+Image_Blobs keeps a reference count per file: Product_Images rows acquire a
+reference when they are added and release it when they are deleted, and the
+file is only unlinked once the last reference is gone.
+"""
+from collections import Counter
+from pathlib import Path
+from db import get_db
+import hashlib
+import os
+import re
+import uuid
+
+UPLOAD_DIR = Path("uploads/products")
+INCOMING_DIR = UPLOAD_DIR / ".incoming"
+MAX_IMAGE_BYTES = 5 * 1024 * 1024  # 5MB
+CHUNK_SIZE = 1024 * 1024
+
+HASH_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+
+
+class ImageTooLargeError(ValueError):
+    pass
+
+
+def is_content_hash(value: str):
+    return bool(HASH_PATTERN.match(value))
+
+
+def content_url(content_hash: str, extension: str):
+    """Relative URL of a content-addressed file, as stored in Product_Images"""
+    return f"{UPLOAD_DIR.as_posix()}/{content_hash[:2]}/{content_hash[2:4]}/{content_hash}{extension}"
+
+
+def is_content_url(image_url: str):
+    return is_content_hash(Path(image_url).stem)
+
+
+def find_blob(content_hash: str):
+    """Look up a stored image by hash. Returns a dict or None."""
+    conn = get_db()
+    cursor = conn.cursor(dictionary=True)
+
+    try:
+        cursor.execute("""
+            SELECT ContentHash, ImageURL, Bytes
+            FROM Image_Blobs
+            WHERE ContentHash = %s
+        """, (content_hash,))
+        blob = cursor.fetchone()
+        if blob and not Path(blob["ImageURL"]).exists():
+            return None
+        return blob
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def save_upload(fileobj, filename: str, max_bytes: int = MAX_IMAGE_BYTES):
+    """Store an uploaded file under its content hash.
+
+    Returns (image_url, created); created is False when identical bytes were
+    already stored and the existing file is reused.
+    """
+    extension = Path(filename or "").suffix.lower()
+    INCOMING_DIR.mkdir(parents=True, exist_ok=True)
+    temp_path = INCOMING_DIR / f"{uuid.uuid4()}{extension}"
+
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with open(temp_path, "wb") as buffer:
+            while chunk := fileobj.read(CHUNK_SIZE):
+                size += len(chunk)
+                if max_bytes and size > max_bytes:
+                    raise ImageTooLargeError(f"Image size must be less than {max_bytes // (1024 * 1024)}MB")
+                digest.update(chunk)
+                buffer.write(chunk)
+
+        content_hash = digest.hexdigest()
+        existing = find_blob(content_hash)
+        if existing:
+            return existing["ImageURL"], False
+
+        image_url = content_url(content_hash, extension)
+        final_path = Path(image_url)
+        final_path.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(temp_path, final_path)
+    finally:
+        if temp_path.exists():
+            temp_path.unlink()
+
+    conn = get_db()
+    cursor = conn.cursor()
+
+    try:
+        cursor.execute("""
+            INSERT IGNORE INTO Image_Blobs (ContentHash, ImageURL, Bytes, RefCount)
+            VALUES (%s, %s, %s, 0)
+        """, (content_hash, image_url, size))
+        conn.commit()
+    finally:
+        cursor.close()
+        conn.close()
+
+    return image_url, True
+
+
+def acquire(conn, image_urls: list):
+    """Take a reference on each stored image. Call inside the transaction that adds the rows.
+
+    Runs two statements whatever the number of images. Returns the
+    content-addressed URLs that have no blob any more (their last reference
+    was released and the file removed), so the caller can reject them.
+    Legacy uploads that predate content addressing are not tracked.
+    """
+    counts = Counter(image_urls)
+    if not counts:
+        return []
+
+    urls = list(counts)
+    markers = ", ".join(["%s"] * len(urls))
+    cases = " ".join(["WHEN %s THEN %s"] * len(urls))
+    cursor = conn.cursor()
+
+    try:
+        cursor.execute(f"""
+            UPDATE Image_Blobs
+            SET RefCount = RefCount + CASE ImageURL {cases} END
+            WHERE ImageURL IN ({markers})
+        """, [value for url in urls for value in (url, counts[url])] + urls)
+
+        cursor.execute(f"""
+            SELECT ImageURL FROM Image_Blobs WHERE ImageURL IN ({markers})
+        """, urls)
+        found = {row[0] for row in cursor.fetchall()}
+        return [url for url in urls if url not in found and is_content_url(url)]
+    finally:
+        cursor.close()
+
+
+def release(conn, image_url: str):
+    """Drop one reference. Returns True when the file is no longer referenced.
+
+    Call after the Product_Images row has been deleted, inside the same transaction,
+    and unlink the file (see remove_files) only after committing.
+    """
+    cursor = conn.cursor()
+
+    try:
+        cursor.execute("""
+            SELECT RefCount FROM Image_Blobs WHERE ImageURL = %s FOR UPDATE
+        """, (image_url,))
+        blob = cursor.fetchone()
+
+        if blob is None:
+            # Uploaded before content addressing: count the remaining rows instead
+            cursor.execute("""
+                SELECT COUNT(*) FROM Product_Images WHERE ImageURL = %s
+            """, (image_url,))
+            return cursor.fetchone()[0] == 0
+
+        if blob[0] > 1:
+            cursor.execute("""
+                UPDATE Image_Blobs SET RefCount = RefCount - 1
+                WHERE ImageURL = %s
+            """, (image_url,))
+            return False
+
+        cursor.execute("DELETE FROM Image_Blobs WHERE ImageURL = %s", (image_url,))
+        return True
+    finally:
+        cursor.close()
+
+
+def remove_files(paths: list):
+    """Unlink files, ignoring ones that are already gone"""
+    for path in paths:
+        try:
+            Path(path).unlink(missing_ok=True)
+        except OSError as e:
+            # Log error but don't fail the request
+            print(f"Failed to delete image file {path}: {e}")
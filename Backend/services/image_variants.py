@@ -0,0 +1,228 @@
+"""
+Resized variants (thumb/card/full) and placeholders for uploaded product images.
+
+Uploads are stored at their original size. Resizing is CPU bound, so it is
+handed to a process pool as soon as a file is saved; the finished variants are
+recorded in Image_Variants / Image_Placeholders and attached to API responses.
+Recording runs on its own thread, not on the process pool's management thread
+that completes the futures.
+"""
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+from PIL import Image, ImageOps, features
+from db import get_db
+import threading
+import base64
+import io
+import os
+
+VARIANT_DIR = Path("uploads/products/variants")
+
+# Longest side in pixels, largest first so each variant is resized from the previous one
+VARIANT_SIZES = {
+    "full": 1600,
+    "card": 640,
+    "thumb": 320,
+}
+
+FORMAT_QUALITY = {
+    "webp": 75,
+    "avif": 50,
+}
+
+PLACEHOLDER_SIZE = 16
+
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", "2"))
+
+_executor = None
+_executor_lock = threading.Lock()
+# Database writes for finished renders; its thread starts with the first one
+_recorder = ThreadPoolExecutor(max_workers=1, thread_name_prefix="image-variants-record")
+
+
+def available_formats():
+    """Output formats supported by the installed Pillow build"""
+    formats = ["webp"]
+    if features.check("avif"):
+        formats.append("avif")
+    return formats
+
+
+def render_variants(image_url: str, formats: list):
+    """Generate every variant of one source image. Runs in a worker process."""
+    source = Path(image_url)
+    VARIANT_DIR.mkdir(parents=True, exist_ok=True)
+    variants = []
+
+    with Image.open(source) as original:
+        img = ImageOps.exif_transpose(original)
+        if img.mode not in ("RGB", "RGBA"):
+            img = img.convert("RGBA" if img.mode in ("LA", "P", "PA") else "RGB")
+
+        for name, size in VARIANT_SIZES.items():
+            img.thumbnail((size, size), Image.Resampling.LANCZOS)
+            for fmt in formats:
+                out_path = VARIANT_DIR / f"{source.stem}_{name}.{fmt}"
+                img.save(out_path, format=fmt.upper(), quality=FORMAT_QUALITY[fmt])
+                variants.append((
+                    image_url, name, fmt, out_path.as_posix(),
+                    img.width, img.height, out_path.stat().st_size
+                ))
+
+        img.thumbnail((PLACEHOLDER_SIZE, PLACEHOLDER_SIZE), Image.Resampling.BILINEAR)
+        buffer = io.BytesIO()
+        img.save(buffer, format="WEBP", quality=30)
+        placeholder = "data:image/webp;base64," + base64.b64encode(buffer.getvalue()).decode("ascii")
+
+    return variants, placeholder
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(max_workers=IMAGE_WORKERS)
+        return _executor
+
+
+def enqueue(image_url: str):
+    """Schedule variant generation for a freshly saved upload"""
+    future = _get_executor().submit(render_variants, image_url, available_formats())
+    future.add_done_callback(lambda f: _hand_off(image_url, f))
+    return future
+
+
+def _hand_off(image_url: str, future):
+    """Done callback: queue the recording instead of blocking the pool's management thread on MySQL"""
+    try:
+        _recorder.submit(_record, image_url, future)
+    except RuntimeError as e:
+        print(f"Variants for {image_url} not recorded: {e}")
+
+
+def _record(image_url: str, future):
+    """Store the variants produced by a worker"""
+    try:
+        variants, placeholder = future.result()
+    except Exception as e:
+        print(f"Failed to generate variants for {image_url}: {e}")
+        return
+
+    conn = cursor = None
+    try:
+        conn = get_db()
+        cursor = conn.cursor()
+        cursor.executemany("""
+            INSERT INTO Image_Variants
+                (SourceURL, Variant, Format, VariantURL, Width, Height, Bytes)
+            VALUES (%s, %s, %s, %s, %s, %s, %s)
+            ON DUPLICATE KEY UPDATE VariantURL = VALUES(VariantURL),
+                Width = VALUES(Width), Height = VALUES(Height), Bytes = VALUES(Bytes)
+        """, variants)
+        cursor.execute("""
+            INSERT INTO Image_Placeholders (SourceURL, Placeholder)
+            VALUES (%s, %s)
+            ON DUPLICATE KEY UPDATE Placeholder = VALUES(Placeholder)
+        """, (image_url, placeholder))
+        conn.commit()
+    except Exception as err:
+        print(f"Failed to record variants for {image_url}: {err}")
+    finally:
+        if cursor is not None:
+            cursor.close()
+        if conn is not None:
+            conn.close()
+
+
+def attach_variants(conn, rows: list, url_key: str = "ImageURL", prefix: str = ""):
+    """Add `<prefix>Variants` and `<prefix>Placeholder` to each row.
+
+    Variants are returned as {"thumb": {"webp": url, "avif": url}, "card": ..., "full": ...}.
+    Images whose variants are not ready yet get an empty dict and no placeholder,
+    so clients fall back to the original URL.
+    """
+    variants_key = f"{prefix}Variants"
+    placeholder_key = f"{prefix}Placeholder"
+    urls = list({row[url_key] for row in rows if row.get(url_key)})
+
+    by_url = {}
+    placeholders = {}
+    if urls:
+        markers = ", ".join(["%s"] * len(urls))
+        cursor = conn.cursor()
+        try:
+            cursor.execute(f"""
+                SELECT SourceURL, Variant, Format, VariantURL
+                FROM Image_Variants
+                WHERE SourceURL IN ({markers})
+            """, urls)
+            for source_url, variant, fmt, variant_url in cursor.fetchall():
+                by_url.setdefault(source_url, {}).setdefault(variant, {})[fmt] = variant_url
+
+            cursor.execute(f"""
+                SELECT SourceURL, Placeholder
+                FROM Image_Placeholders
+                WHERE SourceURL IN ({markers})
+            """, urls)
+            placeholders = dict(cursor.fetchall())
+        finally:
+            cursor.close()
+
+    for row in rows:
+        row[variants_key] = by_url.get(row.get(url_key), {})
+        row[placeholder_key] = placeholders.get(row.get(url_key))
+    return rows
+
+
+def discard(conn, image_url: str):
+    """Delete the variant rows of a source image and return the variant file paths.
+
+    Call inside the transaction that drops the last reference to the source;
+    unlink the returned files after committing.
+    """
+    cursor = conn.cursor()
+
+    try:
+        cursor.execute("""
+            SELECT VariantURL FROM Image_Variants WHERE SourceURL = %s
+        """, (image_url,))
+        paths = [row[0] for row in cursor.fetchall()]
+        cursor.execute("DELETE FROM Image_Variants WHERE SourceURL = %s", (image_url,))
+        cursor.execute("DELETE FROM Image_Placeholders WHERE SourceURL = %s", (image_url,))
+        return paths
+    finally:
+        cursor.close()
+
+
+def shutdown():
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+    _recorder.shutdown(wait=False)
+
+
+if __name__ == "__main__":
+    # Backfill: python -m services.image_variants
+    conn = get_db()
+    cursor = conn.cursor()
+    try:
+        cursor.execute("""
+            SELECT DISTINCT pi.ImageURL
+            FROM Product_Images pi
+            LEFT JOIN Image_Placeholders ip ON ip.SourceURL = pi.ImageURL
+            WHERE ip.SourceURL IS NULL
+        """)
+        pending = [row[0] for row in cursor.fetchall()]
+    finally:
+        cursor.close()
+        conn.close()
+
+    executor = _get_executor()
+    formats = available_formats()
+    futures = [(url, executor.submit(render_variants, url, formats)) for url in pending if Path(url).exists()]
+    for url, future in futures:
+        _record(url, future)
+    shutdown()
+    print(f"Generated variants for {len(futures)} image(s)")
@@ -0,0 +1,176 @@
+"""
+Opt-in allocation profiling with tracemalloc.
+
+Off by default: until tracing is started (MEMORY_PROFILE=1 at startup or
+POST /admin/memory/start) MemoryProfileMiddleware only checks
+tracemalloc.is_tracing() per request. The /admin/memory endpoints are
+disabled unless ADMIN_TOKEN is set, and then require it in X-Admin-Token.
+
+While tracing, each request that runs alone (no other request started before
+it finished) records its peak allocation and the memory it left behind, per
+route. Every MEMORY_SNAPSHOT_EVERY-th such request is also bracketed by
+two snapshots whose difference gives the allocation sites that grew, added
+up per route. Concurrent requests share the process-wide counters, so they are only
+counted, not measured; profile on a quiet worker for clean numbers.
+"""
+from collections import Counter
+import linecache
+import os
+import threading
+import tracemalloc
+
+FRAMES = int(os.getenv("MEMORY_PROFILE_FRAMES", "10"))
+SNAPSHOT_EVERY = int(os.getenv("MEMORY_SNAPSHOT_EVERY", "50"))
+TOP_SITES = 20
+
+_lock = threading.Lock()
+_routes = {}
+_baseline = None
+
+IGNORED = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+
+def start(frames: int = FRAMES):
+    """Start tracing (no-op if already tracing) and take the baseline for diff()"""
+    global _baseline
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(frames)
+    _baseline = take_snapshot()
+
+
+def stop():
+    global _baseline
+    tracemalloc.stop()
+    _baseline = None
+    with _lock:
+        _routes.clear()
+
+
+def take_snapshot():
+    return tracemalloc.take_snapshot().filter_traces(IGNORED)
+
+
+def _route_entry(route: str):
+    entry = _routes.get(route)
+    if entry is None:
+        entry = _routes[route] = {
+            "requests": 0, "measured": 0, "peak_max": 0, "peak_total": 0, "retained_total": 0,
+            "snapshots": 0, "site_bytes": Counter(), "site_blocks": Counter(),
+        }
+    return entry
+
+
+def record_unmeasured(route: str):
+    with _lock:
+        _route_entry(route)["requests"] += 1
+
+
+def record(route: str, peak: int, retained: int, growth=None):
+    """A measured request: peak and retained bytes, and optionally a snapshot diff"""
+    with _lock:
+        entry = _route_entry(route)
+        entry["requests"] += 1
+        entry["measured"] += 1
+        entry["peak_max"] = max(entry["peak_max"], peak)
+        entry["peak_total"] += peak
+        entry["retained_total"] += retained
+        if growth is not None:
+            entry["snapshots"] += 1
+            for stat in growth:
+                site = format_site(stat.traceback)
+                entry["site_bytes"][site] += stat.size_diff
+                entry["site_blocks"][site] += stat.count_diff
+
+
+def growth_between(before, after, limit: int = TOP_SITES):
+    """Allocation sites that grew most between two snapshots"""
+    return [stat for stat in after.compare_to(before, "lineno")[:limit] if stat.size_diff > 0]
+
+
+def format_site(traceback):
+    frame = traceback[0]
+    return f"{frame.filename}:{frame.lineno}"
+
+
+def site_stats(stats, limit: int = TOP_SITES):
+    sites = []
+    for stat in stats[:limit]:
+        frame = stat.traceback[0]
+        entry = {
+            "site": format_site(stat.traceback),
+            "code": linecache.getline(frame.filename, frame.lineno).strip(),
+            "bytes": getattr(stat, "size_diff", stat.size),
+            "blocks": getattr(stat, "count_diff", stat.count),
+        }
+        if hasattr(stat, "size_diff"):
+            entry["bytes_now"] = stat.size
+        sites.append(entry)
+    return sites
+
+
+def routes():
+    with _lock:
+        result = {}
+        for route, entry in _routes.items():
+            measured = entry["measured"]
+            result[route] = {
+                "requests": entry["requests"],
+                "measured": measured,
+                "peak_max_kb": round(entry["peak_max"] / 1024, 1),
+                "peak_avg_kb": round(entry["peak_total"] / measured / 1024, 1) if measured else None,
+                "retained_avg_kb": round(entry["retained_total"] / measured / 1024, 1) if measured else None,
+                "snapshots": entry["snapshots"],
+                "growing_sites": [
+                    {"site": site, "bytes": size, "blocks": entry["site_blocks"][site]}
+                    for site, size in entry["site_bytes"].most_common(10) if size > 0
+                ],
+            }
+        return dict(sorted(result.items(), key=lambda item: item[1]["peak_max_kb"], reverse=True))
+
+
+def rss_bytes():
+    """Resident set size from /proc (Linux), or None"""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return None
+
+
+def status():
+    tracing = tracemalloc.is_tracing()
+    current, peak = tracemalloc.get_traced_memory() if tracing else (0, 0)
+    rss = rss_bytes()
+    return {
+        "tracing": tracing,
+        "frames": tracemalloc.get_traceback_limit() if tracing else None,
+        "rss_mb": round(rss / 2**20, 1) if rss else None,
+        "traced_mb": round(current / 2**20, 2),
+        "traced_peak_mb": round(peak / 2**20, 2),
+        "tracemalloc_overhead_mb": round(tracemalloc.get_tracemalloc_memory() / 2**20, 2) if tracing else 0,
+    }
+
+
+def dump(limit: int = TOP_SITES):
+    """Status, per-route stats and the largest allocation sites right now"""
+    result = {**status(), "routes": routes()}
+    if tracemalloc.is_tracing():
+        result["top_sites"] = site_stats(take_snapshot().statistics("lineno"), limit)
+    return result
+
+
+def diff(limit: int = TOP_SITES, reset: bool = False):
+    """Allocation sites that grew since tracing started (or the last reset)"""
+    global _baseline
+    if not tracemalloc.is_tracing() or _baseline is None:
+        return None
+    snapshot = take_snapshot()
+    stats = snapshot.compare_to(_baseline, "lineno")
+    if reset:
+        _baseline = snapshot
+    return site_stats(stats, limit)
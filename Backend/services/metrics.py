@@ -0,0 +1,125 @@
+"""
+Minimal Prometheus-style metrics: counters and histograms with labels, rendered
+in the text exposition format by GET /metrics.
+
+Recording is a dict lookup, a bisect and a few additions under one lock per
+metric, so it is cheap enough for every request and every SQL statement.
+Values that already live elsewhere (pool sizes, cache counters, broker and
+admission state) are not duplicated here; /metrics reads them when scraped.
+"""
+from bisect import bisect_left
+import asyncio
+import threading
+import time
+
+# Seconds; tuned for a small API where most requests finish in a few milliseconds
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+METRICS = []
+
+
+def escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def format_labels(names, values, extra: str = ""):
+    pairs = [f'{name}="{escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+        METRICS.append(self)
+
+    def inc(self, *label_values, amount: float = 1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, format_labels(self.labels, key), value) for key, value in sorted(self._values.items())]
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._values = {}
+        self._lock = threading.Lock()
+        METRICS.append(self)
+
+    def observe(self, value: float, *label_values):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(label_values)
+            if entry is None:
+                # Per-bucket (not cumulative) counts, then sum and count
+                entry = self._values[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def samples(self):
+        with self._lock:
+            values = sorted((key, (list(counts), total, count)) for key, (counts, total, count) in self._values.items())
+        samples = []
+        for key, (counts, total, count) in values:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += bucket_count
+                samples.append((self.name + "_bucket", format_labels(self.labels, key, f'le="{bound}"'), cumulative))
+            samples.append((self.name + "_sum", format_labels(self.labels, key), total))
+            samples.append((self.name + "_count", format_labels(self.labels, key), count))
+        return samples
+
+
+def render_family(name: str, kind: str, help: str, samples):
+    lines = [f"# HELP {name} {help}", f"# TYPE {name} {kind}"]
+    lines.extend(f"{sample}{labels} {value}" for sample, labels, value in samples)
+    return lines
+
+
+def collected(name: str, kind: str, help: str, values, labels=()):
+    """Lines for a value read at scrape time; values is [(label values tuple, value)]"""
+    return render_family(name, kind, help, [(name, format_labels(labels, key), value) for key, value in values])
+
+
+def render(extra_lines=()):
+    lines = []
+    for metric in METRICS:
+        lines.extend(render_family(metric.name, metric.kind, metric.help, metric.samples()))
+    lines.extend(extra_lines)
+    return "\n".join(lines) + "\n"
+
+
+HTTP_REQUESTS = Counter("http_requests_total", "HTTP requests by route template and status", ("method", "route", "status"))
+HTTP_DURATION = Histogram("http_request_duration_seconds", "Time from request to last response byte", ("method", "route"))
+DB_QUERY_DURATION = Histogram("db_query_duration_seconds", "Execution time per registered SQL statement", ("statement",))
+DB_QUERY_ERRORS = Counter("db_query_errors_total", "Failed executions per registered SQL statement", ("statement",))
+DB_POOL_CHECKOUT = Histogram("db_pool_checkout_seconds", "Time to get a pooled connection", ("pool",))
+DB_POOL_EXHAUSTED = Counter("db_pool_exhausted_total", "Checkouts refused because every connection was in use", ("pool",))
+EMAIL_SEND = Histogram("email_send_seconds", "SMTP send time", ("outcome",),
+                       buckets=(0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0))
+EVENT_LOOP_LAG = Histogram("event_loop_lag_seconds", "How late the event loop ran a timer scheduled every interval",
+                           buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5))
+
+
+async def monitor_event_loop(interval: float = 0.5):
+    """Observe event loop lag until cancelled: anything blocking the loop delays this wake-up"""
+    while True:
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        EVENT_LOOP_LAG.observe(max(0.0, time.perf_counter() - started - interval))
@@ -0,0 +1,30 @@
+"""
+Opaque cursors for keyset pagination.
+
+A cursor carries the sort key of the last row of a page (e.g. Upvotes, Date,
+FeedBackID for reviews); the next page continues strictly after it, so paging
+stays an index range scan however deep the client goes, unlike OFFSET.
+"""
+from fastapi import HTTPException
+from datetime import date, datetime
+import base64
+import json
+
+
+def encode_cursor(values: list):
+    """URL-safe token for a sort key; dates are stored as ISO strings"""
+    plain = [value.isoformat() if isinstance(value, (date, datetime)) else value for value in values]
+    raw = json.dumps(plain, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int):
+    """Sort key values from a token made by encode_cursor. Raises HTTPException(400) when malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (ValueError, TypeError):
+        raise HTTPException(400, "Invalid cursor")
+    if not isinstance(values, list) or len(values) != size:
+        raise HTTPException(400, "Invalid cursor")
+    return values
@@ -0,0 +1,267 @@
+"""
+Per-request SQL tracing.
+
+SqlTraceMiddleware opens a Trace for each request in a context variable
+(copied into the threadpool that runs sync endpoints). While it is set,
+get_db() hands out connections whose cursors record every statement, and
+queries.execute records its prepared statements the same way: the SQL, the
+shape of its parameters (types only, never values), the duration and the
+number of rows.
+
+When the request ends:
+- the response carries `Server-Timing: db;dur=..;desc="N queries", app;dur=..`
+- statements slower than SQL_SLOW_MS are printed with their EXPLAIN plan
+  (run afterwards on a separate connection, once per statement per minute)
+- statements that ran more than SQL_REPEAT_THRESHOLD times with the same
+  normalized text are reported as a likely N+1 loop
+
+The most recent slow statements and repeated-statement requests are kept for
+GET /admin/sql-trace, which requires the admin token since it shows SQL text.
+"""
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+import contextvars
+import mysql.connector
+import os
+import re
+import threading
+import time
+
+ENABLED = os.getenv("SQL_TRACE", "1") != "0"
+SLOW_SECONDS = float(os.getenv("SQL_SLOW_MS", "200")) / 1000
+REPEAT_THRESHOLD = int(os.getenv("SQL_REPEAT_THRESHOLD", "10"))
+EXPLAIN_INTERVAL_SECONDS = 60
+
+_current = contextvars.ContextVar("sql_trace", default=None)
+
+recent_slow = deque(maxlen=50)
+recent_repeats = deque(maxlen=50)
+
+_explained = {}
+_explain_lock = threading.Lock()
+_explainer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sql-explain")
+
+_WHITESPACE = re.compile(r"\s+")
+_IN_LIST = re.compile(r"\bIN\s*\((?:\s*%s\s*,)+\s*%s\s*\)", re.IGNORECASE)
+_VALUES_LIST = re.compile(r"(\(\s*(?:%s\s*,\s*)*%s\s*\))(?:\s*,\s*\(\s*(?:%s\s*,\s*)*%s\s*\))+")
+_LITERAL = re.compile(r"'(?:[^'\\]|\\.|'')*'|\b\d+(?:\.\d+)?\b")
+
+
+def normalize(sql: str):
+    """Statement text with literals and variable-length lists collapsed, for grouping"""
+    sql = _WHITESPACE.sub(" ", sql).strip()
+    sql = _IN_LIST.sub("IN (...)", sql)
+    sql = _VALUES_LIST.sub(r"\1, ...", sql)
+    return _LITERAL.sub("?", sql)
+
+
+def params_shape(params):
+    """Parameter types without their values, e.g. "(str, int, str x 40)" """
+    if not params:
+        return "()"
+    if isinstance(params, dict):
+        return "{" + ", ".join(sorted(params)) + "}"
+    shape = []
+    for value in params:
+        name = type(value).__name__
+        if shape and shape[-1][0] == name:
+            shape[-1][1] += 1
+        else:
+            shape.append([name, 1])
+    return "(" + ", ".join(name if count == 1 else f"{name} x {count}" for name, count in shape) + ")"
+
+
+class Statement:
+    __slots__ = ("name", "sql", "params", "seconds", "rows")
+
+    def __init__(self, name: str, sql: str, params, seconds: float, rows: int):
+        self.name = name
+        self.sql = sql
+        self.params = params
+        self.seconds = seconds
+        self.rows = rows
+
+
+class Trace:
+    def __init__(self, method: str, path: str):
+        self.method = method
+        self.path = path
+        self.route = path
+        self.started = time.perf_counter()
+        self.statements = []
+        self._lock = threading.Lock()
+
+    def add(self, name, sql: str, params, seconds: float, rows: int = 0):
+        statement = Statement(name, sql, params, seconds, rows)
+        with self._lock:
+            self.statements.append(statement)
+        return statement
+
+    def db_seconds(self):
+        return sum(statement.seconds for statement in self.statements)
+
+    def server_timing(self):
+        app_ms = (time.perf_counter() - self.started) * 1000
+        count = len(self.statements)
+        return f'db;dur={self.db_seconds() * 1000:.1f};desc="{count} quer{"y" if count == 1 else "ies"}", app;dur={app_ms:.1f}'
+
+
+def start(method: str, path: str):
+    """Open a trace for the current request; returns (trace, token) or (None, None) when disabled"""
+    if not ENABLED:
+        return None, None
+    trace = Trace(method, path)
+    return trace, _current.set(trace)
+
+
+def record(name, sql: str, params, seconds: float, rows: int = 0):
+    """Add a statement to the current request's trace, if any; returns its Statement"""
+    trace = _current.get()
+    if trace is None:
+        return None
+    return trace.add(name, sql, params, seconds, rows)
+
+
+def current_request():
+    """"METHOD /path" of the request being traced on this context, if any"""
+    trace = _current.get()
+    return None if trace is None else f"{trace.method} {trace.path}"
+
+
+def affected_rows(cursor):
+    """Rows changed by DML; 0 for a result set, whose rows are counted as they are fetched"""
+    if cursor.description is not None:
+        return 0
+    return max(cursor.rowcount or 0, 0)
+
+
+class TracedCursor:
+    """Cursor wrapper that records executions and counts fetched rows"""
+
+    def __init__(self, cursor, trace: Trace, statement: Statement = None):
+        self._cursor = cursor
+        self._trace = trace
+        self._statement = statement
+
+    def _run(self, method, sql, params, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return method(sql, params, *args, **kwargs)
+        finally:
+            self._statement = self._trace.add(None, sql, params, time.perf_counter() - start, affected_rows(self._cursor))
+
+    def execute(self, sql, params=(), *args, **kwargs):
+        return self._run(self._cursor.execute, sql, params, *args, **kwargs)
+
+    def executemany(self, sql, params, *args, **kwargs):
+        return self._run(self._cursor.executemany, sql, params, *args, **kwargs)
+
+    def _fetched(self, count: int):
+        if self._statement is not None:
+            self._statement.rows += count
+
+    def fetchall(self):
+        rows = self._cursor.fetchall()
+        self._fetched(len(rows))
+        return rows
+
+    def fetchmany(self, *args, **kwargs):
+        rows = self._cursor.fetchmany(*args, **kwargs)
+        self._fetched(len(rows))
+        return rows
+
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        self._fetched(row is not None)
+        return row
+
+    def __iter__(self):
+        return iter(self.fetchone, None)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class TracedConnection:
+    """Pooled connection wrapper whose cursors are traced"""
+
+    def __init__(self, conn, trace: Trace):
+        self._conn = conn
+        self._trace = trace
+
+    def cursor(self, *args, **kwargs):
+        return TracedCursor(self._conn.cursor(*args, **kwargs), self._trace)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+def wrap_connection(conn):
+    trace = _current.get()
+    return conn if trace is None else TracedConnection(conn, trace)
+
+
+def wrap_cursor(cursor, statement: Statement):
+    """Count the rows read from a cursor that queries.execute already ran"""
+    return cursor if statement is None else TracedCursor(cursor, _current.get(), statement)
+
+
+def _explain(sql: str, params, label: str, seconds: float):
+    from db import get_db
+
+    conn = get_db(read_only=True)
+    cursor = conn.cursor()
+    try:
+        cursor.execute("EXPLAIN " + sql, params)
+        columns = cursor.column_names
+        plan = [dict(zip(columns, row)) for row in cursor.fetchall()]
+        print(f"Slow query ({seconds * 1000:.1f} ms) in {label}: {normalize(sql)}")
+        for row in plan:
+            print(f"    {row}")
+    except mysql.connector.Error as err:
+        print(f"Slow query ({seconds * 1000:.1f} ms) in {label}: {normalize(sql)} (EXPLAIN failed: {err})")
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def finish(trace: Trace, token, route: str = None):
+    """Close the request's trace: report slow and repeated statements"""
+    _current.reset(token)
+    trace.route = route or trace.path
+    label = f"{trace.method} {trace.route}"
+    now = time.monotonic()
+
+    for statement in trace.statements:
+        if statement.seconds < SLOW_SECONDS:
+            continue
+        normalized = normalize(statement.sql)
+        recent_slow.append({"route": label, "statement": statement.name or normalized,
+                            "params": params_shape(statement.params),
+                            "ms": round(statement.seconds * 1000, 1), "rows": statement.rows})
+        batch = isinstance(statement.params, list) and statement.params and isinstance(statement.params[0], (list, tuple))
+        if batch or statement.sql.lstrip()[:6].upper() not in ("SELECT", "UPDATE", "DELETE"):
+            continue
+        with _explain_lock:
+            if now - _explained.get(normalized, -EXPLAIN_INTERVAL_SECONDS) < EXPLAIN_INTERVAL_SECONDS:
+                continue
+            _explained[normalized] = now
+        _explainer.submit(_explain, statement.sql, statement.params, label, statement.seconds)
+
+    counts = Counter(statement.name or normalize(statement.sql) for statement in trace.statements)
+    repeated = {statement: count for statement, count in counts.items() if count > REPEAT_THRESHOLD}
+    if repeated:
+        for statement, count in repeated.items():
+            print(f"Possible N+1 in {label}: {count}x {statement}")
+        recent_repeats.append({"route": label, "statements": len(trace.statements), "repeated": repeated,
+                               "db_ms": round(trace.db_seconds() * 1000, 1)})
+
+
+def snapshot():
+    return {
+        "enabled": ENABLED,
+        "slow_ms": SLOW_SECONDS * 1000,
+        "repeat_threshold": REPEAT_THRESHOLD,
+        "recent_slow": list(recent_slow),
+        "recent_repeats": list(recent_repeats),
+    }
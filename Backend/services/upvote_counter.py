@@ -0,0 +1,129 @@
+"""
+Buffered maintenance of Feedbacks.Upvotes.
+
+Votes only write Review_Upvotes; the reviews they touch are marked dirty here
+and a background thread recomputes their counters every UPVOTE_FLUSH_SECONDS
+in one statement per batch. A popular review therefore gets one counter
+update per interval instead of one per vote, and the votes themselves never
+wait on its row lock.
+
+Counters are recomputed from Review_Upvotes rather than incremented, so a
+flush that fails (or runs in several API processes at once) never makes them
+drift. `python -m services.upvote_counter` recomputes every review.
+"""
+from db import get_db
+import mysql.connector
+import threading
+import os
+
+FLUSH_SECONDS = float(os.getenv("UPVOTE_FLUSH_SECONDS", "2"))
+FLUSH_BATCH_SIZE = 500
+
+_dirty = set()
+_lock = threading.Lock()
+_stop = threading.Event()
+_thread = None
+
+stats = {"flushes": 0, "reviews_flushed": 0, "failures": 0}
+
+
+def _run():
+    while not _stop.wait(FLUSH_SECONDS):
+        try:
+            flush()
+        except Exception as err:
+            # flush() has already put the IDs back; keep the thread alive for the next round
+            print(f"Upvote counter flush failed: {err}")
+
+
+def mark_dirty(feedback_id: int):
+    """Queue a review's counter for the next flush. Call after the vote is committed."""
+    global _thread
+    with _lock:
+        _dirty.add(feedback_id)
+        if _thread is None and not _stop.is_set():
+            _thread = threading.Thread(target=_run, name="upvote-flush", daemon=True)
+            _thread.start()
+
+
+def pending():
+    with _lock:
+        return len(_dirty)
+
+
+def recount(cursor, feedback_ids: list):
+    """Set Upvotes from Review_Upvotes for the given reviews"""
+    markers = ", ".join(["%s"] * len(feedback_ids))
+    cursor.execute(f"""
+        UPDATE Feedbacks f
+        SET Upvotes = (SELECT COUNT(*) FROM Review_Upvotes r WHERE r.FeedBackID = f.FeedBackID)
+        WHERE f.FeedBackID IN ({markers})
+    """, feedback_ids)
+
+
+def flush():
+    """Write the buffered counters. Returns the number of reviews updated."""
+    with _lock:
+        feedback_ids = sorted(_dirty)
+        _dirty.clear()
+    if not feedback_ids:
+        return 0
+
+    conn = None
+    cursor = None
+
+    try:
+        conn = get_db()
+        cursor = conn.cursor()
+        # Sorted batches keep lock order stable between concurrent flushes
+        for start in range(0, len(feedback_ids), FLUSH_BATCH_SIZE):
+            recount(cursor, feedback_ids[start:start + FLUSH_BATCH_SIZE])
+        conn.commit()
+        stats["flushes"] += 1
+        stats["reviews_flushed"] += len(feedback_ids)
+        return len(feedback_ids)
+    except Exception as err:
+        # Includes PoolError from get_db(): the IDs must survive until a round that can write them
+        stats["failures"] += 1
+        with _lock:
+            _dirty.update(feedback_ids)
+        if conn is not None:
+            try:
+                conn.rollback()
+            except mysql.connector.Error:
+                pass
+        if not isinstance(err, mysql.connector.Error):
+            raise
+        print(f"Failed to flush upvote counters, retrying next round: {err}")
+        return 0
+    finally:
+        if cursor is not None:
+            cursor.close()
+        if conn is not None:
+            conn.close()
+
+
+def shutdown():
+    """Stop the flush thread and write whatever is still buffered"""
+    global _thread
+    _stop.set()
+    if _thread is not None:
+        _thread.join(timeout=FLUSH_SECONDS + 5)
+        _thread = None
+    flush()
+
+
+if __name__ == "__main__":
+    # Full recount: python -m services.upvote_counter
+    conn = get_db()
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT FeedBackID FROM Feedbacks ORDER BY FeedBackID")
+        feedback_ids = [row[0] for row in cursor.fetchall()]
+        for start in range(0, len(feedback_ids), FLUSH_BATCH_SIZE):
+            recount(cursor, feedback_ids[start:start + FLUSH_BATCH_SIZE])
+            conn.commit()
+        print(f"Recounted upvotes of {len(feedback_ids)} reviews")
+    finally:
+        cursor.close()
+        conn.close()
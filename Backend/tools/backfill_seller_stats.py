@@ -0,0 +1,105 @@
+"""
+Rebuild Seller_Daily_Stats from order and review history.
+
+    python -m tools.backfill_seller_stats                      # everything
+    python -m tools.backfill_seller_stats --start 2025-01-01   # from a date on
+
+The chosen days are deleted and recomputed one month per transaction, so it
+can be rerun safely and repairs any drift. Sales are credited to the seller
+recorded on the order line (Order_Details.SellerEmail) and valued at the
+current price; reviews go to the product's only seller, if it has one. These
+are the rules the trg_seller_stats_* triggers apply. Rows written by the
+triggers while a month is being rebuilt are replaced by it, so run it when
+few orders are coming in.
+"""
+from datetime import date, timedelta
+from db import get_db
+import argparse
+import time
+
+DELETE_RANGE = """
+    DELETE FROM Seller_Daily_Stats
+    WHERE StatDate >= %s AND StatDate < %s
+"""
+
+INSERT_SALES = """
+    INSERT INTO Seller_Daily_Stats (EmailID, StatDate, PID, UnitsSold, Revenue, OrderCount)
+    SELECT od.SellerEmail, DATE(o.OrderDate), od.PID,
+           SUM(od.Order_Qty), SUM(od.Order_Qty * p.Price), COUNT(*)
+    FROM Order_Details od
+    INNER JOIN Orders o ON o.OrderID = od.OrderID
+    INNER JOIN Products p ON p.PID = od.PID
+    WHERE o.OrderDate >= %s AND o.OrderDate < %s
+      AND od.SellerEmail IS NOT NULL
+    GROUP BY od.SellerEmail, DATE(o.OrderDate), od.PID
+    ON DUPLICATE KEY UPDATE
+        UnitsSold = VALUES(UnitsSold),
+        Revenue = VALUES(Revenue),
+        OrderCount = VALUES(OrderCount)
+"""
+
+INSERT_REVIEWS = """
+    INSERT INTO Seller_Daily_Stats (EmailID, StatDate, PID, ReviewCount, RatingSum)
+    SELECT seller.EmailID, f.Date, f.PID, COUNT(*), SUM(f.Rating)
+    FROM Feedbacks f
+    INNER JOIN (SELECT PID, MIN(EmailID) as EmailID FROM Lists GROUP BY PID HAVING COUNT(*) = 1) seller
+        ON seller.PID = f.PID
+    WHERE f.Date >= %s AND f.Date < %s
+    GROUP BY seller.EmailID, f.Date, f.PID
+    ON DUPLICATE KEY UPDATE
+        ReviewCount = VALUES(ReviewCount),
+        RatingSum = VALUES(RatingSum)
+"""
+
+
+def next_month(day: date):
+    return (day.replace(day=1) + timedelta(days=32)).replace(day=1)
+
+
+def history_start(cursor):
+    # Reviews without a known date were set to 1000-01-01 (migration 007)
+    cursor.execute("""
+        SELECT LEAST(COALESCE((SELECT MIN(DATE(OrderDate)) FROM Orders), CURDATE()),
+                     COALESCE((SELECT MIN(Date) FROM Feedbacks WHERE Date > '1000-01-01'), CURDATE()))
+    """)
+    return cursor.fetchone()[0]
+
+
+def backfill(start: date = None, end: date = None):
+    """Recompute [start, end] month by month; returns the number of rollup rows written"""
+    conn = get_db()
+    cursor = conn.cursor()
+    written = 0
+
+    try:
+        start = start or history_start(cursor)
+        end = end or date.today()
+        month = start
+        while month <= end:
+            stop = min(next_month(month), end + timedelta(days=1))
+            cursor.execute(DELETE_RANGE, (month, stop))
+            cursor.execute(INSERT_SALES, (month, stop))
+            sales = cursor.rowcount
+            cursor.execute(INSERT_REVIEWS, (month, stop))
+            conn.commit()
+            written += sales + cursor.rowcount
+            print(f"{month:%Y-%m}: {sales} sales rows, {cursor.rowcount} review rows")
+            month = stop
+        return written
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--start", type=date.fromisoformat, help="First day to rebuild (default: oldest order or review)")
+    parser.add_argument("--end", type=date.fromisoformat, help="Last day to rebuild (default: today)")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    rows = backfill(args.start, args.end)
+    print(f"Wrote {rows} rollup rows in {time.perf_counter() - started:.1f}s")
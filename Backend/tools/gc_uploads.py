@@ -0,0 +1,186 @@
+"""
+Garbage-collect upload files that no Product_Images row references.
+
+Uploads are written before their Product_Images row exists, so files can be
+orphaned by abandoned listings and failed /product-images/add calls.
+
+    python -m tools.gc_uploads                  # report only
+    python -m tools.gc_uploads --delete         # remove orphans
+    python -m tools.gc_uploads --grace-hours 48 --batch-size 2000
+
+The directory tree is streamed with os.scandir and checked against the
+database in fixed-size batches, so memory use does not grow with the number
+of files. Files newer than the grace period are skipped because their upload
+may still be in flight.
+
+The grace period does not protect an old file that a new upload was
+deduplicated onto, so with --delete each batch's orphans are re-checked
+under locks before anything is removed: the Image_Blobs rows of the files
+(or of their source image, for variants) are locked FOR UPDATE and only
+those with RefCount = 0 are kept, Product_Images is re-read FOR SHARE, and
+the rows are deleted and committed before the files are unlinked. A
+concurrent /product-images/add must update the same blob row
+(image_store.acquire), so it either committed first and the file is kept,
+or it waits and then finds the blob gone and is rejected.
+"""
+from pathlib import Path
+from db import get_db
+import argparse
+import os
+import time
+
+UPLOAD_ROOT = "uploads/products"
+
+
+def walk_files(root: str):
+    """Yield (relative_url, DirEntry) for every file under root, depth first"""
+    with os.scandir(root) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                yield from walk_files(entry.path)
+            elif entry.is_file(follow_symlinks=False):
+                yield entry.path.replace(os.sep, "/"), entry
+
+
+def referenced_urls(cursor, urls: list):
+    """Subset of urls still referenced by Product_Images, directly or as a variant of a referenced image"""
+    markers = ", ".join(["%s"] * len(urls))
+    cursor.execute(f"""
+        SELECT ImageURL FROM Product_Images WHERE ImageURL IN ({markers})
+        UNION
+        SELECT v.VariantURL
+        FROM Image_Variants v
+        INNER JOIN Product_Images pi ON pi.ImageURL = v.SourceURL
+        WHERE v.VariantURL IN ({markers})
+    """, urls + urls)
+    return {row[0] for row in cursor.fetchall()}
+
+
+def lock_unreferenced(cursor, urls: list):
+    """Subset of urls that are still unreferenced, with their blob rows and referencing
+    rows locked until the transaction ends"""
+    markers = ", ".join(["%s"] * len(urls))
+    cursor.execute(f"""
+        SELECT ImageURL, RefCount FROM Image_Blobs WHERE ImageURL IN ({markers}) FOR UPDATE
+    """, urls)
+    in_use = {url for url, ref_count in cursor.fetchall() if ref_count > 0}
+    cursor.execute(f"""
+        SELECT v.VariantURL, b.RefCount
+        FROM Image_Variants v
+        INNER JOIN Image_Blobs b ON b.ImageURL = v.SourceURL
+        WHERE v.VariantURL IN ({markers})
+        FOR UPDATE
+    """, urls)
+    in_use |= {url for url, ref_count in cursor.fetchall() if ref_count > 0}
+
+    # Legacy (untracked) images and stale RefCounts: the rows themselves decide
+    cursor.execute(f"SELECT ImageURL FROM Product_Images WHERE ImageURL IN ({markers}) FOR SHARE", urls)
+    in_use |= {row[0] for row in cursor.fetchall()}
+    cursor.execute(f"""
+        SELECT v.VariantURL
+        FROM Image_Variants v
+        INNER JOIN Product_Images pi ON pi.ImageURL = v.SourceURL
+        WHERE v.VariantURL IN ({markers})
+        FOR SHARE
+    """, urls)
+    in_use |= {row[0] for row in cursor.fetchall()}
+    return [url for url in urls if url not in in_use]
+
+
+def forget_images(cursor, urls: list):
+    """Drop blob, variant and placeholder rows of removed source images"""
+    markers = ", ".join(["%s"] * len(urls))
+    cursor.execute(f"DELETE FROM Image_Blobs WHERE ImageURL IN ({markers}) AND RefCount = 0", urls)
+    cursor.execute(f"DELETE FROM Image_Variants WHERE SourceURL IN ({markers})", urls)
+    cursor.execute(f"DELETE FROM Image_Placeholders WHERE SourceURL IN ({markers})", urls)
+
+
+def reconcile_ref_counts(cursor):
+    """Reset RefCount from Product_Images, repairing counts left wrong by older code or interrupted requests"""
+    cursor.execute("""
+        UPDATE Image_Blobs b
+        SET RefCount = (SELECT COUNT(*) FROM Product_Images pi WHERE pi.ImageURL = b.ImageURL)
+    """)
+    return cursor.rowcount
+
+
+def collect(root: str = UPLOAD_ROOT, grace_seconds: float = 24 * 3600,
+            batch_size: int = 1000, delete: bool = False, verbose: bool = True):
+    """Scan root and report (or delete) orphaned files. Returns summary counters."""
+    summary = {"scanned": 0, "skipped_recent": 0, "orphans": 0, "orphan_bytes": 0, "deleted": 0,
+               "referenced_meanwhile": 0}
+    if not Path(root).is_dir():
+        return summary
+
+    cutoff = time.time() - grace_seconds
+    conn = get_db()
+    cursor = conn.cursor()
+
+    def flush(batch):
+        # Unlocked first pass; only its orphans are locked and checked again
+        referenced = referenced_urls(cursor, [url for url, _ in batch])
+        orphans = {url: entry for url, entry in batch if url not in referenced}
+        if not orphans:
+            return
+        if delete:
+            try:
+                unreferenced = lock_unreferenced(cursor, list(orphans))
+                if unreferenced:
+                    forget_images(cursor, unreferenced)
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            summary["referenced_meanwhile"] += len(orphans) - len(unreferenced)
+            orphans = {url: orphans[url] for url in unreferenced}
+
+        for url, entry in orphans.items():
+            summary["orphans"] += 1
+            summary["orphan_bytes"] += entry.stat(follow_symlinks=False).st_size
+            if verbose:
+                print(("deleting " if delete else "orphan   ") + url)
+            if delete:
+                # Rows are gone and committed: an add now finds no blob and is rejected
+                try:
+                    os.unlink(entry.path)
+                    summary["deleted"] += 1
+                except FileNotFoundError:
+                    pass
+                except OSError as e:
+                    print(f"Failed to delete {url}: {e}")
+
+    try:
+        batch = []
+        for url, entry in walk_files(root):
+            summary["scanned"] += 1
+            if entry.stat(follow_symlinks=False).st_mtime > cutoff:
+                summary["skipped_recent"] += 1
+                continue
+            batch.append((url, entry))
+            if len(batch) >= batch_size:
+                flush(batch)
+                batch = []
+        if batch:
+            flush(batch)
+
+        if delete:
+            summary["reconciled_blobs"] = reconcile_ref_counts(cursor)
+            conn.commit()
+
+        return summary
+    finally:
+        cursor.close()
+        conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--root", default=UPLOAD_ROOT)
+    parser.add_argument("--grace-hours", type=float, default=24.0)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--delete", action="store_true", help="Remove orphans instead of only reporting them")
+    parser.add_argument("--quiet", action="store_true", help="Only print the summary")
+    args = parser.parse_args()
+
+    result = collect(args.root, args.grace_hours * 3600, args.batch_size, args.delete, not args.quiet)
+    print(result)
@@ -0,0 +1,31 @@
+"""
+Bulk-import a product catalog from CSV or NDJSON.
+
+    python -m tools.import_catalog textbooks.csv --seller seller@campus.edu
+    python -m tools.import_catalog listings.ndjson --chunk-size 2000
+
+One product per row/line. Columns (CSV header or NDJSON keys):
+ProductName, Description, Price, and optionally PID, EmailID (seller, else
+--seller), Stock (default 1), CategoryIDs and ImageURLs ('|'-separated in
+CSV, arrays in NDJSON). Image URLs must already be uploaded.
+"""
+from pathlib import Path
+from services import catalog_import
+import argparse
+import json
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", type=Path)
+    parser.add_argument("--format", choices=["csv", "ndjson"], help="Default: from the file extension")
+    parser.add_argument("--seller", help="Seller EmailID for rows without one")
+    parser.add_argument("--chunk-size", type=int, default=catalog_import.CHUNK_SIZE)
+    args = parser.parse_args()
+
+    fmt = args.format or ("csv" if args.path.suffix.lower() == ".csv" else "ndjson")
+    with open(args.path, "rb") as stream:
+        report = catalog_import.import_stream(stream, fmt, args.seller, args.chunk_size)
+
+    for error in report.pop("errors"):
+        print(f"row {error['row']}: {error['error']}")
+    print(json.dumps(report, indent=2))
@@ -0,0 +1,306 @@
+"""
+EXPLAIN every registered router query and flag full scans, filesorts and temporary tables.
+
+Run it against a seeded database (see benchmarks/) so the optimizer sees
+realistic cardinalities. Parameters are sampled from the data itself: for
+each statement a sampling query picks a representative (busy) key, e.g. the
+product with the most reviews for feedback.page_first.
+
+    python -m tools.index_advisor                      # report
+    python -m tools.index_advisor --save before.json   # keep timings
+    python -m tools.migrate
+    python -m tools.index_advisor --compare before.json
+
+SELECTs are explained and timed. UPDATEs and DELETEs are only explained
+(EXPLAIN does not run them) and INSERTs are skipped. The report ends with
+what it did not cover: INSERTs, statements without a sampler, and SQL
+literals still executed inline in routers/ instead of being registered.
+"""
+from pathlib import Path
+from db import get_db
+import queries
+import argparse
+import importlib
+import json
+import re
+import statistics
+import time
+
+ROUTERS_DIR = Path(__file__).resolve().parents[1] / "routers"
+
+BUSIEST_PRODUCT = "SELECT PID FROM Feedbacks GROUP BY PID ORDER BY COUNT(*) DESC LIMIT 1"
+LISTED_PRODUCT = "SELECT PID FROM Lists GROUP BY PID ORDER BY COUNT(*) DESC LIMIT 1"
+BUSIEST_SELLER = "SELECT EmailID FROM Lists GROUP BY EmailID ORDER BY COUNT(*) DESC LIMIT 1"
+SELLER_LAST_MONTH = """
+    SELECT EmailID, CURDATE() - INTERVAL 29 DAY, CURDATE()
+    FROM Seller_Daily_Stats GROUP BY EmailID ORDER BY COUNT(*) DESC LIMIT 1
+"""
+BUSIEST_BUYER = "SELECT EmailID FROM Orders GROUP BY EmailID ORDER BY COUNT(*) DESC LIMIT 1"
+BIGGEST_ORDER = "SELECT OrderID FROM Order_Details GROUP BY OrderID ORDER BY COUNT(*) DESC LIMIT 1"
+IMAGED_PRODUCT = "SELECT PID FROM Product_Images GROUP BY PID ORDER BY COUNT(*) DESC LIMIT 1"
+SELLER_LISTING = f"SELECT EmailID, PID FROM Lists WHERE EmailID = ({BUSIEST_SELLER}) LIMIT 1"
+PRODUCT_IMAGE = f"SELECT ImageID FROM Product_Images WHERE PID = ({IMAGED_PRODUCT}) LIMIT 1"
+
+# Statement name -> query returning one row of parameters for it
+SAMPLE_PARAMS = {
+    "products.get": LISTED_PRODUCT,
+    "products.sellers": LISTED_PRODUCT,
+    "lists.user": BUSIEST_SELLER,
+    "lists.product_sellers": LISTED_PRODUCT,
+    "stock.total": LISTED_PRODUCT,
+    "orders.user": BUSIEST_BUYER,
+    "orders.get": BIGGEST_ORDER,
+    "orders.items": BIGGEST_ORDER,
+    "feedback.page_first": "SELECT PID, 10 FROM Feedbacks GROUP BY PID ORDER BY COUNT(*) DESC LIMIT 1",
+    "feedback.page_after": f"""
+        SELECT PID, Upvotes, Upvotes, Date, Date, FeedBackID, 10
+        FROM Feedbacks
+        WHERE PID = ({BUSIEST_PRODUCT})
+        ORDER BY Upvotes DESC, Date DESC, FeedBackID DESC
+        LIMIT 1 OFFSET 10
+    """,
+    "feedback.summary": BUSIEST_PRODUCT,
+    "upvotes.state": "SELECT VoterEmail, FeedBackID FROM Review_Upvotes LIMIT 1",
+    "upvotes.count": "SELECT FeedBackID FROM Review_Upvotes GROUP BY FeedBackID ORDER BY COUNT(*) DESC LIMIT 1",
+    "upvotes.voted": "SELECT VoterEmail, FeedBackID FROM Review_Upvotes LIMIT 1",
+    "upvotes.delete": "SELECT UpvoteID FROM Review_Upvotes LIMIT 1",
+    "product_images.product": IMAGED_PRODUCT,
+    "product_images.product_exists": IMAGED_PRODUCT,
+    "product_images.next_order": IMAGED_PRODUCT,
+    "product_images.product_next_order": IMAGED_PRODUCT,
+    "product_images.url": PRODUCT_IMAGE,
+    "product_images.delete": PRODUCT_IMAGE,
+    "product_images.count_owned": f"SELECT PID, ImageID FROM Product_Images WHERE PID = ({IMAGED_PRODUCT}) LIMIT 1",
+    "product_images.reorder": f"""
+        SELECT ImageID, DisplayOrder, PID, ImageID FROM Product_Images WHERE PID = ({IMAGED_PRODUCT}) LIMIT 1
+    """,
+    "products.update_price": "SELECT Price, PID FROM Products LIMIT 1",
+    "lists.user_exists": BUSIEST_SELLER,
+    "lists.count_listings": LISTED_PRODUCT,
+    "lists.count_order_lines": LISTED_PRODUCT,
+    "lists.update": f"SELECT Stock, EmailID, PID FROM Lists WHERE EmailID = ({BUSIEST_SELLER}) LIMIT 1",
+    "lists.remove": SELLER_LISTING,
+    "lists.delete_product": LISTED_PRODUCT,
+    "lists.batch_lock_products": SELLER_LISTING,
+    "lists.batch_lock_listings": SELLER_LISTING,
+    "lists.batch_set_stock": f"SELECT PID, Stock, EmailID FROM Lists WHERE EmailID = ({BUSIEST_SELLER}) LIMIT 1",
+    "lists.batch_remove": SELLER_LISTING,
+    "lists.batch_orphans": LISTED_PRODUCT,
+    "lists.batch_delete_orphans": LISTED_PRODUCT,
+    "lists.batch_remaining_products": LISTED_PRODUCT,
+    "lists.batch_product_image_urls": IMAGED_PRODUCT,
+    "lists.product_image_urls": IMAGED_PRODUCT,
+    "live.snapshot": LISTED_PRODUCT,
+    "payments.user_name": BUSIEST_BUYER,
+    "payments.order_owner": BIGGEST_ORDER,
+    "payments.order_summary": BIGGEST_ORDER,
+    "payments.order_lines": BIGGEST_ORDER,
+    "payments.order_total": BIGGEST_ORDER,
+    "export.listings": BUSIEST_SELLER,
+    "export.user_orders": BUSIEST_BUYER,
+    "users.get": BUSIEST_SELLER,
+    "users.login": BUSIEST_SELLER,
+    "users.student": "SELECT EmailID FROM Student LIMIT 1",
+    "users.faculty": "SELECT EmailID FROM Faculty LIMIT 1",
+    "analytics.seller_totals": SELLER_LAST_MONTH,
+    "analytics.seller_daily": SELLER_LAST_MONTH,
+    "analytics.seller_products": SELLER_LAST_MONTH,
+}
+
+
+def product_list_variants(cursor):
+    """Filter/sort combinations of GET /products/ besides the registered default"""
+    from routers.products import build_product_list_query, PRODUCT_LIST_FIELDS
+
+    cursor.execute("SELECT CategoryID FROM Product_Category GROUP BY CategoryID ORDER BY COUNT(*) DESC LIMIT 1")
+    row = cursor.fetchone()
+    all_fields = list(PRODUCT_LIST_FIELDS)
+    grid_fields = ["PID", "ProductName", "Price", "PrimaryImage"]
+
+    variants = {
+        "products.list[price_asc]": build_product_list_query(all_fields, sort_by="price_asc"),
+        "products.list[price_range]": build_product_list_query(all_fields, min_price=100, max_price=500),
+        "products.list[search]": build_product_list_query(all_fields, search="book"),
+        "products.list[grid]": build_product_list_query(grid_fields, sort_by="price_desc"),
+    }
+    if row:
+        variants["products.list[category]"] = build_product_list_query(all_fields, category_id=row[0])
+    return variants
+
+
+def in_list_variants(cursor, size: int = 20):
+    """IN-list statements at a typical batch size; only their one-item variant is registered"""
+    from routers.lists import lock_listings_query, lock_products_query, orphans_query
+    from routers.live import snapshot_query
+    from routers.upvotes import voted_query
+
+    cursor.execute(f"SELECT EmailID, PID FROM Lists WHERE EmailID = ({BUSIEST_SELLER}) LIMIT {size}")
+    listings = cursor.fetchall()
+    cursor.execute(f"SELECT PID FROM Lists GROUP BY PID ORDER BY COUNT(*) DESC LIMIT {size}")
+    pids = [row[0] for row in cursor.fetchall()]
+    cursor.execute(f"""
+        SELECT VoterEmail, FeedBackID FROM Review_Upvotes
+        WHERE VoterEmail = (SELECT VoterEmail FROM Review_Upvotes GROUP BY VoterEmail ORDER BY COUNT(*) DESC LIMIT 1)
+        LIMIT {size}
+    """)
+    votes = cursor.fetchall()
+
+    variants = {}
+    if listings:
+        seller_pids = [pid for _, pid in listings]
+        params = (listings[0][0], *seller_pids)
+        variants[f"lists.batch_lock_listings[{len(seller_pids)}]"] = (lock_listings_query(len(seller_pids)), params)
+        variants[f"lists.batch_lock_products[{len(seller_pids)}]"] = (lock_products_query(len(seller_pids)), params)
+    if pids:
+        variants[f"lists.batch_orphans[{len(pids)}]"] = (orphans_query(len(pids)), tuple(pids))
+        variants[f"live.snapshot[{len(pids)}]"] = (snapshot_query(len(pids)), tuple(pids))
+    if votes:
+        feedback_ids = [feedback_id for _, feedback_id in votes]
+        variants[f"upvotes.voted[{len(feedback_ids)}]"] = (voted_query(len(feedback_ids)), (votes[0][0], *feedback_ids))
+    return variants
+
+
+# cursor.execute("..."), cursor.executemany(f"""...""") and the like
+INLINE_SQL = re.compile(r"""\.execute(?:many)?\(\s*[rf]?["']""")
+
+
+def inline_statements():
+    """"routers/file.py:line" of every SQL literal executed directly instead of through queries"""
+    found = []
+    for path in sorted(ROUTERS_DIR.glob("*.py")):
+        source = path.read_text(encoding="utf-8")
+        for match in INLINE_SQL.finditer(source):
+            found.append(f"routers/{path.name}:{source.count(chr(10), 0, match.start()) + 1}")
+    return found
+
+
+def load_statements():
+    """Import every router so its statements are registered"""
+    for path in sorted(ROUTERS_DIR.glob("*.py")):
+        importlib.import_module(f"routers.{path.stem}")
+    return dict(queries.STATEMENTS)
+
+
+def sample_params(cursor, name: str, sql: str):
+    """Parameters for a statement, or None when it takes some but none can be sampled"""
+    if "%s" not in sql:
+        return ()
+    sampler = SAMPLE_PARAMS.get(name)
+    if sampler is None:
+        return None
+    cursor.execute(sampler)
+    row = cursor.fetchone()
+    return tuple(row) if row else None
+
+
+def explain(cursor, sql: str, params):
+    """EXPLAIN rows plus the problems found in them"""
+    cursor.execute("EXPLAIN " + sql, params)
+    columns = cursor.column_names
+    rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    problems = []
+    for row in rows:
+        table = row.get("table")
+        extra = row.get("Extra") or ""
+        if row.get("type") == "ALL":
+            problems.append(f"full scan of {table} (~{row.get('rows')} rows)")
+        if "Using filesort" in extra:
+            problems.append(f"filesort on {table}")
+        if "Using temporary" in extra:
+            problems.append(f"temporary table for {table}")
+    return rows, problems
+
+
+def time_query(cursor, sql: str, params, repeat: int):
+    """Median wall time in milliseconds"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        cursor.execute(sql, params)
+        cursor.fetchall()
+        samples.append((time.perf_counter() - start) * 1000)
+    return round(statistics.median(samples), 3)
+
+
+def advise(repeat: int = 20, verbose: bool = False):
+    """{label: {"problems": [...], "median_ms": float}} for every statement the routers run.
+    Writes get median_ms None; what could not be explained gets {"skipped": reason}."""
+    statements = load_statements()
+    conn = get_db()
+    cursor = conn.cursor()
+    report = {}
+
+    try:
+        work = {}
+        for name, sql in sorted(statements.items()):
+            verb = sql.lstrip().split(None, 1)[0].upper()
+            if verb not in ("SELECT", "UPDATE", "DELETE"):
+                report[name] = {"skipped": f"{verb} ... VALUES, nothing to look up"}
+                continue
+            params = sample_params(cursor, name, sql)
+            if params is None:
+                report[name] = {"skipped": "no sample parameters (empty table or no sampler)"}
+                continue
+            work[name] = (sql, params)
+        work.update(product_list_variants(cursor))
+        work.update(in_list_variants(cursor))
+
+        for label, (sql, params) in work.items():
+            rows, problems = explain(cursor, sql, params)
+            # Writes are explained only; running them would change the data
+            is_select = sql.lstrip().upper().startswith("SELECT")
+            report[label] = {"problems": problems,
+                             "median_ms": time_query(cursor, sql, params, repeat) if is_select else None}
+            if verbose:
+                report[label]["explain"] = rows
+        # Release the rows the FOR UPDATE statements locked
+        conn.rollback()
+
+        for location in inline_statements():
+            report[location] = {"skipped": "inline SQL, not registered in queries.py"}
+        return report
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def print_report(report: dict, before: dict = None):
+    for label, entry in report.items():
+        if "skipped" in entry:
+            continue
+        if entry["median_ms"] is None:
+            timing = "not timed (write)"
+        else:
+            timing = f"{entry['median_ms']:.3f} ms"
+        previous = (before or {}).get(label, {}).get("median_ms")
+        if previous is not None and entry["median_ms"] is not None:
+            change = (previous / entry["median_ms"]) if entry["median_ms"] else float("inf")
+            timing = f"{previous:.3f} ms -> {entry['median_ms']:.3f} ms ({change:.1f}x)"
+        status = "WARN" if entry["problems"] else "OK  "
+        print(f"{status} {label}: {timing}")
+        for problem in entry["problems"]:
+            print(f"       - {problem}")
+        for row in entry.get("explain", []):
+            print(f"       {row}")
+
+    uncovered = {label: entry["skipped"] for label, entry in report.items() if "skipped" in entry}
+    if uncovered:
+        print(f"\nNot covered ({len(uncovered)}):")
+        for label, reason in uncovered.items():
+            print(f"SKIP {label}: {reason}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=20, help="Executions per query for the median timing")
+    parser.add_argument("--save", type=Path, help="Write the report as JSON (e.g. before applying indexes)")
+    parser.add_argument("--compare", type=Path, help="Show timings against a report saved with --save")
+    parser.add_argument("--verbose", action="store_true", help="Print the raw EXPLAIN rows")
+    args = parser.parse_args()
+
+    result = advise(args.repeat, args.verbose)
+    before = json.loads(args.compare.read_text()) if args.compare else None
+    print_report(result, before)
+    if args.save:
+        args.save.write_text(json.dumps(result, indent=2, default=str))
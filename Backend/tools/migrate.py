@@ -0,0 +1,113 @@
+"""
+Apply the versioned schema migrations in Database/migrations.
+
+Files are named NNN_description.sql and applied in version order. Applied
+versions are recorded in Schema_Migrations, so each one runs once; the
+migrations themselves are written to be idempotent as well, so re-running one
+by hand (or on a database created from a newer create_database.sql) is safe.
+
+    python -m tools.migrate             # apply pending migrations
+    python -m tools.migrate --status    # list applied / pending versions
+
+Files may use the mysql client's DELIMITER directive for procedures and
+triggers; it is handled here since the connector does not understand it.
+"""
+from pathlib import Path
+from db import get_db
+import argparse
+import re
+
+MIGRATIONS_DIR = Path(__file__).resolve().parents[2] / "Database" / "migrations"
+FILENAME_PATTERN = re.compile(r"^(\d+)_(\w+)\.sql$")
+
+
+def find_migrations(directory: Path = MIGRATIONS_DIR):
+    """[(version, name, path)] sorted by version"""
+    migrations = []
+    for path in directory.glob("*.sql"):
+        match = FILENAME_PATTERN.match(path.name)
+        if match:
+            migrations.append((int(match.group(1)), match.group(2), path))
+    return sorted(migrations)
+
+
+def split_statements(sql: str):
+    """Split a script into statements, honouring DELIMITER lines and skipping comments"""
+    statements = []
+    delimiter = ";"
+    current = []
+
+    for line in sql.splitlines():
+        stripped = line.strip()
+        if stripped.upper().startswith("DELIMITER "):
+            delimiter = stripped.split(None, 1)[1]
+            continue
+        if not current and (not stripped or stripped.startswith("--")):
+            continue
+
+        current.append(line)
+        if stripped.endswith(delimiter):
+            statement = "\n".join(current).strip()
+            statements.append(statement[:-len(delimiter)].strip())
+            current = []
+
+    if current and "\n".join(current).strip():
+        statements.append("\n".join(current).strip())
+    return statements
+
+
+def applied_versions(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS Schema_Migrations (
+            Version INT PRIMARY KEY,
+            Name VARCHAR(100) NOT NULL,
+            AppliedAt DATETIME DEFAULT CURRENT_TIMESTAMP
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """)
+    cursor.execute("SELECT Version FROM Schema_Migrations")
+    return {row[0] for row in cursor.fetchall()}
+
+
+def apply(version: int, name: str, path: Path, cursor):
+    for statement in split_statements(path.read_text(encoding="utf-8")):
+        cursor.execute(statement)
+        if cursor.with_rows:
+            cursor.fetchall()
+    cursor.execute("""
+        INSERT IGNORE INTO Schema_Migrations (Version, Name) VALUES (%s, %s)
+    """, (version, name))
+
+
+def migrate(directory: Path = MIGRATIONS_DIR, status_only: bool = False):
+    """Apply pending migrations. Returns the versions applied."""
+    conn = get_db()
+    cursor = conn.cursor()
+
+    try:
+        done = applied_versions(cursor)
+        applied = []
+        for version, name, path in find_migrations(directory):
+            if version in done:
+                print(f"applied  {version:03d} {name}")
+                continue
+            if status_only:
+                print(f"pending  {version:03d} {name}")
+                continue
+            print(f"applying {version:03d} {name} ...")
+            # DDL commits implicitly in MySQL, which is why migrations must be idempotent
+            apply(version, name, path, cursor)
+            conn.commit()
+            applied.append(version)
+        return applied
+    finally:
+        cursor.close()
+        conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dir", type=Path, default=MIGRATIONS_DIR)
+    parser.add_argument("--status", action="store_true", help="Only list applied and pending migrations")
+    args = parser.parse_args()
+
+    migrate(args.dir, args.status)
@@ -1,6 +1,7 @@
 -- ============================================
 -- Function: AvgProductRating
 -- Returns average rating of a given product
+-- (read from Product_Rating_Summary, no Feedbacks scan)
 -- ============================================
 
 DELIMITER $$
@@ -11,8 +12,8 @@ DETERMINISTIC
 BEGIN
     DECLARE avgR DECIMAL(3,2);
 
-    SELECT AVG(Rating) INTO avgR
-    FROM Feedbacks
+    SELECT RatingSum / NULLIF(ReviewCount, 0) INTO avgR
+    FROM Product_Rating_Summary
     WHERE PID = p_PID;
 
     RETURN avgR;
@@ -69,59 +69,197 @@ DELIMITER ;
 
 
 -- ============================================
--- TRIGGER: Increase upvotes on review upvote
+-- TRIGGER: Prevent users from upvoting own review
+-- Runs BEFORE INSERT so a rejected vote writes nothing.
+-- Feedbacks.Upvotes is not maintained by triggers; the API
+-- recounts it in batches (Backend/services/upvote_counter.py).
 -- ============================================
 DELIMITER $$
 
-CREATE TRIGGER trg_inc_upvotes
-AFTER INSERT ON Review_Upvotes
+CREATE TRIGGER trg_no_self_upvotes
+BEFORE INSERT ON Review_Upvotes
 FOR EACH ROW
 BEGIN
-    UPDATE Feedbacks
-    SET Upvotes = Upvotes + 1
+    DECLARE author VARCHAR(100);
+
+    SELECT EmailID INTO author
+    FROM Feedbacks
     WHERE FeedBackID = NEW.FeedBackID;
+
+    IF author = NEW.VoterEmail THEN
+        SIGNAL SQLSTATE '45000'
+        SET MESSAGE_TEXT = 'You cannot upvote your own review';
+    END IF;
 END $$
 
 DELIMITER ;
 
 
-
 -- ============================================
--- TRIGGER: Decrease upvotes when upvote removed
+-- TRIGGER: Add new review to the product rating summary
 -- ============================================
 DELIMITER $$
 
-CREATE TRIGGER trg_dec_upvotes
-AFTER DELETE ON Review_Upvotes
+CREATE TRIGGER trg_rating_summary_insert
+AFTER INSERT ON Feedbacks
 FOR EACH ROW
 BEGIN
-    UPDATE Feedbacks
-    SET Upvotes = Upvotes - 1
-    WHERE FeedBackID = OLD.FeedBackID;
+    INSERT INTO Product_Rating_Summary (PID, ReviewCount, RatingSum, Star1, Star2, Star3, Star4, Star5)
+    VALUES (NEW.PID, 1, NEW.Rating,
+            NEW.Rating = 1, NEW.Rating = 2, NEW.Rating = 3, NEW.Rating = 4, NEW.Rating = 5)
+    ON DUPLICATE KEY UPDATE
+        ReviewCount = ReviewCount + 1,
+        RatingSum = RatingSum + NEW.Rating,
+        Star1 = Star1 + (NEW.Rating = 1),
+        Star2 = Star2 + (NEW.Rating = 2),
+        Star3 = Star3 + (NEW.Rating = 3),
+        Star4 = Star4 + (NEW.Rating = 4),
+        Star5 = Star5 + (NEW.Rating = 5);
 END $$
 
 DELIMITER ;
 
 
+-- ============================================
+-- TRIGGER: Remove deleted review from the rating summary
+-- ============================================
+DELIMITER $$
+
+CREATE TRIGGER trg_rating_summary_delete
+AFTER DELETE ON Feedbacks
+FOR EACH ROW
+BEGIN
+    UPDATE Product_Rating_Summary
+    SET ReviewCount = ReviewCount - 1,
+        RatingSum = RatingSum - OLD.Rating,
+        Star1 = Star1 - (OLD.Rating = 1),
+        Star2 = Star2 - (OLD.Rating = 2),
+        Star3 = Star3 - (OLD.Rating = 3),
+        Star4 = Star4 - (OLD.Rating = 4),
+        Star5 = Star5 - (OLD.Rating = 5)
+    WHERE PID = OLD.PID;
+END $$
+
+DELIMITER ;
+
 
 -- ============================================
--- TRIGGER: Prevent users from upvoting own review
+-- TRIGGER: Move a review between rating summary buckets when its rating changes
 -- ============================================
 DELIMITER $$
 
-CREATE TRIGGER trg_no_self_upvotes
-AFTER INSERT ON Review_Upvotes
+CREATE TRIGGER trg_rating_summary_update
+AFTER UPDATE ON Feedbacks
 FOR EACH ROW
 BEGIN
-    DECLARE author VARCHAR(100);
+    -- Upvote counter updates leave the rating alone; skip them cheaply
+    IF NOT (OLD.Rating <=> NEW.Rating) OR OLD.PID <> NEW.PID THEN
+        UPDATE Product_Rating_Summary
+        SET ReviewCount = ReviewCount - 1,
+            RatingSum = RatingSum - OLD.Rating,
+            Star1 = Star1 - (OLD.Rating = 1),
+            Star2 = Star2 - (OLD.Rating = 2),
+            Star3 = Star3 - (OLD.Rating = 3),
+            Star4 = Star4 - (OLD.Rating = 4),
+            Star5 = Star5 - (OLD.Rating = 5)
+        WHERE PID = OLD.PID;
+
+        INSERT INTO Product_Rating_Summary (PID, ReviewCount, RatingSum, Star1, Star2, Star3, Star4, Star5)
+        VALUES (NEW.PID, 1, NEW.Rating,
+                NEW.Rating = 1, NEW.Rating = 2, NEW.Rating = 3, NEW.Rating = 4, NEW.Rating = 5)
+        ON DUPLICATE KEY UPDATE
+            ReviewCount = ReviewCount + 1,
+            RatingSum = RatingSum + NEW.Rating,
+            Star1 = Star1 + (NEW.Rating = 1),
+            Star2 = Star2 + (NEW.Rating = 2),
+            Star3 = Star3 + (NEW.Rating = 3),
+            Star4 = Star4 + (NEW.Rating = 4),
+            Star5 = Star5 + (NEW.Rating = 5);
+    END IF;
+END $$
 
-    SELECT EmailID INTO author
-    FROM Feedbacks
-    WHERE FeedBackID = NEW.FeedBackID;
+DELIMITER ;
 
-    IF author = NEW.VoterEmail THEN
+
+-- ============================================
+-- TRIGGER: Record the seller of an order line
+-- A named seller must list the product; otherwise the
+-- product's only seller is filled in (none if it has several)
+-- ============================================
+DELIMITER $$
+
+CREATE TRIGGER trg_order_detail_seller
+BEFORE INSERT ON Order_Details
+FOR EACH ROW
+BEGIN
+    DECLARE sole_seller VARCHAR(100);
+
+    IF NEW.SellerEmail IS NULL THEN
+        SELECT MIN(EmailID) INTO sole_seller
+        FROM Lists
+        WHERE PID = NEW.PID
+        HAVING COUNT(*) = 1;
+        SET NEW.SellerEmail = sole_seller;
+    ELSEIF NOT EXISTS (SELECT 1 FROM Lists WHERE EmailID = NEW.SellerEmail AND PID = NEW.PID) THEN
         SIGNAL SQLSTATE '45000'
-        SET MESSAGE_TEXT = 'You cannot upvote your own review';
+        SET MESSAGE_TEXT = 'Seller does not list this product';
+    END IF;
+END $$
+
+DELIMITER ;
+
+
+-- ============================================
+-- TRIGGER: Add an order line to the seller daily rollup
+-- ============================================
+DELIMITER $$
+
+CREATE TRIGGER trg_seller_stats_sale
+AFTER INSERT ON Order_Details
+FOR EACH ROW
+BEGIN
+    DECLARE sale_date DATE;
+    DECLARE unit_price DECIMAL(10,2);
+
+    IF NEW.SellerEmail IS NOT NULL THEN
+        SELECT OrderDate INTO sale_date FROM Orders WHERE OrderID = NEW.OrderID;
+        SELECT Price INTO unit_price FROM Products WHERE PID = NEW.PID;
+
+        INSERT INTO Seller_Daily_Stats (EmailID, StatDate, PID, UnitsSold, Revenue, OrderCount)
+        VALUES (NEW.SellerEmail, sale_date, NEW.PID, NEW.Order_Qty, unit_price * NEW.Order_Qty, 1)
+        ON DUPLICATE KEY UPDATE
+            UnitsSold = UnitsSold + NEW.Order_Qty,
+            Revenue = Revenue + unit_price * NEW.Order_Qty,
+            OrderCount = OrderCount + 1;
+    END IF;
+END $$
+
+DELIMITER ;
+
+
+-- ============================================
+-- TRIGGER: Add a review to the seller daily rollup
+-- Credited to the product's only seller, if it has one
+-- ============================================
+DELIMITER $$
+
+CREATE TRIGGER trg_seller_stats_review
+AFTER INSERT ON Feedbacks
+FOR EACH ROW
+BEGIN
+    DECLARE seller VARCHAR(100);
+
+    SELECT MIN(EmailID) INTO seller
+    FROM Lists
+    WHERE PID = NEW.PID
+    HAVING COUNT(*) = 1;
+
+    IF seller IS NOT NULL AND NEW.Date IS NOT NULL THEN
+        INSERT INTO Seller_Daily_Stats (EmailID, StatDate, PID, ReviewCount, RatingSum)
+        VALUES (seller, NEW.Date, NEW.PID, 1, NEW.Rating)
+        ON DUPLICATE KEY UPDATE
+            ReviewCount = ReviewCount + 1,
+            RatingSum = RatingSum + NEW.Rating;
     END IF;
 END $$
 
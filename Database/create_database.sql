@@ -41,7 +41,9 @@ CREATE TABLE IF NOT EXISTS Products (
     PID VARCHAR(30) PRIMARY KEY,
     ProductName VARCHAR(100) NOT NULL,
     Description TEXT NOT NULL,
-    Price DECIMAL(10,2) NOT NULL
+    Price DECIMAL(10,2) NOT NULL,
+    INDEX idx_price (Price),
+    INDEX idx_product_name (ProductName)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 
 -- ============================
@@ -53,7 +55,48 @@ CREATE TABLE IF NOT EXISTS Product_Images (
     ImageURL VARCHAR(255) NOT NULL,
     DisplayOrder INT DEFAULT 0,
     FOREIGN KEY (PID) REFERENCES Products(PID) ON DELETE CASCADE,
-    INDEX idx_pid (PID)
+    INDEX idx_pid (PID),
+    INDEX idx_pid_order (PID, DisplayOrder),
+    INDEX idx_image_url (ImageURL)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- ============================
+-- IMAGE BLOBS TABLE
+-- Content-addressed upload files (named by SHA-256) and how many
+-- Product_Images rows reference each one
+-- ============================
+CREATE TABLE IF NOT EXISTS Image_Blobs (
+    ContentHash CHAR(64) PRIMARY KEY,
+    ImageURL VARCHAR(255) NOT NULL,
+    Bytes INT NOT NULL,
+    RefCount INT NOT NULL DEFAULT 0 CHECK (RefCount >= 0),
+    CreatedAt TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE INDEX idx_blob_url (ImageURL)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- ============================
+-- IMAGE VARIANTS TABLE
+-- Resized copies of an uploaded image (thumb/card/full per format)
+-- ============================
+CREATE TABLE IF NOT EXISTS Image_Variants (
+    SourceURL VARCHAR(255) NOT NULL,
+    Variant VARCHAR(20) NOT NULL,
+    Format VARCHAR(10) NOT NULL,
+    VariantURL VARCHAR(255) NOT NULL,
+    Width INT NOT NULL,
+    Height INT NOT NULL,
+    Bytes INT NOT NULL,
+    PRIMARY KEY (SourceURL, Variant, Format),
+    INDEX idx_variant_url (VariantURL)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- ============================
+-- IMAGE PLACEHOLDERS TABLE
+-- Tiny inline preview shown while the real image loads
+-- ============================
+CREATE TABLE IF NOT EXISTS Image_Placeholders (
+    SourceURL VARCHAR(255) PRIMARY KEY,
+    Placeholder TEXT NOT NULL
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 
 -- ============================
@@ -65,7 +108,8 @@ CREATE TABLE IF NOT EXISTS Lists (
     Stock INT DEFAULT 0 CHECK (Stock >= 0),
     PRIMARY KEY (EmailID, PID),
     FOREIGN KEY (EmailID) REFERENCES Users(EmailID) ON DELETE CASCADE,
-    FOREIGN KEY (PID) REFERENCES Products(PID) ON DELETE CASCADE
+    FOREIGN KEY (PID) REFERENCES Products(PID) ON DELETE CASCADE,
+    INDEX idx_pid_stock (PID, Stock)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 
 -- ============================
@@ -73,14 +117,32 @@ CREATE TABLE IF NOT EXISTS Lists (
 -- ============================
 CREATE TABLE IF NOT EXISTS Feedbacks (
     FeedBackID INT PRIMARY KEY,
-    Date DATE,
+    Date DATE NOT NULL,
     Rating INT CHECK (Rating BETWEEN 1 AND 5),
     Review TEXT,
-    Upvotes INT DEFAULT 0 CHECK (Upvotes >= 0),
+    Upvotes INT NOT NULL DEFAULT 0 CHECK (Upvotes >= 0),
     EmailID VARCHAR(100) NOT NULL,
     PID VARCHAR(30) NOT NULL,
     FOREIGN KEY (PID) REFERENCES Products(PID) ON DELETE CASCADE,
-    FOREIGN KEY (EmailID) REFERENCES Users(EmailID) ON DELETE CASCADE
+    FOREIGN KEY (EmailID) REFERENCES Users(EmailID) ON DELETE CASCADE,
+    INDEX idx_pid_upvotes_date (PID, Upvotes, Date)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- ============================
+-- PRODUCT RATING SUMMARY TABLE
+-- Review count, rating sum and star histogram per product,
+-- maintained by the trg_rating_summary_* triggers
+-- ============================
+CREATE TABLE IF NOT EXISTS Product_Rating_Summary (
+    PID VARCHAR(30) PRIMARY KEY,
+    ReviewCount INT NOT NULL DEFAULT 0,
+    RatingSum INT NOT NULL DEFAULT 0,
+    Star1 INT NOT NULL DEFAULT 0,
+    Star2 INT NOT NULL DEFAULT 0,
+    Star3 INT NOT NULL DEFAULT 0,
+    Star4 INT NOT NULL DEFAULT 0,
+    Star5 INT NOT NULL DEFAULT 0,
+    FOREIGN KEY (PID) REFERENCES Products(PID) ON DELETE CASCADE
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 
 -- ============================
@@ -92,7 +154,8 @@ CREATE TABLE IF NOT EXISTS Review_Upvotes (
     VoterEmail VARCHAR(100) NOT NULL,
     UNIQUE (FeedBackID, VoterEmail),
     FOREIGN KEY (FeedBackID) REFERENCES Feedbacks(FeedBackID) ON DELETE CASCADE,
-    FOREIGN KEY (VoterEmail) REFERENCES Users(EmailID) ON DELETE CASCADE
+    FOREIGN KEY (VoterEmail) REFERENCES Users(EmailID) ON DELETE CASCADE,
+    INDEX idx_voter_feedback (VoterEmail, FeedBackID)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 
 -- ============================
@@ -121,7 +184,8 @@ CREATE TABLE IF NOT EXISTS Orders (
     OrderID INT AUTO_INCREMENT PRIMARY KEY,
     OrderDate DATE NOT NULL,
     EmailID VARCHAR(100) NOT NULL,
-    FOREIGN KEY (EmailID) REFERENCES Users(EmailID) ON DELETE CASCADE
+    FOREIGN KEY (EmailID) REFERENCES Users(EmailID) ON DELETE CASCADE,
+    INDEX idx_email_date (EmailID, OrderDate)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 
 -- ============================
@@ -131,7 +195,40 @@ CREATE TABLE IF NOT EXISTS Order_Details (
     OrderID INT,
     PID VARCHAR(30),
     Order_Qty INT NOT NULL CHECK (Order_Qty > 0),
+    SellerEmail VARCHAR(100) NULL,
     PRIMARY KEY (OrderID, PID),
     FOREIGN KEY (OrderID) REFERENCES Orders(OrderID) ON DELETE CASCADE,
+    FOREIGN KEY (PID) REFERENCES Products(PID) ON DELETE CASCADE,
+    CONSTRAINT fk_order_details_seller
+        FOREIGN KEY (SellerEmail) REFERENCES Users(EmailID) ON DELETE SET NULL
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- ============================
+-- SELLER DAILY STATS TABLE
+-- Per seller, day and product sales and reviews,
+-- maintained by the trg_seller_stats_* triggers
+-- ============================
+CREATE TABLE IF NOT EXISTS Seller_Daily_Stats (
+    EmailID VARCHAR(100) NOT NULL,
+    StatDate DATE NOT NULL,
+    PID VARCHAR(30) NOT NULL,
+    UnitsSold INT NOT NULL DEFAULT 0,
+    Revenue DECIMAL(12,2) NOT NULL DEFAULT 0,
+    OrderCount INT NOT NULL DEFAULT 0,
+    ReviewCount INT NOT NULL DEFAULT 0,
+    RatingSum INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (EmailID, StatDate, PID),
+    FOREIGN KEY (EmailID) REFERENCES Users(EmailID) ON DELETE CASCADE,
     FOREIGN KEY (PID) REFERENCES Products(PID) ON DELETE CASCADE
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- ============================
+-- ID WORKER LEASES TABLE
+-- Worker ID held by each running API process for generated
+-- product IDs (Backend/services/ids.py)
+-- ============================
+CREATE TABLE IF NOT EXISTS Id_Worker_Leases (
+    WorkerID SMALLINT PRIMARY KEY CHECK (WorkerID BETWEEN 0 AND 1023),
+    Owner VARCHAR(255) NOT NULL,
+    ExpiresAt DATETIME(6) NOT NULL
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
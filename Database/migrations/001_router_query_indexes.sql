@@ -0,0 +1,67 @@
+-- ============================================
+-- MIGRATION 001: Indexes for the router queries
+-- Found with Backend/tools/index_advisor.py (full scans and filesorts
+-- on the catalog, feedback, listing and order history queries).
+-- Idempotent: every index is only created when it is missing, so the
+-- file can be re-run and applied to databases created from an older
+-- create_database.sql.
+--
+-- Apply:   cd Backend && python -m tools.migrate
+-- Timings: python -m tools.index_advisor --save before.json
+--          python -m tools.migrate
+--          python -m tools.index_advisor --compare before.json
+-- ============================================
+
+CREATE TABLE IF NOT EXISTS Schema_Migrations (
+    Version INT PRIMARY KEY,
+    Name VARCHAR(100) NOT NULL,
+    AppliedAt DATETIME DEFAULT CURRENT_TIMESTAMP
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+DROP PROCEDURE IF EXISTS AddIndexIfMissing;
+
+DELIMITER $$
+
+CREATE PROCEDURE AddIndexIfMissing(
+    IN p_Table VARCHAR(64),
+    IN p_Index VARCHAR(64),
+    IN p_Columns VARCHAR(255)
+)
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE()
+          AND TABLE_NAME = p_Table
+          AND INDEX_NAME = p_Index
+    ) THEN
+        SET @ddl = CONCAT('ALTER TABLE ', p_Table, ' ADD INDEX ', p_Index, ' (', p_Columns, ')');
+        PREPARE stmt FROM @ddl;
+        EXECUTE stmt;
+        DEALLOCATE PREPARE stmt;
+    END IF;
+END $$
+
+DELIMITER ;
+
+-- Reviews of a product, most upvoted first (feedback.product, rating subqueries)
+CALL AddIndexIfMissing('Feedbacks', 'idx_pid_upvotes_date', 'PID, Upvotes, Date');
+
+-- Order history of a user, newest first (orders.user)
+CALL AddIndexIfMissing('Orders', 'idx_email_date', 'EmailID, OrderDate');
+
+-- Stock and seller lookups per product (stock.total, lists.product_sellers, listing aggregates)
+CALL AddIndexIfMissing('Lists', 'idx_pid_stock', 'PID, Stock');
+
+-- Catalog sorting and price filters (products.list)
+CALL AddIndexIfMissing('Products', 'idx_price', 'Price');
+CALL AddIndexIfMissing('Products', 'idx_product_name', 'ProductName');
+
+-- First image of each product without a filesort (products.list PrimaryImage)
+CALL AddIndexIfMissing('Product_Images', 'idx_pid_order', 'PID, DisplayOrder');
+
+-- Reference counting and garbage collection by URL
+CALL AddIndexIfMissing('Product_Images', 'idx_image_url', 'ImageURL');
+
+DROP PROCEDURE IF EXISTS AddIndexIfMissing;
+
+INSERT IGNORE INTO Schema_Migrations (Version, Name) VALUES (1, 'router_query_indexes');
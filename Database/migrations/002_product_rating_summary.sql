@@ -0,0 +1,113 @@
+-- ============================================
+-- MIGRATION 002: Per-product rating summary
+-- Product_Rating_Summary keeps the review count, rating sum and 1-5 star
+-- histogram of each product, maintained by triggers on Feedbacks, so
+-- product pages read ratings with one primary-key lookup instead of
+-- aggregating Feedbacks.
+--
+-- Foreign-key cascades do not fire triggers, so reviews removed by
+-- deleting a user are not subtracted. Re-running this migration
+-- recomputes every summary from Feedbacks.
+-- ============================================
+
+CREATE TABLE IF NOT EXISTS Product_Rating_Summary (
+    PID VARCHAR(30) PRIMARY KEY,
+    ReviewCount INT NOT NULL DEFAULT 0,
+    RatingSum INT NOT NULL DEFAULT 0,
+    Star1 INT NOT NULL DEFAULT 0,
+    Star2 INT NOT NULL DEFAULT 0,
+    Star3 INT NOT NULL DEFAULT 0,
+    Star4 INT NOT NULL DEFAULT 0,
+    Star5 INT NOT NULL DEFAULT 0,
+    FOREIGN KEY (PID) REFERENCES Products(PID) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+DROP TRIGGER IF EXISTS trg_rating_summary_insert;
+DROP TRIGGER IF EXISTS trg_rating_summary_delete;
+DROP TRIGGER IF EXISTS trg_rating_summary_update;
+
+DELIMITER $$
+
+CREATE TRIGGER trg_rating_summary_insert
+AFTER INSERT ON Feedbacks
+FOR EACH ROW
+BEGIN
+    INSERT INTO Product_Rating_Summary (PID, ReviewCount, RatingSum, Star1, Star2, Star3, Star4, Star5)
+    VALUES (NEW.PID, 1, NEW.Rating,
+            NEW.Rating = 1, NEW.Rating = 2, NEW.Rating = 3, NEW.Rating = 4, NEW.Rating = 5)
+    ON DUPLICATE KEY UPDATE
+        ReviewCount = ReviewCount + 1,
+        RatingSum = RatingSum + NEW.Rating,
+        Star1 = Star1 + (NEW.Rating = 1),
+        Star2 = Star2 + (NEW.Rating = 2),
+        Star3 = Star3 + (NEW.Rating = 3),
+        Star4 = Star4 + (NEW.Rating = 4),
+        Star5 = Star5 + (NEW.Rating = 5);
+END $$
+
+CREATE TRIGGER trg_rating_summary_delete
+AFTER DELETE ON Feedbacks
+FOR EACH ROW
+BEGIN
+    UPDATE Product_Rating_Summary
+    SET ReviewCount = ReviewCount - 1,
+        RatingSum = RatingSum - OLD.Rating,
+        Star1 = Star1 - (OLD.Rating = 1),
+        Star2 = Star2 - (OLD.Rating = 2),
+        Star3 = Star3 - (OLD.Rating = 3),
+        Star4 = Star4 - (OLD.Rating = 4),
+        Star5 = Star5 - (OLD.Rating = 5)
+    WHERE PID = OLD.PID;
+END $$
+
+CREATE TRIGGER trg_rating_summary_update
+AFTER UPDATE ON Feedbacks
+FOR EACH ROW
+BEGIN
+    -- Upvote counter updates leave the rating alone; skip them cheaply
+    IF NOT (OLD.Rating <=> NEW.Rating) OR OLD.PID <> NEW.PID THEN
+        UPDATE Product_Rating_Summary
+        SET ReviewCount = ReviewCount - 1,
+            RatingSum = RatingSum - OLD.Rating,
+            Star1 = Star1 - (OLD.Rating = 1),
+            Star2 = Star2 - (OLD.Rating = 2),
+            Star3 = Star3 - (OLD.Rating = 3),
+            Star4 = Star4 - (OLD.Rating = 4),
+            Star5 = Star5 - (OLD.Rating = 5)
+        WHERE PID = OLD.PID;
+
+        INSERT INTO Product_Rating_Summary (PID, ReviewCount, RatingSum, Star1, Star2, Star3, Star4, Star5)
+        VALUES (NEW.PID, 1, NEW.Rating,
+                NEW.Rating = 1, NEW.Rating = 2, NEW.Rating = 3, NEW.Rating = 4, NEW.Rating = 5)
+        ON DUPLICATE KEY UPDATE
+            ReviewCount = ReviewCount + 1,
+            RatingSum = RatingSum + NEW.Rating,
+            Star1 = Star1 + (NEW.Rating = 1),
+            Star2 = Star2 + (NEW.Rating = 2),
+            Star3 = Star3 + (NEW.Rating = 3),
+            Star4 = Star4 + (NEW.Rating = 4),
+            Star5 = Star5 + (NEW.Rating = 5);
+    END IF;
+END $$
+
+DELIMITER ;
+
+-- Backfill (and repair) from the existing reviews
+INSERT INTO Product_Rating_Summary (PID, ReviewCount, RatingSum, Star1, Star2, Star3, Star4, Star5)
+SELECT PID, COUNT(*), SUM(Rating),
+       SUM(Rating = 1), SUM(Rating = 2), SUM(Rating = 3), SUM(Rating = 4), SUM(Rating = 5)
+FROM Feedbacks
+GROUP BY PID
+ON DUPLICATE KEY UPDATE
+    ReviewCount = VALUES(ReviewCount),
+    RatingSum = VALUES(RatingSum),
+    Star1 = VALUES(Star1),
+    Star2 = VALUES(Star2),
+    Star3 = VALUES(Star3),
+    Star4 = VALUES(Star4),
+    Star5 = VALUES(Star5);
+
+DELETE s FROM Product_Rating_Summary s
+WHERE NOT EXISTS (SELECT 1 FROM Feedbacks f WHERE f.PID = s.PID);
+
+INSERT IGNORE INTO Schema_Migrations (Version, Name) VALUES (2, 'product_rating_summary');
@@ -0,0 +1,67 @@
+-- ============================================
+-- MIGRATION 003: Buffered upvote counters
+-- Feedbacks.Upvotes is no longer bumped by a trigger on every vote;
+-- the API marks voted reviews and recounts them in periodic batches
+-- (Backend/services/upvote_counter.py). The self-vote check moves to
+-- BEFORE INSERT so a rejected vote is never written.
+-- ============================================
+
+DROP TRIGGER IF EXISTS trg_inc_upvotes;
+DROP TRIGGER IF EXISTS trg_dec_upvotes;
+DROP TRIGGER IF EXISTS trg_no_self_upvotes;
+
+DELIMITER $$
+
+CREATE TRIGGER trg_no_self_upvotes
+BEFORE INSERT ON Review_Upvotes
+FOR EACH ROW
+BEGIN
+    DECLARE author VARCHAR(100);
+
+    SELECT EmailID INTO author
+    FROM Feedbacks
+    WHERE FeedBackID = NEW.FeedBackID;
+
+    IF author = NEW.VoterEmail THEN
+        SIGNAL SQLSTATE '45000'
+        SET MESSAGE_TEXT = 'You cannot upvote your own review';
+    END IF;
+END $$
+
+DELIMITER ;
+
+-- Lookups of one voter's votes (POST /upvotes/voted)
+DROP PROCEDURE IF EXISTS AddIndexIfMissing;
+
+DELIMITER $$
+
+CREATE PROCEDURE AddIndexIfMissing(
+    IN p_Table VARCHAR(64),
+    IN p_Index VARCHAR(64),
+    IN p_Columns VARCHAR(255)
+)
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE()
+          AND TABLE_NAME = p_Table
+          AND INDEX_NAME = p_Index
+    ) THEN
+        SET @ddl = CONCAT('ALTER TABLE ', p_Table, ' ADD INDEX ', p_Index, ' (', p_Columns, ')');
+        PREPARE stmt FROM @ddl;
+        EXECUTE stmt;
+        DEALLOCATE PREPARE stmt;
+    END IF;
+END $$
+
+DELIMITER ;
+
+CALL AddIndexIfMissing('Review_Upvotes', 'idx_voter_feedback', 'VoterEmail, FeedBackID');
+
+DROP PROCEDURE IF EXISTS AddIndexIfMissing;
+
+-- Bring counters in line with the votes before the buffer takes over
+UPDATE Feedbacks f
+SET Upvotes = (SELECT COUNT(*) FROM Review_Upvotes r WHERE r.FeedBackID = f.FeedBackID);
+
+INSERT IGNORE INTO Schema_Migrations (Version, Name) VALUES (3, 'buffered_upvotes');
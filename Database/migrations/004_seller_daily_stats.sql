@@ -0,0 +1,84 @@
+-- ============================================
+-- MIGRATION 004: Seller daily rollup
+-- Units sold, revenue, order lines and reviews per seller, product and
+-- day, maintained by triggers on Order_Details and Feedbacks so the
+-- seller dashboard reads a primary-key range instead of joining orders.
+--
+-- Orders do not record which seller fulfilled them; a sale is credited
+-- to the first seller (by EmailID) listing the product, the same rule
+-- the backfill uses.
+--
+-- Fill in existing history afterwards:
+--   cd Backend && python -m tools.backfill_seller_stats
+-- ============================================
+
+CREATE TABLE IF NOT EXISTS Seller_Daily_Stats (
+    EmailID VARCHAR(100) NOT NULL,
+    StatDate DATE NOT NULL,
+    PID VARCHAR(30) NOT NULL,
+    UnitsSold INT NOT NULL DEFAULT 0,
+    Revenue DECIMAL(12,2) NOT NULL DEFAULT 0,
+    OrderCount INT NOT NULL DEFAULT 0,
+    ReviewCount INT NOT NULL DEFAULT 0,
+    RatingSum INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (EmailID, StatDate, PID),
+    FOREIGN KEY (EmailID) REFERENCES Users(EmailID) ON DELETE CASCADE,
+    FOREIGN KEY (PID) REFERENCES Products(PID) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+DROP TRIGGER IF EXISTS trg_seller_stats_sale;
+DROP TRIGGER IF EXISTS trg_seller_stats_review;
+
+DELIMITER $$
+
+CREATE TRIGGER trg_seller_stats_sale
+AFTER INSERT ON Order_Details
+FOR EACH ROW
+BEGIN
+    DECLARE seller VARCHAR(100);
+    DECLARE sale_date DATE;
+    DECLARE unit_price DECIMAL(10,2);
+
+    SELECT EmailID INTO seller
+    FROM Lists
+    WHERE PID = NEW.PID
+    ORDER BY EmailID
+    LIMIT 1;
+
+    IF seller IS NOT NULL THEN
+        SELECT OrderDate INTO sale_date FROM Orders WHERE OrderID = NEW.OrderID;
+        SELECT Price INTO unit_price FROM Products WHERE PID = NEW.PID;
+
+        INSERT INTO Seller_Daily_Stats (EmailID, StatDate, PID, UnitsSold, Revenue, OrderCount)
+        VALUES (seller, sale_date, NEW.PID, NEW.Order_Qty, unit_price * NEW.Order_Qty, 1)
+        ON DUPLICATE KEY UPDATE
+            UnitsSold = UnitsSold + NEW.Order_Qty,
+            Revenue = Revenue + unit_price * NEW.Order_Qty,
+            OrderCount = OrderCount + 1;
+    END IF;
+END $$
+
+CREATE TRIGGER trg_seller_stats_review
+AFTER INSERT ON Feedbacks
+FOR EACH ROW
+BEGIN
+    DECLARE seller VARCHAR(100);
+
+    SELECT EmailID INTO seller
+    FROM Lists
+    WHERE PID = NEW.PID
+    ORDER BY EmailID
+    LIMIT 1;
+
+    IF seller IS NOT NULL AND NEW.Date IS NOT NULL THEN
+        INSERT INTO Seller_Daily_Stats (EmailID, StatDate, PID, ReviewCount, RatingSum)
+        VALUES (seller, NEW.Date, NEW.PID, 1, NEW.Rating)
+        ON DUPLICATE KEY UPDATE
+            ReviewCount = ReviewCount + 1,
+            RatingSum = RatingSum + NEW.Rating;
+    END IF;
+END $$
+
+DELIMITER ;
+
+INSERT IGNORE INTO Schema_Migrations (Version, Name) VALUES (4, 'seller_daily_stats');
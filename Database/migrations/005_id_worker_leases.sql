@@ -0,0 +1,14 @@
+-- ============================================
+-- MIGRATION 005: ID worker leases
+-- Each API process leases a worker ID (0-1023) for the time-ordered
+-- product IDs (Backend/services/ids.py) instead of deriving one from
+-- its process ID, which collides across workers and containers.
+-- A lease is renewed while the process runs and can be taken over by
+-- another process once ExpiresAt has passed.
+-- ============================================
+
+CREATE TABLE IF NOT EXISTS Id_Worker_Leases (
+    WorkerID SMALLINT PRIMARY KEY CHECK (WorkerID BETWEEN 0 AND 1023),
+    Owner VARCHAR(255) NOT NULL,
+    ExpiresAt DATETIME(6) NOT NULL
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
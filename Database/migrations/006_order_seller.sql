@@ -0,0 +1,118 @@
+-- ============================================
+-- MIGRATION 006: Seller of each order line
+-- Order_Details records which seller an item was bought from, and the
+-- seller rollup (migration 004) credits the sale to that seller instead
+-- of to the first seller (by EmailID) listing the product.
+--
+-- A line may name its seller, who must list the product; when it does
+-- not and exactly one seller lists the product, that seller is filled
+-- in. Lines of products with several sellers that name none stay
+-- unattributed and are left out of the rollup. Existing lines are
+-- attributed by the same sole-seller rule; reviews, which name no
+-- seller, follow it too.
+--
+-- Rebuild the rollup afterwards:
+--   cd Backend && python -m tools.backfill_seller_stats
+-- ============================================
+
+DROP PROCEDURE IF EXISTS AddOrderSellerColumn;
+
+DELIMITER $$
+
+CREATE PROCEDURE AddOrderSellerColumn()
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE()
+          AND TABLE_NAME = 'Order_Details'
+          AND COLUMN_NAME = 'SellerEmail'
+    ) THEN
+        ALTER TABLE Order_Details
+            ADD COLUMN SellerEmail VARCHAR(100) NULL,
+            ADD CONSTRAINT fk_order_details_seller
+                FOREIGN KEY (SellerEmail) REFERENCES Users(EmailID) ON DELETE SET NULL;
+    END IF;
+END $$
+
+DELIMITER ;
+
+CALL AddOrderSellerColumn();
+DROP PROCEDURE AddOrderSellerColumn;
+
+UPDATE Order_Details od
+INNER JOIN (
+    SELECT PID, MIN(EmailID) as EmailID
+    FROM Lists
+    GROUP BY PID
+    HAVING COUNT(*) = 1
+) seller ON seller.PID = od.PID
+SET od.SellerEmail = seller.EmailID
+WHERE od.SellerEmail IS NULL;
+
+DROP TRIGGER IF EXISTS trg_order_detail_seller;
+DROP TRIGGER IF EXISTS trg_seller_stats_sale;
+DROP TRIGGER IF EXISTS trg_seller_stats_review;
+
+DELIMITER $$
+
+CREATE TRIGGER trg_order_detail_seller
+BEFORE INSERT ON Order_Details
+FOR EACH ROW
+BEGIN
+    DECLARE sole_seller VARCHAR(100);
+
+    IF NEW.SellerEmail IS NULL THEN
+        SELECT MIN(EmailID) INTO sole_seller
+        FROM Lists
+        WHERE PID = NEW.PID
+        HAVING COUNT(*) = 1;
+        SET NEW.SellerEmail = sole_seller;
+    ELSEIF NOT EXISTS (SELECT 1 FROM Lists WHERE EmailID = NEW.SellerEmail AND PID = NEW.PID) THEN
+        SIGNAL SQLSTATE '45000'
+        SET MESSAGE_TEXT = 'Seller does not list this product';
+    END IF;
+END $$
+
+CREATE TRIGGER trg_seller_stats_sale
+AFTER INSERT ON Order_Details
+FOR EACH ROW
+BEGIN
+    DECLARE sale_date DATE;
+    DECLARE unit_price DECIMAL(10,2);
+
+    IF NEW.SellerEmail IS NOT NULL THEN
+        SELECT OrderDate INTO sale_date FROM Orders WHERE OrderID = NEW.OrderID;
+        SELECT Price INTO unit_price FROM Products WHERE PID = NEW.PID;
+
+        INSERT INTO Seller_Daily_Stats (EmailID, StatDate, PID, UnitsSold, Revenue, OrderCount)
+        VALUES (NEW.SellerEmail, sale_date, NEW.PID, NEW.Order_Qty, unit_price * NEW.Order_Qty, 1)
+        ON DUPLICATE KEY UPDATE
+            UnitsSold = UnitsSold + NEW.Order_Qty,
+            Revenue = Revenue + unit_price * NEW.Order_Qty,
+            OrderCount = OrderCount + 1;
+    END IF;
+END $$
+
+CREATE TRIGGER trg_seller_stats_review
+AFTER INSERT ON Feedbacks
+FOR EACH ROW
+BEGIN
+    DECLARE seller VARCHAR(100);
+
+    SELECT MIN(EmailID) INTO seller
+    FROM Lists
+    WHERE PID = NEW.PID
+    HAVING COUNT(*) = 1;
+
+    IF seller IS NOT NULL AND NEW.Date IS NOT NULL THEN
+        INSERT INTO Seller_Daily_Stats (EmailID, StatDate, PID, ReviewCount, RatingSum)
+        VALUES (seller, NEW.Date, NEW.PID, 1, NEW.Rating)
+        ON DUPLICATE KEY UPDATE
+            ReviewCount = ReviewCount + 1,
+            RatingSum = RatingSum + NEW.Rating;
+    END IF;
+END $$
+
+DELIMITER ;
+
+INSERT IGNORE INTO Schema_Migrations (Version, Name) VALUES (6, 'order_seller');
@@ -0,0 +1,19 @@
+-- ============================================
+-- MIGRATION 007: Non-null review sort columns
+-- Review pages are keyset-paginated on (Upvotes, Date, FeedBackID)
+-- (GET /feedback/product/{pid}). A NULL in either column fails every
+-- comparison in the "after this cursor" predicate, so pages stopped at
+-- the first such review and never returned the rest. Both columns are
+-- now NOT NULL. Reviews without a date get 1000-01-01, which sorts
+-- them last among equally upvoted reviews, and missing upvote counts
+-- become 0 (the upvote recount fills in the real value).
+-- ============================================
+
+UPDATE Feedbacks SET Date = '1000-01-01' WHERE Date IS NULL;
+UPDATE Feedbacks SET Upvotes = 0 WHERE Upvotes IS NULL;
+
+ALTER TABLE Feedbacks
+    MODIFY Date DATE NOT NULL,
+    MODIFY Upvotes INT NOT NULL DEFAULT 0;
+
+INSERT IGNORE INTO Schema_Migrations (Version, Name) VALUES (7, 'feedback_sort_not_null');
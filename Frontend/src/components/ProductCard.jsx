@@ -19,12 +19,15 @@ const ProductCard = ({ product }) => {
     addToCart(product)
   }
 
+  // Prefer the small catalog thumbnail; fall back to the original upload until variants exist
+  const imageSrc = product.PrimaryImageVariants?.thumb?.webp || product.PrimaryImage
+
   return (
     <Link to={`/products/${product.PID}`} className="product-card card">
       <div className="product-image">
         {product.PrimaryImage ? (
           <img
-            src={`http://127.0.0.1:8000/${product.PrimaryImage}`}
+            src={`http://127.0.0.1:8000/${imageSrc}`}
             alt={product.ProductName}
             className="product-image-img"
             onError={(e) => {
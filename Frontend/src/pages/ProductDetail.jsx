@@ -1,6 +1,6 @@
 import React, { useState, useEffect } from 'react'
 import { useParams, useNavigate } from 'react-router-dom'
-import { getProduct, getProductImages, getProductFeedbacks } from '../services/api'
+import { getProduct, getProductImages, getProductFeedbacks, subscribeToProducts } from '../services/api'
 import { useCart } from '../context/CartContext'
 import './ProductDetail.css'
 
@@ -11,6 +11,9 @@ const ProductDetail = () => {
   const [product, setProduct] = useState(null)
   const [productImages, setProductImages] = useState([])
   const [feedbacks, setFeedbacks] = useState([])
+  const [reviewSummary, setReviewSummary] = useState(null)
+  const [nextReviewCursor, setNextReviewCursor] = useState(null)
+  const [loadingReviews, setLoadingReviews] = useState(false)
   const [selectedImageIndex, setSelectedImageIndex] = useState(0)
   const [loading, setLoading] = useState(true)
   const [error, setError] = useState(null)
@@ -36,11 +39,15 @@ const ProductDetail = () => {
           
           // Fetch product feedbacks
           try {
-            const reviews = await getProductFeedbacks(pid)
-            setFeedbacks(reviews)
+            const page = await getProductFeedbacks(pid)
+            setFeedbacks(page.items)
+            setReviewSummary(page.summary)
+            setNextReviewCursor(page.next_cursor)
           } catch (reviewErr) {
             console.error('Failed to load reviews:', reviewErr)
             setFeedbacks([])
+            setReviewSummary(null)
+            setNextReviewCursor(null)
           }
         } catch (err) {
           // Fallback to mock data
@@ -62,6 +69,28 @@ const ProductDetail = () => {
     fetchProduct()
   }, [pid])
 
+  // Keep stock, price and rating current without re-fetching the product
+  useEffect(() => {
+    const unsubscribe = subscribeToProducts([pid], ({ PID, ...changes }) => {
+      setProduct((current) => (current && current.PID === PID ? { ...current, ...changes } : current))
+    })
+    return unsubscribe
+  }, [pid])
+
+  const loadMoreReviews = async () => {
+    if (!nextReviewCursor || loadingReviews) return
+    setLoadingReviews(true)
+    try {
+      const page = await getProductFeedbacks(pid, nextReviewCursor)
+      setFeedbacks((current) => [...current, ...page.items])
+      setNextReviewCursor(page.next_cursor)
+    } catch (err) {
+      console.error('Failed to load more reviews:', err)
+    } finally {
+      setLoadingReviews(false)
+    }
+  }
+
   const handleAddToCart = () => {
     // Check stock before adding
     if (product.TotalStock !== undefined && product.TotalStock === 0) {
@@ -257,7 +286,26 @@ const ProductDetail = () => {
         
         {feedbacks.length > 0 && (
           <div className="reviews-section">
-            <h2>Customer Reviews ({feedbacks.length})</h2>
+            <h2>Customer Reviews ({reviewSummary?.ReviewCount ?? feedbacks.length})</h2>
+            {reviewSummary && reviewSummary.ReviewCount > 0 && (
+              <div className="rating-histogram">
+                {[5, 4, 3, 2, 1].map((star) => {
+                  const count = reviewSummary.Histogram[star] || 0
+                  return (
+                    <div key={star} className="histogram-row">
+                      <span className="histogram-label">{star} ⭐</span>
+                      <div className="histogram-bar">
+                        <div
+                          className="histogram-fill"
+                          style={{ width: `${(count / reviewSummary.ReviewCount) * 100}%` }}
+                        />
+                      </div>
+                      <span className="histogram-count">{count}</span>
+                    </div>
+                  )
+                })}
+              </div>
+            )}
             <div className="reviews-list">
               {feedbacks.map((review) => (
                 <div key={review.FeedBackID} className="review-item">
@@ -279,6 +327,15 @@ const ProductDetail = () => {
                 </div>
               ))}
             </div>
+            {nextReviewCursor && (
+              <button
+                className="load-more-reviews"
+                onClick={loadMoreReviews}
+                disabled={loadingReviews}
+              >
+                {loadingReviews ? 'Loading...' : 'Show more reviews'}
+              </button>
+            )}
           </div>
         )}
       </div>
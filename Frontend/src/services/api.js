@@ -9,6 +9,25 @@ const api = axios.create({
   },
 })
 
+// Read-your-writes: after a write the backend returns X-Primary-Until, and
+// echoing it back keeps our reads on the primary database until then
+let primaryUntil = null
+
+api.interceptors.request.use((config) => {
+  if (primaryUntil && Date.now() / 1000 < primaryUntil) {
+    config.headers['X-Primary-Until'] = String(primaryUntil)
+  }
+  return config
+})
+
+api.interceptors.response.use((response) => {
+  const until = response.headers['x-primary-until']
+  if (until) {
+    primaryUntil = parseFloat(until)
+  }
+  return response
+})
+
 // Users API
 export const registerUser = async (userData) => {
   const response = await api.post('/users/register', userData)
@@ -57,8 +76,14 @@ export const getAllCategories = async () => {
   return response.data
 }
 
-export const getProductFeedbacks = async (pid) => {
-  const response = await api.get(`/feedback/product/${pid}`)
+// Returns { items, next_cursor, summary }; summary (count, average, star histogram)
+// comes with the first page only. Pass next_cursor to load the following page.
+export const getProductFeedbacks = async (pid, cursor = null, limit = 10) => {
+  const params = { limit }
+  if (cursor) {
+    params.cursor = cursor
+  }
+  const response = await api.get(`/feedback/product/${pid}`, { params })
   return response.data
 }
 
@@ -67,11 +92,44 @@ export const getProduct = async (pid) => {
   return response.data
 }
 
+// Live stock, price and rating of the given products over Server-Sent Events.
+// onChange({ PID, ...changedFields }) is called for the initial snapshot of each
+// product and then for every change. Returns a function that closes the stream.
+export const subscribeToProducts = (pids, onChange) => {
+  const params = new URLSearchParams({ pids: pids.join(',') })
+  const source = new EventSource(`${API_BASE_URL}/live/products?${params}`)
+  source.addEventListener('snapshot', (event) => {
+    JSON.parse(event.data).forEach(onChange)
+  })
+  source.addEventListener('update', (event) => {
+    onChange(JSON.parse(event.data))
+  })
+  return () => source.close()
+}
+
+export const updateProductPrice = async (pid, price) => {
+  const response = await api.put(`/products/${pid}/price`, { Price: price })
+  return response.data
+}
+
 export const addProduct = async (productData) => {
   const response = await api.post('/products/add', productData)
   return response.data
 }
 
+// Bulk import from a CSV or NDJSON file; returns counts and per-row errors
+export const importCatalog = async (file, sellerEmail) => {
+  const formData = new FormData()
+  formData.append('file', file)
+  const response = await api.post('/products/import', formData, {
+    params: { seller_email: sellerEmail },
+    headers: {
+      'Content-Type': 'multipart/form-data',
+    },
+  })
+  return response.data
+}
+
 export const uploadProductImage = async (imageFile) => {
   const formData = new FormData()
   formData.append('file', imageFile)
@@ -182,6 +240,25 @@ export const addFeedback = async (feedbackData) => {
   return response.data
 }
 
+// Upvotes API
+// Returns { FeedBackID, Upvoted, Upvotes } after voting or unvoting
+export const toggleUpvote = async (feedbackId, voterEmail) => {
+  const response = await api.post('/upvotes/toggle', {
+    FeedBackID: feedbackId,
+    VoterEmail: voterEmail
+  })
+  return response.data
+}
+
+// Which of the given reviews the user has already upvoted: { Voted: [FeedBackID, ...] }
+export const getVotedReviews = async (voterEmail, feedbackIds) => {
+  const response = await api.post('/upvotes/voted', {
+    VoterEmail: voterEmail,
+    FeedBackIDs: feedbackIds
+  })
+  return response.data
+}
+
 // Lists API (Product listings by sellers)
 export const addToList = async (listData) => {
   const response = await api.post('/lists/add', listData)
@@ -208,5 +285,32 @@ export const removeListing = async (emailId, pid) => {
   return response.data
 }
 
+// Batch listing changes in one transaction; each returns { counts, results }
+// with a status per PID. items: [{ PID, Stock }]
+export const upsertListings = async (emailId, items) => {
+  const response = await api.post('/lists/batch/upsert', { EmailID: emailId, Items: items })
+  return response.data
+}
+
+export const updateListings = async (emailId, items) => {
+  const response = await api.put('/lists/batch/update', { EmailID: emailId, Items: items })
+  return response.data
+}
+
+export const removeListings = async (emailId, pids) => {
+  const response = await api.post('/lists/batch/remove', { EmailID: emailId, PIDs: pids })
+  return response.data
+}
+
+// Seller dashboard: { totals, daily, products } between start and end
+// (YYYY-MM-DD, inclusive; defaults to the last 30 days)
+export const getSellerDashboard = async (emailId, start = null, end = null) => {
+  const params = {}
+  if (start) params.start = start
+  if (end) params.end = end
+  const response = await api.get(`/analytics/seller/${emailId}`, { params })
+  return response.data
+}
+
 export default api
 